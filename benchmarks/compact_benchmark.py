@@ -0,0 +1,87 @@
+"""
+Compare memory per entry of Directory and CompactDirectory trees
+
+    python benchmarks/compact_benchmark.py [count]
+"""
+import sys
+import tracemalloc
+
+from pathlib import Path
+from typing import Any, Callable
+
+from snapfs import compact, transform
+from snapfs.datatypes import Directory, File
+
+
+BLOBS_PATH = Path("/repository/.snapfs/blobs")
+
+
+def get_hashid(i: int) -> str:
+    return transform.string_as_hashid(str(i))
+
+
+def create_directory(count: int) -> Directory:
+    root = Directory()
+
+    for i in range(count):
+        name = "directory_{}".format(i % 1000)
+        directory = root.directories.setdefault(name, Directory())
+
+        hashid = get_hashid(i)
+
+        directory.files["file_{}.txt".format(i)] = File(
+            BLOBS_PATH.joinpath(transform.hashid_as_path(hashid)),
+            True,
+            BLOBS_PATH.joinpath(transform.hashid_as_path(hashid)),
+            hashid,
+        )
+
+    return root
+
+
+def create_compact_directory(count: int) -> compact.CompactDirectory:
+    root = compact.CompactDirectory()
+
+    for i in range(count):
+        name = "directory_{}".format(i % 1000)
+
+        if name not in root.directories:
+            root.directories[name] = compact.CompactDirectory(name, root)
+
+        directory = root.directories[name]
+
+        file_name = "file_{}.txt".format(i)
+
+        directory.files[file_name] = compact.CompactFile(
+            file_name, directory, bytes.fromhex(get_hashid(i)), BLOBS_PATH
+        )
+
+    return root
+
+
+def measure(function: Callable[[int], Any], count: int) -> float:
+    tracemalloc.start()
+
+    result = function(count)
+
+    size, _ = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+
+    del result
+
+    return size / count
+
+
+def main(count: int = 100000) -> None:
+    directory_size = measure(create_directory, count)
+    compact_size = measure(create_compact_directory, count)
+
+    print("{} files".format(count))
+    print("{:>10}: {:.0f} bytes per file".format("directory", directory_size))
+    print("{:>10}: {:.0f} bytes per file".format("compact", compact_size))
+    print("{:>10}: {:.1f}x".format("ratio", directory_size / compact_size))
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
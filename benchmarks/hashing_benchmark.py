@@ -0,0 +1,93 @@
+"""
+Compare hashing backends on a tree of many small files
+and the throughput of every hash algorithm on one large buffer
+
+    python benchmarks/hashing_benchmark.py [count] [size]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from snapfs import hashing, transform
+
+
+# size of the buffer the algorithms are compared on
+BUFFER_SIZE = 256 * 1024 * 1024
+
+
+def create_files(path: Path, count: int, size: int) -> list:
+    paths = []
+
+    for i in range(count):
+        directory_path = path.joinpath(str(i % 100))
+        directory_path.mkdir(exist_ok=True)
+
+        file_path = directory_path.joinpath("file_{}".format(i))
+
+        with open(file_path, "wb") as f:
+            f.write(os.urandom(size))
+
+        paths.append(file_path)
+
+    return paths
+
+
+def main(count: int = 20000, size: int = 256) -> None:
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        paths = create_files(Path(tmpdirname), count, size)
+
+        print(
+            "{} files of {} bytes, {} cpus".format(
+                count, size, os.cpu_count()
+            )
+        )
+
+        for backend in hashing.BACKENDS:
+            start = time.perf_counter()
+
+            for _ in hashing.hash_paths(paths, backend):
+                pass
+
+            duration = time.perf_counter() - start
+
+            print(
+                "{:>8}: {:.2f}s, {:.0f} files/s".format(
+                    backend, duration, count / duration
+                )
+            )
+
+        for algorithm in transform.ALGORITHMS:
+            start = time.perf_counter()
+
+            for _ in hashing.hash_paths(paths, algorithm=algorithm):
+                pass
+
+            duration = time.perf_counter() - start
+
+            print(
+                "{:>8}: {:.2f}s, {:.0f} files/s".format(
+                    algorithm, duration, count / duration
+                )
+            )
+
+    data = os.urandom(BUFFER_SIZE)
+
+    for algorithm in transform.ALGORITHMS:
+        start = time.perf_counter()
+
+        transform.bytes_as_hashid(data, algorithm)
+
+        duration = time.perf_counter() - start
+
+        print(
+            "{:>8}: {:.0f} MiB/s".format(
+                algorithm, BUFFER_SIZE / duration / 1024 / 1024
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,191 @@
+import asyncio
+import functools
+import weakref
+
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from snapfs import directory, file, repository, transform
+from snapfs.datatypes import Commit, Differences, Directory, File, Progress
+
+
+T = TypeVar("T")
+
+
+class Runner:
+    """
+    This class runs blocking functions in an executor
+
+    The number of functions running at the same time is bounded per
+    event loop, so one runner can be shared by many concurrent tasks
+    without starving the loop or the executor.
+    """
+
+    def __init__(
+        self, concurrency: int = 4, executor: Optional[Executor] = None
+    ):
+        self.concurrency = concurrency
+        self.executor = executor
+        self._semaphores: Any = weakref.WeakKeyDictionary()
+
+    def get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+
+        return self._semaphores[loop]
+
+    async def run(self, function: Callable[..., T], *args: Any) -> T:
+        async with self.get_semaphore():
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(function, *args)
+            )
+
+
+default_runner = Runner()
+
+
+def iterate_files(
+    source: Directory, target: Directory
+) -> Iterator[Tuple[Dict[str, File], str, File]]:
+    for key, value in source.directories.items():
+        target.directories[key] = Directory()
+
+        yield from iterate_files(value, target.directories[key])
+
+    for key, value in source.files.items():
+        target.files[key] = value
+
+        yield target.files, key, value
+
+
+async def load_from_directory_path(
+    current_path: Path,
+    patterns: List[str] = [],
+    runner: Optional[Runner] = None,
+) -> Directory:
+    return await (runner or default_runner).run(
+        directory.load_from_directory_path, current_path, patterns
+    )
+
+
+async def load_from_blob(
+    path: Path, hashid: str, runner: Optional[Runner] = None
+) -> Directory:
+    return await (runner or default_runner).run(
+        directory.load_from_blob, path, hashid
+    )
+
+
+async def compare(
+    path: Path,
+    old: Directory,
+    new: Directory,
+    algorithm: str = transform.SHA256,
+    runner: Optional[Runner] = None,
+) -> Differences:
+    return await (runner or default_runner).run(
+        directory.compare, path, old, new, algorithm
+    )
+
+
+async def iterate_store_as_blob(
+    path: Path, directory_instance: Directory, runner: Optional[Runner] = None
+) -> AsyncIterator[Progress]:
+    """
+    Store directory as blob and yield progress for every stored file
+
+    Files are copied in the runner's executor, never more than its
+    concurrency at a time. The last progress carries the hashid of
+    the stored tree and has no path. Cancelling the consuming task
+    cancels all file copies which have not started yet.
+    """
+    runner = runner or default_runner
+
+    target = Directory()
+
+    jobs = list(iterate_files(directory_instance, target))
+
+    async def store_job(
+        job: Tuple[Dict[str, File], str, File]
+    ) -> Tuple[Dict[str, File], str, File, str]:
+        return (*job, await runner.run(file.store_as_blob, path, job[2]))
+
+    pending: Set[asyncio.Future] = set()
+    completed = 0
+
+    try:
+        jobs_iterator = iter(jobs)
+
+        while True:
+            for job in jobs_iterator:
+                pending.add(asyncio.ensure_future(store_job(job)))
+
+                if len(pending) >= runner.concurrency:
+                    break
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            for future in done:
+                files, key, value, hashid = future.result()
+
+                files[key] = file.load_from_blob(path, hashid, value.path)
+
+                completed += 1
+
+                yield Progress(completed, len(jobs), value.path, hashid)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    # all files are blobs now so only tree objects get written
+    tree_hashid = await runner.run(directory.store_as_blob, path, target)
+
+    yield Progress(completed, len(jobs), None, tree_hashid)
+
+
+async def store_as_blob(
+    path: Path, directory_instance: Directory, runner: Optional[Runner] = None
+) -> str:
+    hashid = ""
+
+    async for progress in iterate_store_as_blob(
+        path, directory_instance, runner
+    ):
+        hashid = progress.hashid
+
+    return hashid
+
+
+async def get_commit(
+    path: Path, commit_hashid: str, runner: Optional[Runner] = None
+) -> Commit:
+    return await (runner or default_runner).run(
+        repository.get_commit, path, commit_hashid
+    )
+
+
+async def get_latest_commit(
+    path: Path, runner: Optional[Runner] = None
+) -> Commit:
+    return await (runner or default_runner).run(
+        repository.get_latest_commit, path
+    )
@@ -0,0 +1,272 @@
+import tarfile
+import zipfile
+
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+from snapfs import delta, directory, fs, repository, worktree
+from snapfs.datatypes import Author, Commit
+
+
+# compressions of exported archives, the empty string means none
+COMPRESSIONS = ["", "gz"]
+
+# formats of imported archives
+FORMATS = ["tar", "zip"]
+
+FILE_MODE = 0o644
+DIRECTORY_MODE = 0o755
+
+
+class ArchiveError(Exception):
+    """
+    This class represents an invalid archive error
+    """
+
+
+# archive helpers
+def get_mode(prefix: str, compression: str) -> str:
+    if compression not in COMPRESSIONS:
+        raise ArchiveError("Unsupported compression '{}'".format(compression))
+
+    return "{}|{}".format(prefix, compression)
+
+
+def iterate_tree(path: Path, hashid: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yield kind, relative path and hashid of everything below a tree
+
+    Trees are loaded one at a time while they are walked depth first,
+    so only the trees along the current path are held in memory.
+    """
+    stack: List[Iterator[Tuple[str, str, str]]] = []
+
+    def open_tree(tree_hashid: str, prefix: str) -> None:
+        data = directory.load_blob_as_dict(path, tree_hashid)
+
+        stack.append(
+            iter(
+                sorted(
+                    (prefix + name, kind, value)
+                    for kind in ["directories", "files"]
+                    for name, value in data[kind].items()
+                )
+            )
+        )
+
+    open_tree(hashid, "")
+
+    while stack:
+        entry = next(stack[-1], None)
+
+        if entry is None:
+            stack.pop()
+
+            continue
+
+        item_path, kind, value = entry
+
+        yield kind, item_path, value
+
+        if kind == "directories":
+            open_tree(value, item_path + "/")
+
+
+def get_member_parts(name: str) -> List[str]:
+    parts = [
+        x for x in name.replace("\\", "/").split("/") if x not in ["", "."]
+    ]
+
+    if not parts or any(x == ".." or x in worktree.EXCLUDE for x in parts):
+        # snapshots never record the repository directory either
+        raise ArchiveError("Invalid archive member '{}'".format(name))
+
+    return parts
+
+
+# export
+def export_to_stream(
+    path: Path, commit_hashid: str, stream: BinaryIO, compression: str = ""
+) -> int:
+    """
+    Write the tree of a commit as tar archive into stream
+
+    File contents are copied from the blobs directory into the archive
+    in chunks and never written to disk, so memory stays constant
+    whatever the size of the files. The archive is written front to
+    back, so stream does not need to be seekable. Returns the number
+    of files written.
+    """
+    blobs_path = repository.get_blobs_path(path)
+
+    tree_hashid = repository.get_commit(path, commit_hashid).tree_hashid
+
+    count = 0
+
+    with tarfile.open(
+        fileobj=stream, mode=get_mode("w", compression)
+    ) as archive:
+        archive.copybufsize = fs.CHUNK_SIZE
+
+        for kind, item_path, hashid in iterate_tree(blobs_path, tree_hashid):
+            # trees come from other repositories too, never write
+            # members that would extract outside of the target
+            get_member_parts(item_path)
+
+            info = tarfile.TarInfo(item_path)
+
+            if kind == "directories":
+                info.type = tarfile.DIRTYPE
+                info.mode = DIRECTORY_MODE
+
+                archive.addfile(info)
+
+                continue
+
+            info.mode = FILE_MODE
+            info.size = delta.get_size(blobs_path, hashid)
+
+            with delta.open_blob(blobs_path, hashid) as f:
+                archive.addfile(info, f)
+
+            count += 1
+
+    return count
+
+
+def export_to_file(
+    path: Path, commit_hashid: str, archive_path: Path, compression: str = ""
+) -> int:
+    # validate before the target is truncated
+    get_mode("w", compression)
+
+    with open(archive_path, "wb") as f:
+        return export_to_stream(path, commit_hashid, f, compression)
+
+
+# import
+def iterate_tar(stream: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+    # any compression is detected, the stream is read front to back
+    with tarfile.open(fileobj=stream, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile():
+                # links and special files are skipped like directories,
+                # snapshots only record the contents of regular files
+                continue
+
+            member_stream = archive.extractfile(member)
+
+            if member_stream is not None:
+                yield member.name, member_stream
+
+
+def iterate_zip(stream: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+    with zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+
+            with archive.open(info) as member_stream:
+                yield info.filename, member_stream  # type: ignore
+
+
+def add_entry(tree: Dict[str, Any], parts: List[str], hashid: str) -> None:
+    for part in parts[:-1]:
+        if part in tree["files"].keys():
+            raise ArchiveError(
+                "Archive member '{}' is file and directory".format(part)
+            )
+
+        tree = tree["directories"].setdefault(
+            part, {"directories": {}, "files": {}}
+        )
+
+    if parts[-1] in tree["directories"].keys():
+        raise ArchiveError(
+            "Archive member '{}' is file and directory".format(parts[-1])
+        )
+
+    tree["files"][parts[-1]] = hashid
+
+
+def store_tree(path: Path, tree: Dict[str, Any]) -> str:
+    # trees are stored bottom up once all of their children are
+    return fs.store_dict_as_blob(
+        path,
+        {
+            "directories": {
+                key: store_tree(path, value)
+                for key, value in tree["directories"].items()
+            },
+            "files": tree["files"],
+        },
+    )
+
+
+def import_tree_from_stream(
+    path: Path, stream: BinaryIO, archive_format: str = "tar"
+) -> str:
+    """
+    Store the files of an archive read from stream as tree
+
+    Every member is hashed while it is copied into the blobs directory
+    and is never extracted anywhere else. Members arrive in any order,
+    so only their names and hashids are kept until the trees are
+    stored. Tar archives are read front to back, zip archives need a
+    seekable stream.
+    """
+    if archive_format == "tar":
+        members = iterate_tar(stream)
+    elif archive_format == "zip":
+        members = iterate_zip(stream)
+    else:
+        raise ArchiveError("Unsupported format '{}'".format(archive_format))
+
+    blobs_path = repository.get_blobs_path(path)
+
+    tree: Dict[str, Any] = {"directories": {}, "files": {}}
+
+    for name, member_stream in members:
+        parts = get_member_parts(name)
+
+        hashid = fs.copy_stream_as_blob(blobs_path, member_stream)
+
+        add_entry(tree, parts, hashid)
+
+    return store_tree(blobs_path, tree)
+
+
+def import_from_stream(
+    path: Path,
+    stream: BinaryIO,
+    author: Author,
+    message: str,
+    archive_format: str = "tar",
+) -> str:
+    """
+    Store the files of an archive as new commit
+
+    The working directory is left untouched.
+    """
+    tree_hashid = import_tree_from_stream(path, stream, archive_format)
+
+    previous_commit_hashid = worktree.get_latest_commit_hashid(path)
+
+    return worktree.store_commit(
+        path,
+        Commit(
+            author,
+            message,
+            tree_hashid,
+            [previous_commit_hashid] if previous_commit_hashid else [],
+        ),
+    )
+
+
+def import_from_file(
+    path: Path, archive_path: Path, author: Author, message: str
+) -> str:
+    archive_format = "zip" if zipfile.is_zipfile(archive_path) else "tar"
+
+    with open(archive_path, "rb") as f:
+        return import_from_stream(path, f, author, message, archive_format)
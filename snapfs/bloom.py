@@ -0,0 +1,66 @@
+import math
+
+from typing import Iterable
+
+from snapfs.hashidset import hashid_as_digest
+
+
+class BloomFilter:
+    """
+    This class represents a probabilistic set of hashids
+
+    Membership tests never miss an added hashid and wrongly report
+    about error_rate of the others. Hashids are uniformly distributed
+    already, so the bit positions are taken from the digest itself.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        error_rate: float = 0.01,
+        hashids: Iterable[str] = (),
+    ):
+        self.capacity = max(capacity, 1)
+
+        self.size = max(
+            8,
+            int(
+                math.ceil(
+                    -self.capacity * math.log(error_rate) / math.log(2) ** 2
+                )
+            ),
+        )
+        self.hashes = max(
+            1, int(round(self.size / self.capacity * math.log(2)))
+        )
+        self.bits = bytearray((self.size + 7) // 8)
+
+        for hashid in hashids:
+            self.add(hashid)
+
+    def __contains__(self, hashid: object) -> bool:
+        if not isinstance(hashid, str):
+            return False
+
+        return self.contains_digest(hashid_as_digest(hashid))
+
+    def get_positions(self, digest: bytes) -> Iterable[int]:
+        # double hashing from two independent halves of the digest
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:16], "little") | 1
+
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, hashid: str) -> None:
+        self.add_digest(hashid_as_digest(hashid))
+
+    def add_digest(self, digest: bytes) -> None:
+        for position in self.get_positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def contains_digest(self, digest: bytes) -> bool:
+        return all(
+            self.bits[x >> 3] & (1 << (x & 7))
+            for x in self.get_positions(digest)
+        )
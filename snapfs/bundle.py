@@ -0,0 +1,292 @@
+import io
+import tarfile
+
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional
+
+from snapfs import delta, fs, graph, reference, repository, transform
+from snapfs.datatypes import Bundle
+from snapfs.hashidset import HashidSet, is_hashid
+
+
+VERSION = 1
+
+# the header leads the archive, the index closes it
+HEADER_NAME = "bundle"
+INDEX_NAME = "index"
+OBJECTS_PREFIX = "objects/"
+
+
+class BundleError(Exception):
+    """
+    This class represents an invalid or incomplete bundle error
+    """
+
+
+# bundle helpers
+def serialize_as_dict(bundle: Bundle) -> Dict[str, Any]:
+    return {
+        "version": VERSION,
+        "references": {
+            key: reference.serialize_as_dict(value)
+            for key, value in bundle.references.items()
+        },
+        "prerequisites": bundle.prerequisites,
+        "hashids": bundle.hashids,
+        "algorithm": bundle.algorithm,
+    }
+
+
+def deserialize_from_dict(data: Dict[str, Any]) -> Bundle:
+    if data.get("version") != VERSION:
+        raise BundleError(
+            "Unsupported bundle version '{}'".format(data.get("version"))
+        )
+
+    return Bundle(
+        {
+            key: reference.deserialize_from_dict(key, value)
+            for key, value in data["references"].items()
+        },
+        data["prerequisites"],
+        data["hashids"],
+        data.get("algorithm", transform.SHA256),
+    )
+
+
+def add_bundle(archive: tarfile.TarFile, name: str, bundle: Bundle) -> None:
+    data = transform.dict_as_json(serialize_as_dict(bundle)).encode("utf-8")
+
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+
+    archive.addfile(info, io.BytesIO(data))
+
+
+def read_bundle(archive: tarfile.TarFile, member: tarfile.TarInfo) -> Bundle:
+    stream = archive.extractfile(member)
+
+    if stream is None:
+        raise BundleError("Invalid bundle member '{}'".format(member.name))
+
+    return deserialize_from_dict(
+        transform.json_as_dict(stream.read().decode("utf-8"))
+    )
+
+
+def read_header(stream: BinaryIO) -> Bundle:
+    """
+    Read the header of a bundle without reading the objects behind it
+    """
+    with tarfile.open(fileobj=stream, mode="r|") as archive:
+        member = archive.next()
+
+        if member is None or member.name != HEADER_NAME:
+            raise BundleError("Missing bundle header")
+
+        return read_bundle(archive, member)
+
+
+def load_header(bundle_path: Path) -> Bundle:
+    with open(bundle_path, "rb") as f:
+        return read_header(f)
+
+
+def get_prerequisites(bundle: Bundle) -> List[str]:
+    # whoever imported the bundle has everything below its references
+    return sorted(
+        {
+            x.commit_hashid
+            for x in bundle.references.values()
+            if x.commit_hashid
+        }
+    )
+
+
+# export
+def export_to_stream(
+    path: Path,
+    stream: BinaryIO,
+    names: Optional[Iterable[str]] = None,
+    prerequisites: Iterable[str] = [],
+    workers: Optional[int] = None,
+) -> Bundle:
+    """
+    Write the objects reachable from references as bundle into stream
+
+    Names are relative to the references directory, like "branches/main",
+    all branches and tags are exported by default. Objects reachable from
+    the prerequisite commits are left out. The archive is written
+    front to back, so stream does not need to be seekable.
+    """
+    references = repository.get_references(path, names)
+
+    blobs_path = repository.get_blobs_path(path)
+
+    bundle_instance = Bundle(
+        references,
+        list(prerequisites),
+        [],
+        repository.get_algorithm(path),
+    )
+
+    seen = graph.mark(
+        blobs_path, bundle_instance.prerequisites, HashidSet(), workers
+    )
+
+    with tarfile.open(fileobj=stream, mode="w|") as archive:
+        add_bundle(archive, HEADER_NAME, bundle_instance)
+
+        for _, hashid in graph.iterate(
+            blobs_path,
+            [x.commit_hashid for x in references.values() if x.commit_hashid],
+            seen,
+            workers,
+        ):
+            info = tarfile.TarInfo(OBJECTS_PREFIX + hashid)
+            info.size = delta.get_size(blobs_path, hashid)
+
+            # objects stored as delta are written in full
+            with delta.open_blob(blobs_path, hashid) as f:
+                archive.addfile(info, f)
+
+            bundle_instance.hashids.append(hashid)
+
+        add_bundle(archive, INDEX_NAME, bundle_instance)
+
+    return bundle_instance
+
+
+def export_to_file(
+    path: Path,
+    bundle_path: Path,
+    names: Optional[Iterable[str]] = None,
+    since: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> Bundle:
+    """
+    Export a bundle, leaving out everything an older bundle contains
+    """
+    prerequisites: List[str] = []
+
+    if since is not None:
+        prerequisites = get_prerequisites(load_header(since))
+
+    with open(bundle_path, "wb") as f:
+        return export_to_stream(path, f, names, prerequisites, workers)
+
+
+# import
+def import_from_stream(
+    path: Path, stream: BinaryIO, force: bool = False
+) -> Bundle:
+    """
+    Read a bundle from stream into the repository at path
+
+    Objects are verified while they are written into the blobs
+    directory. References are stored last, once every object of the
+    bundle has arrived, so an interrupted import leaves them untouched.
+    References are only moved forward unless force is set.
+    """
+    blobs_path = repository.get_blobs_path(path)
+
+    header: Optional[Bundle] = None
+    index: Optional[Bundle] = None
+    hashids: List[str] = []
+
+    with tarfile.open(fileobj=stream, mode="r|") as archive:
+        for member in archive:
+            if header is None:
+                if member.name != HEADER_NAME:
+                    raise BundleError("Missing bundle header")
+
+                header = read_bundle(archive, member)
+
+                algorithm = repository.get_algorithm(path)
+
+                if header.algorithm != algorithm:
+                    # hashids of different algorithms must never mix
+                    raise BundleError(
+                        "Bundle uses algorithm '{}' instead of '{}'".format(
+                            header.algorithm, algorithm
+                        )
+                    )
+
+                invalid_names = [
+                    x
+                    for x in header.references.keys()
+                    if not repository.is_reference_name(x)
+                ]
+
+                if invalid_names:
+                    raise BundleError(
+                        "Invalid reference names '{}'".format(
+                            "', '".join(invalid_names)
+                        )
+                    )
+
+                missing_hashids = [
+                    x
+                    for x in header.prerequisites
+                    if not fs.is_blob(blobs_path, x)
+                ]
+
+                if missing_hashids:
+                    raise BundleError(
+                        "Missing prerequisite commits '{}'".format(
+                            "', '".join(missing_hashids)
+                        )
+                    )
+            elif member.name.startswith(OBJECTS_PREFIX):
+                hashid = member.name[len(OBJECTS_PREFIX) :]
+
+                object_stream = archive.extractfile(member)
+
+                if not is_hashid(hashid) or object_stream is None:
+                    raise BundleError(
+                        "Invalid bundle member '{}'".format(member.name)
+                    )
+
+                if not fs.is_blob(blobs_path, hashid):
+                    try:
+                        fs.store_stream_as_blob(
+                            blobs_path, hashid, object_stream
+                        )
+                    except ValueError as e:
+                        raise BundleError(str(e)) from e
+
+                hashids.append(hashid)
+            elif member.name == INDEX_NAME:
+                index = read_bundle(archive, member)
+            else:
+                raise BundleError(
+                    "Invalid bundle member '{}'".format(member.name)
+                )
+
+    if header is None or index is None or index.hashids != hashids:
+        raise BundleError("Bundle is incomplete")
+
+    if not force:
+        diverged_names = repository.get_diverged_names(
+            path, header.references
+        )
+
+        if diverged_names:
+            raise BundleError(
+                "Unable to update references '{}' which are ahead "
+                "or diverged".format("', '".join(diverged_names))
+            )
+
+    for key, value in header.references.items():
+        repository.store_reference(path, key, value)
+
+    header.hashids = hashids
+
+    return header
+
+
+def import_from_file(
+    path: Path, bundle_path: Path, force: bool = False
+) -> Bundle:
+    with open(bundle_path, "rb") as f:
+        return import_from_stream(path, f, force)
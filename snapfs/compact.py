@@ -0,0 +1,228 @@
+import os
+import sys
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from snapfs import fs, filters, hashing, transform
+from snapfs.datatypes import Directory, File
+
+
+class CompactDirectory:
+    """
+    This class represents a directory with a small memory footprint
+
+    Names are interned and every entry only points to its parent,
+    paths are rebuilt on access. Attributes of Directory are provided
+    so that compact directories can be passed where a Directory is
+    expected.
+    """
+
+    __slots__ = ("name", "parent", "directories", "files")
+
+    def __init__(
+        self, name: str = "", parent: Optional["CompactDirectory"] = None
+    ):
+        self.name = sys.intern(name)
+        self.parent = parent
+        self.directories: Dict[str, CompactDirectory] = {}
+        self.files: Dict[str, CompactFile] = {}
+
+    @property
+    def path(self) -> Path:
+        return get_path(self)
+
+
+class CompactFile:
+    """
+    This class represents a file with a small memory footprint
+
+    The hashid is kept as raw digest and the blob path is derived from
+    the blobs directory, which is shared by all files of a tree.
+    Attributes of File are provided as properties.
+    """
+
+    __slots__ = ("name", "parent", "digest", "blobs_path")
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional[CompactDirectory] = None,
+        digest: bytes = b"",
+        blobs_path: Optional[Path] = None,
+    ):
+        self.name = sys.intern(name)
+        self.parent = parent
+        self.digest = digest
+        self.blobs_path = blobs_path
+
+    @property
+    def path(self) -> Path:
+        return get_path(self)
+
+    @property
+    def is_blob(self) -> bool:
+        return self.blobs_path is not None
+
+    @property
+    def blob_path(self) -> Optional[Path]:
+        if self.blobs_path is None:
+            return None
+
+        return fs.get_blob_path(self.blobs_path, self.hashid)
+
+    @property
+    def hashid(self) -> str:
+        return self.digest.hex()
+
+
+def get_path(entry: Union[CompactFile, CompactDirectory]) -> Path:
+    names: List[str] = []
+
+    current: Optional[CompactDirectory]
+
+    if isinstance(entry, CompactFile):
+        names.append(entry.name)
+
+        current = entry.parent
+    else:
+        current = entry
+
+    while current is not None:
+        names.append(current.name)
+
+        current = current.parent
+
+    # the root directory carries the full path as its name
+    return Path(*reversed(names))
+
+
+def iterate_files(directory: CompactDirectory) -> Iterator[CompactFile]:
+    for value in directory.directories.values():
+        yield from iterate_files(value)
+
+    yield from directory.files.values()
+
+
+def load_from_blob(
+    path: Path,
+    hashid: str,
+    name: str = "",
+    parent: Optional[CompactDirectory] = None,
+) -> CompactDirectory:
+    data = fs.load_blob_as_dict(path, hashid)
+
+    directory = CompactDirectory(name, parent)
+
+    for key, value in data["directories"].items():
+        directory.directories[key] = load_from_blob(
+            path, value, key, directory
+        )
+
+    for key, value in data["files"].items():
+        directory.files[key] = CompactFile(
+            key, directory, bytes.fromhex(value), path
+        )
+
+    return directory
+
+
+def load_from_directory_path(
+    current_path: Path,
+    patterns: List[str] = [],
+    exclude: List[str] = [],
+    name: Optional[str] = None,
+    parent: Optional[CompactDirectory] = None,
+) -> CompactDirectory:
+    directory = CompactDirectory(
+        str(current_path) if name is None else name, parent
+    )
+
+    # load ignore pattern
+    patterns = [*patterns, *fs.load_ignore_file_as_patterns(current_path)]
+
+    for item_name in sorted(os.listdir(current_path)):
+        item_path = current_path.joinpath(item_name)
+
+        if item_path.is_file():
+            if not filters.ignore(item_name, patterns):
+                directory.files[item_name] = CompactFile(item_name, directory)
+        elif item_path.is_dir() and item_name not in exclude:
+            result = load_from_directory_path(
+                item_path, patterns, exclude, item_name, directory
+            )
+
+            if result.files or result.directories:
+                directory.directories[item_name] = result
+
+    return directory
+
+
+def hash_files(
+    directory: CompactDirectory,
+    backend: str = hashing.DEFAULT_BACKEND,
+    workers: Optional[int] = None,
+    algorithm: str = transform.SHA256,
+) -> CompactDirectory:
+    """
+    Store the digest of every file which has not been hashed in place
+
+    Callers pass the algorithm of the repository, see
+    repository.get_algorithm.
+    """
+    files = [
+        x for x in iterate_files(directory) if not x.is_blob and not x.digest
+    ]
+
+    for item_instance, result in zip(
+        files,
+        hashing.hash_paths(
+            [x.path for x in files], backend, workers, algorithm=algorithm
+        ),
+    ):
+        item_instance.digest = bytes.fromhex(result[1])
+
+    return directory
+
+
+def from_directory(
+    directory: Directory,
+    blobs_path: Optional[Path] = None,
+    name: str = "",
+    parent: Optional[CompactDirectory] = None,
+) -> CompactDirectory:
+    """
+    Return a compact copy of directory
+
+    Files which are blobs refer to blobs_path, which has to be
+    the directory they have been loaded from.
+    """
+    result = CompactDirectory(name, parent)
+
+    for key, value in directory.directories.items():
+        result.directories[key] = from_directory(
+            value, blobs_path, key, result
+        )
+
+    for key, file_value in directory.files.items():
+        result.files[key] = CompactFile(
+            key,
+            result,
+            bytes.fromhex(file_value.hashid),
+            blobs_path if file_value.is_blob else None,
+        )
+
+    return result
+
+
+def as_directory(directory: CompactDirectory) -> Directory:
+    return Directory(
+        {
+            key: as_directory(value)
+            for key, value in directory.directories.items()
+        },
+        {
+            key: File(value.path, value.is_blob, value.blob_path, value.hashid)
+            for key, value in directory.files.items()
+        },
+    )
@@ -68,8 +68,63 @@ class Stage:
     removed_files: List[File] = field(default_factory=list)
 
 
+@dataclass
+class FilePair:
+    source: File
+    target: File
+
+
 @dataclass
 class Differences(Stage):
     """
     This class represents the differences in the working directory
     """
+
+    renamed_files: List[FilePair] = field(default_factory=list)
+    copied_files: List[FilePair] = field(default_factory=list)
+
+
+@dataclass
+class Progress:
+    completed: int = 0
+    total: int = 0
+    path: Optional[Path] = None
+    hashid: str = ""
+
+
+@dataclass
+class Changes:
+    paths: Dict[str, int] = field(default_factory=dict)
+    generation: int = 0
+    overflow: bool = True
+    overflow_generation: int = 0
+    pid: int = 0
+
+
+@dataclass
+class Verification:
+    cursor: str = ""
+    checked: int = 0
+    corrupt_hashids: List[str] = field(default_factory=list)
+    dangling_hashids: List[str] = field(default_factory=list)
+    complete: bool = False
+
+
+@dataclass
+class Layout:
+    parts: int = 1
+    length: int = 2
+
+
+@dataclass
+class Bundle:
+    references: Dict[str, Reference] = field(default_factory=dict)
+    prerequisites: List[str] = field(default_factory=list)
+    hashids: List[str] = field(default_factory=list)
+    algorithm: str = "sha256"
+
+
+@dataclass
+class Format:
+    version: int = 1
+    algorithm: str = "sha256"
@@ -0,0 +1,531 @@
+import io
+import os
+import stat
+import struct
+import threading
+
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import BinaryIO, Deque, Dict, List, Optional, Set, Tuple
+
+from snapfs import fs, graph, transform
+from snapfs.hashidset import HashidSet
+
+
+# size of the blocks of the base which are indexed for matches
+BLOCK_SIZE = 16
+
+# matches are extended in chunks of this size before comparing bytes
+CHUNK_SIZE = 4096
+
+# misses in a row after which the search advances one more byte at a
+# time, so data without matches is skipped quickly like lz4 does
+SKIP_MISSES = 64
+
+# objects larger than this are left loose by repack, both of them are
+# held in memory while a delta is computed
+MAX_SIZE = 64 * 1024 * 1024
+
+# longest chain of deltas which has to be resolved for a single read
+MAX_DEPTH = 10
+
+# smallest ratio of base and target size which is tried as delta
+MIN_SIZE_RATIO = 0.5
+
+# deltas larger than this ratio of the target are not worth storing
+MAX_DELTA_RATIO = 0.5
+
+# bytes of resolved objects which are kept in the base cache
+CACHE_SIZE = 64 * 1024 * 1024
+
+COPY = b"C"
+INSERT = b"I"
+
+COPY_STRUCT = struct.Struct(">QI")
+INSERT_STRUCT = struct.Struct(">I")
+
+
+class Cache:
+    """
+    This class represents a least recently used cache of object contents
+
+    Objects never change for a given hashid, so entries
+    only need to be evicted once the cache is full. The cache
+    can be shared by threads.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, directory: Path, hashid: str) -> Optional[bytes]:
+        key = (str(directory), hashid)
+
+        with self.lock:
+            if key not in self.entries:
+                return None
+
+            self.entries.move_to_end(key)
+
+            return self.entries[key]
+
+    def put(self, directory: Path, hashid: str, data: bytes) -> None:
+        key = (str(directory), hashid)
+
+        with self.lock:
+            if key in self.entries or len(data) > self.max_size:
+                return
+
+            self.entries[key] = data
+            self.size += len(data)
+
+            while self.size > self.max_size:
+                _, evicted = self.entries.popitem(last=False)
+
+                self.size -= len(evicted)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+default_cache = Cache()
+
+
+def get_match_length(
+    base: bytes, base_offset: int, target: bytes, target_offset: int
+) -> int:
+    length = 0
+
+    # compare whole chunks first, single bytes only at the end of a match
+    while True:
+        base_end = base_offset + length + CHUNK_SIZE
+        target_end = target_offset + length + CHUNK_SIZE
+
+        if (
+            base_end > len(base)
+            or target_end > len(target)
+            or base[base_offset + length : base_end]
+            != target[target_offset + length : target_end]
+        ):
+            break
+
+        length += CHUNK_SIZE
+
+    while (
+        base_offset + length < len(base)
+        and target_offset + length < len(target)
+        and base[base_offset + length] == target[target_offset + length]
+    ):
+        length += 1
+
+    return length
+
+
+def encode(
+    base: bytes, target: bytes, block_size: int = BLOCK_SIZE
+) -> bytes:
+    """
+    Return instructions which rebuild target from base
+
+    Blocks of the base are indexed by content, matching blocks found
+    in the target are extended in both directions and stored as copy
+    instructions, everything in between is stored as insertion. The
+    longer the search goes without a match the further it skips ahead,
+    up to almost a block at a time, which trades short matches for
+    speed on dissimilar data.
+    """
+    index: Dict[bytes, int] = {}
+
+    for offset in range(0, len(base) - block_size + 1, block_size):
+        index.setdefault(base[offset : offset + block_size], offset)
+
+    instructions = bytearray()
+
+    def add_insert(start: int, end: int) -> None:
+        if end > start:
+            instructions.extend(INSERT + INSERT_STRUCT.pack(end - start))
+            instructions.extend(target[start:end])
+
+    offset = 0
+    insert_start = 0
+    misses = 0
+
+    while offset + block_size <= len(target):
+        base_offset = index.get(target[offset : offset + block_size])
+
+        if base_offset is None:
+            misses += 1
+
+            # one byte short of a block, so that any offset into the
+            # blocks of a long match is reached within block_size steps
+            offset += max(1, min(block_size - 1, 1 + misses // SKIP_MISSES))
+
+            continue
+
+        misses = 0
+
+        start = offset
+
+        # extend the match backwards into the pending insertion
+        while (
+            start > insert_start
+            and base_offset > 0
+            and target[start - 1] == base[base_offset - 1]
+        ):
+            start -= 1
+            base_offset -= 1
+
+        length = get_match_length(base, base_offset, target, start)
+
+        add_insert(insert_start, start)
+
+        instructions.extend(COPY + COPY_STRUCT.pack(base_offset, length))
+
+        offset = insert_start = start + length
+
+    add_insert(insert_start, len(target))
+
+    return bytes(instructions)
+
+
+def decode(base: bytes, instructions: bytes) -> bytes:
+    result = bytearray()
+
+    offset = 0
+
+    while offset < len(instructions):
+        operation = instructions[offset : offset + 1]
+
+        offset += 1
+
+        if operation == COPY:
+            base_offset, length = COPY_STRUCT.unpack_from(
+                instructions, offset
+            )
+
+            offset += COPY_STRUCT.size
+
+            result.extend(base[base_offset : base_offset + length])
+        elif operation == INSERT:
+            (length,) = INSERT_STRUCT.unpack_from(instructions, offset)
+
+            offset += INSERT_STRUCT.size
+
+            result.extend(instructions[offset : offset + length])
+
+            offset += length
+        else:
+            raise ValueError(
+                "Unknown delta instruction '{}'".format(operation)
+            )
+
+    return bytes(result)
+
+
+# object helpers
+def get_blob_path(directory: Path, hashid: str) -> Path:
+    # stored loose or delta object, or where a loose object would go
+    blob_path = fs.find_blob(directory, hashid)
+
+    if blob_path is None:
+        return fs.get_blob_path(directory, hashid)
+
+    return blob_path
+
+
+def is_delta_path(blob_path: Path) -> bool:
+    return fs.split_blob_name(blob_path.name)[1]
+
+
+def is_delta(directory: Path, hashid: str) -> bool:
+    return is_delta_path(get_blob_path(directory, hashid))
+
+
+def read_header(delta_path: Path) -> Tuple[str, int]:
+    with open(delta_path, "rb") as f:
+        base_hashid, size = f.readline().split()
+
+    return base_hashid.decode("ascii"), int(size)
+
+
+def read_delta(delta_path: Path) -> Tuple[str, int, bytes]:
+    with open(delta_path, "rb") as f:
+        base_hashid, size = f.readline().split()
+
+        return base_hashid.decode("ascii"), int(size), f.read()
+
+
+def get_size(directory: Path, hashid: str) -> int:
+    blob_path = get_blob_path(directory, hashid)
+
+    if is_delta_path(blob_path):
+        return read_header(blob_path)[1]
+
+    return blob_path.stat().st_size
+
+
+def get_depth(directory: Path, hashid: str) -> int:
+    depth = 0
+
+    blob_path = get_blob_path(directory, hashid)
+
+    while is_delta_path(blob_path):
+        blob_path = get_blob_path(directory, read_header(blob_path)[0])
+
+        depth += 1
+
+    return depth
+
+
+def load_blob(
+    directory: Path, hashid: str, cache: Optional[Cache] = None
+) -> bytes:
+    """
+    Return the contents of a loose or delta object
+
+    Every object resolved along a delta chain is put into the cache,
+    so reading other versions of the same file rarely reads a chain
+    all the way down to the loose object again.
+    """
+    cache = default_cache if cache is None else cache
+
+    chain: List[Tuple[str, int, bytes]] = []
+
+    current = hashid
+
+    while True:
+        data = cache.get(directory, current)
+
+        if data is not None:
+            break
+
+        blob_path = get_blob_path(directory, current)
+
+        if not is_delta_path(blob_path):
+            with open(blob_path, "rb") as f:
+                data = f.read()
+
+            if chain:
+                cache.put(directory, current, data)
+
+            break
+
+        if any(x[0] == current for x in chain):
+            raise ValueError("Delta chain of '{}' is cyclic".format(hashid))
+
+        base_hashid, size, instructions = read_delta(blob_path)
+
+        chain.append((current, size, instructions))
+
+        current = base_hashid
+
+    for current, size, instructions in reversed(chain):
+        data = decode(data, instructions)
+
+        if len(data) != size:
+            raise ValueError("Delta of '{}' is corrupt".format(current))
+
+        cache.put(directory, current, data)
+
+    return data
+
+
+def open_blob(
+    directory: Path, hashid: str, cache: Optional[Cache] = None
+) -> BinaryIO:
+    blob_path = get_blob_path(directory, hashid)
+
+    if not is_delta_path(blob_path):
+        return open(blob_path, "rb")
+
+    return io.BytesIO(load_blob(directory, hashid, cache))
+
+
+def store_delta(
+    directory: Path, hashid: str, base_hashid: str, size: int, data: bytes
+) -> None:
+    """
+    Replace the loose object of hashid by a delta against base_hashid
+    """
+    blob_path = get_blob_path(directory, hashid)
+    delta_path = fs.get_delta_path(blob_path)
+    temporary_path = delta_path.with_name(delta_path.name + ".tmp")
+
+    with open(temporary_path, "wb") as f:
+        f.write("{} {}\n".format(base_hashid, size).encode("ascii"))
+        f.write(data)
+
+    temporary_path.chmod(stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+
+    # the delta is complete before the loose object goes away
+    os.replace(temporary_path, delta_path)
+
+    fs.remove_file(blob_path)
+
+
+def get_bases(directory: Path) -> Set[str]:
+    bases: Set[str] = set()
+
+    for name, blob_path in fs.list_blobs(directory):
+        if fs.split_blob_name(name)[1]:
+            bases.add(read_header(blob_path)[0])
+
+    return bases
+
+
+def mark_bases(directory: Path, marked: HashidSet) -> HashidSet:
+    """
+    Add the bases of all marked delta objects to marked
+    """
+    for name, blob_path in fs.list_blobs(directory):
+        hashid, delta = fs.split_blob_name(name)
+
+        if not delta or hashid not in marked:
+            continue
+
+        while is_delta_path(blob_path):
+            hashid = read_header(blob_path)[0]
+
+            marked.add(hashid)
+
+            blob_path = get_blob_path(directory, hashid)
+
+    return marked
+
+
+def get_path_histories(
+    directory: Path, commit_hashids: List[str]
+) -> Dict[str, List[str]]:
+    """
+    Return the file hashids of every path, newer versions first
+
+    Commits are visited breadth first starting at commit_hashids and
+    trees which have been visited at the same path before are skipped.
+    """
+    histories: Dict[str, List[str]] = {}
+
+    seen_commits = HashidSet()
+    seen_trees: Set[Tuple[str, str]] = set()
+
+    commits: Deque[str] = deque(
+        x for x in commit_hashids if seen_commits.add(x)
+    )
+
+    while commits:
+        commit_data = fs.load_blob_as_dict(directory, commits.popleft())
+
+        trees = []
+
+        if commit_data["tree_hashid"]:
+            trees.append(("", commit_data["tree_hashid"]))
+
+        while trees:
+            prefix, tree_hashid = trees.pop()
+
+            if (prefix, tree_hashid) in seen_trees:
+                continue
+
+            seen_trees.add((prefix, tree_hashid))
+
+            data = fs.load_blob_as_dict(directory, tree_hashid)
+
+            for name, hashid in sorted(data["directories"].items()):
+                trees.append((prefix + name + "/", hashid))
+
+            for name, hashid in sorted(data["files"].items()):
+                history = histories.setdefault(prefix + name, [])
+
+                if hashid not in history:
+                    history.append(hashid)
+
+        commits.extend(
+            x[1]
+            for x in graph.get_children(graph.COMMIT, commit_data)
+            if x[0] == graph.COMMIT and seen_commits.add(x[1])
+        )
+
+    return histories
+
+
+def repack(
+    blobs_path: Path,
+    commit_hashids: List[str],
+    max_depth: int = MAX_DEPTH,
+    cache: Optional[Cache] = None,
+    max_size: int = MAX_SIZE,
+) -> List[str]:
+    """
+    Store older versions of files as delta against newer versions
+
+    Candidates are consecutive versions of the same path with similar
+    sizes up to max_size. A delta is only stored when it is much
+    smaller than the object and its chain stays within max_depth.
+    Returns the hashids which are stored as delta now.
+    """
+    histories = get_path_histories(blobs_path, commit_hashids)
+
+    # objects other deltas depend on stay as they are,
+    # otherwise the depth of their dependents would grow
+    bases = get_bases(blobs_path)
+
+    depths: Dict[str, int] = {}
+    packed_hashids: List[str] = []
+
+    algorithm = fs.get_algorithm(blobs_path)
+
+    for history in histories.values():
+        for base_hashid, hashid in zip(history, history[1:]):
+            if (
+                hashid in bases
+                or hashid in depths
+                or not fs.is_blob(blobs_path, hashid)
+                or is_delta(blobs_path, hashid)
+                or not fs.is_blob(blobs_path, base_hashid)
+            ):
+                continue
+
+            if base_hashid not in depths:
+                depths[base_hashid] = get_depth(blobs_path, base_hashid)
+
+            if depths[base_hashid] + 1 > max_depth:
+                continue
+
+            size = get_size(blobs_path, hashid)
+            base_size = get_size(blobs_path, base_hashid)
+
+            if max(size, base_size) > max_size:
+                # both objects would have to be held in memory
+                continue
+
+            if min(size, base_size) < MIN_SIZE_RATIO * max(size, base_size):
+                continue
+
+            base = load_blob(blobs_path, base_hashid, cache)
+
+            with open(get_blob_path(blobs_path, hashid), "rb") as f:
+                target = f.read()
+
+            data = encode(base, target)
+
+            if len(data) > MAX_DELTA_RATIO * len(target):
+                continue
+
+            if (
+                transform.bytes_as_hashid(decode(base, data), algorithm)
+                != hashid
+            ):
+                # never replace an object by a delta which does not
+                # rebuild exactly the same contents
+                continue
+
+            store_delta(blobs_path, hashid, base_hashid, len(target), data)
+
+            bases.add(base_hashid)
+            depths[hashid] = depths[base_hashid] + 1
+            packed_hashids.append(hashid)
+
+    return packed_hashids
@@ -1,14 +1,29 @@
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Deque, Dict, List, Tuple
 
 from snapfs import file, transform, fs
-from snapfs.datatypes import Differences
+from snapfs.datatypes import Differences, File, FilePair
 
 
 def store_as_file(path: Path, differences: Differences) -> None:
     fs.store_dict_as_file(path, serialize_as_dict(differences), override=True)
 
 
+def serialize_pair_as_dict(pair: FilePair) -> Dict[str, Any]:
+    return {
+        "source": file.serialize_as_dict(pair.source),
+        "target": file.serialize_as_dict(pair.target),
+    }
+
+
+def deserialize_pair_from_dict(data: Dict[str, Any]) -> FilePair:
+    return FilePair(
+        file.deserialize_from_dict(data["source"]),
+        file.deserialize_from_dict(data["target"]),
+    )
+
+
 def serialize_as_dict(differences: Differences) -> Dict[str, Any]:
     data = transform.as_dict(differences)
 
@@ -23,6 +38,12 @@ def serialize_as_dict(differences: Differences) -> Dict[str, Any]:
         "removed_files": [
             file.serialize_as_dict(x) for x in differences.removed_files
         ],
+        "renamed_files": [
+            serialize_pair_as_dict(x) for x in differences.renamed_files
+        ],
+        "copied_files": [
+            serialize_pair_as_dict(x) for x in differences.copied_files
+        ],
     }
 
 
@@ -39,6 +60,14 @@ def deserialize_from_dict(data: Dict[str, Any]) -> Differences:
             "removed_files": [
                 file.deserialize_from_dict(x) for x in data["removed_files"]
             ],
+            "renamed_files": [
+                deserialize_pair_from_dict(x)
+                for x in data.get("renamed_files", [])
+            ],
+            "copied_files": [
+                deserialize_pair_from_dict(x)
+                for x in data.get("copied_files", [])
+            ],
         }
     )
 
@@ -52,6 +81,8 @@ def merge_differences(a: Differences, b: Differences) -> Differences:
         [*a.added_files, *b.added_files],
         [*a.updated_files, *b.updated_files],
         [*a.removed_files, *b.removed_files],
+        [*a.renamed_files, *b.renamed_files],
+        [*a.copied_files, *b.copied_files],
     )
 
 
@@ -60,6 +91,114 @@ def serialize_as_messages(differences: Differences) -> List[str]:
         *["added: {}".format(x.path) for x in differences.added_files],
         *["updated: {}".format(x.path) for x in differences.updated_files],
         *["removed: {}".format(x.path) for x in differences.removed_files],
+        *[
+            "renamed: {} -> {}".format(x.source.path, x.target.path)
+            for x in differences.renamed_files
+        ],
+        *[
+            "copied: {} -> {}".format(x.source.path, x.target.path)
+            for x in differences.copied_files
+        ],
     ]
 
     return messages
+
+
+def get_hashid(
+    file_instance: File, algorithm: str = transform.SHA256
+) -> str:
+    if file_instance.is_blob or file_instance.hashid:
+        return file_instance.hashid
+
+    if file_instance.path.is_file():
+        return file.serialize_as_hashid(file_instance, algorithm)
+
+    return ""
+
+
+def detect_renames(
+    differences: Differences, algorithm: str = transform.SHA256
+) -> Differences:
+    """
+    Pair removed and added files with equal content
+
+    Removed files are indexed by hashid and by hashid and name, so
+    every added file is matched in constant time. The first added file
+    with the content of a removed file is a rename, every further one
+    is a copy. Targets reference the blob of their source so it does
+    not get stored again.
+    """
+    candidates: Dict[str, OrderedDict[int, File]] = {}
+    names: Dict[Tuple[str, str], Deque[int]] = {}
+    sources: Dict[str, File] = {}
+
+    empty_hashid = transform.bytes_as_hashid(b"", algorithm)
+
+    for i, item_instance in enumerate(differences.removed_files):
+        hashid = get_hashid(item_instance, algorithm)
+
+        if hashid and hashid != empty_hashid:
+            candidates.setdefault(hashid, OrderedDict())[i] = item_instance
+
+            key = (hashid, item_instance.path.name)
+
+            names.setdefault(key, deque()).append(i)
+
+    if not candidates:
+        return differences
+
+    result = Differences(
+        [],
+        list(differences.updated_files),
+        [],
+        list(differences.renamed_files),
+        list(differences.copied_files),
+    )
+
+    for item_instance in differences.added_files:
+        hashid = get_hashid(item_instance, algorithm)
+
+        if hashid in candidates:
+            queue = names.get((hashid, item_instance.path.name), deque())
+
+            while queue and queue[0] not in candidates[hashid]:
+                # taken by a file with another name before
+                queue.popleft()
+
+            if queue:
+                # prefer a source with the same name
+                source = candidates[hashid].pop(queue.popleft())
+            else:
+                _, source = candidates[hashid].popitem(last=False)
+
+            if not candidates[hashid]:
+                del candidates[hashid]
+
+            sources[hashid] = source
+
+            result.renamed_files.append(
+                FilePair(source, get_target(source, item_instance, hashid))
+            )
+        elif hashid in sources:
+            source = sources[hashid]
+
+            result.copied_files.append(
+                FilePair(source, get_target(source, item_instance, hashid))
+            )
+        else:
+            result.added_files.append(item_instance)
+
+    renamed_sources = {id(x.source) for x in result.renamed_files}
+
+    result.removed_files = [
+        x for x in differences.removed_files if id(x) not in renamed_sources
+    ]
+
+    return result
+
+
+def get_target(source: File, target: File, hashid: str) -> File:
+    if source.is_blob:
+        return File(target.path, True, source.blob_path, hashid)
+
+    return File(target.path, target.is_blob, target.blob_path, hashid)
@@ -3,12 +3,16 @@ import fnmatch
 
 from pathlib import Path
 
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 
-from snapfs import fs, transform, file, filters, differences
+from snapfs import fs, transform, file, filters, differences, hashing
 from snapfs.datatypes import File, Directory, Differences
 
 
+# path, ignore patterns, remaining names, stored directories and files
+Frame = Tuple[Path, List[str], Iterator[str], Dict[str, str], Dict[str, str]]
+
+
 def store_as_blob(path: Path, directory: Directory) -> str:
     data = {
         "directories": {
@@ -40,24 +44,26 @@ def load_from_blob(path: Path, hashid: str) -> Directory:
     return Directory(**data)
 
 
-def serialize_as_hashid(directory: Directory) -> str:
+def serialize_as_hashid(
+    directory: Directory, algorithm: str = transform.SHA256
+) -> str:
     data = {
         "directories": {
-            key: serialize_as_hashid(value)
+            key: serialize_as_hashid(value, algorithm)
             for key, value in directory.directories.items()
         },
         "files": {
-            key: file.serialize_as_hashid(value)
+            key: file.serialize_as_hashid(value, algorithm)
             for key, value in directory.files.items()
         },
     }
 
-    return transform.dict_as_hashid(data)
+    return transform.dict_as_hashid(data, algorithm)
 
 
 def serialize_as_dict(directory: Directory) -> Dict[str, Any]:
     return {
-        **transform.as_dict(directory),
+        **transform.as_dict(directory, Directory),
         "directories": {
             key: serialize_as_dict(value)
             for key, value in directory.directories.items()
@@ -114,8 +120,55 @@ def transform_from_list(path: Path, paths: List[File]) -> Directory:
     return result
 
 
+def iterate_files(directory: Directory) -> Iterator[File]:
+    for value in directory.directories.values():
+        yield from iterate_files(value)
+
+    yield from directory.files.values()
+
+
+def apply_hashids(directory: Directory, hashids: Dict[Path, str]) -> Directory:
+    return Directory(
+        {
+            key: apply_hashids(value, hashids)
+            for key, value in directory.directories.items()
+        },
+        {
+            key: File(
+                value.path,
+                value.is_blob,
+                value.blob_path,
+                hashids.get(value.path, value.hashid),
+            )
+            for key, value in directory.files.items()
+        },
+    )
+
+
+def hash_files(
+    directory: Directory,
+    backend: str = hashing.DEFAULT_BACKEND,
+    workers: Optional[int] = None,
+    algorithm: str = transform.SHA256,
+) -> Directory:
+    paths = [
+        x.path
+        for x in iterate_files(directory)
+        if not x.is_blob and not x.hashid
+    ]
+
+    hashids = {
+        x[0]: x[1]
+        for x in hashing.hash_paths(
+            paths, backend, workers, algorithm=algorithm
+        )
+    }
+
+    return apply_hashids(directory, hashids)
+
+
 def load_from_directory_path(
-    current_path: Path, patterns: List[str] = []
+    current_path: Path, patterns: List[str] = [], exclude: List[str] = []
 ) -> Directory:
     directory = Directory({}, {})
 
@@ -128,8 +181,8 @@ def load_from_directory_path(
         if item_path.is_file():
             if not filters.ignore(name, patterns):
                 directory.files[name] = File(item_path)
-        elif item_path.is_dir():
-            result = load_from_directory_path(item_path, patterns)
+        elif item_path.is_dir() and name not in exclude:
+            result = load_from_directory_path(item_path, patterns, exclude)
 
             if result.files or result.directories:
                 directory.directories[name] = result
@@ -137,19 +190,275 @@ def load_from_directory_path(
     return directory
 
 
-def compare(path: Path, old: Directory, new: Directory) -> Differences:
+def store_directory_path_as_blob(
+    path: Path,
+    current_path: Path,
+    patterns: List[str] = [],
+    exclude: List[str] = [],
+) -> str:
+    """
+    Store a directory of the file system as tree without loading it first
+
+    Directories are walked depth first and every tree object is written
+    as soon as everything below it is stored, so only the frames along
+    the current path are held in memory. Returns the same hashid as
+    storing the result of load_from_directory_path.
+    """
+
+    def open_frame(item_path: Path, parent_patterns: List[str]) -> Frame:
+        return (
+            item_path,
+            [*parent_patterns, *fs.load_ignore_file_as_patterns(item_path)],
+            iter(sorted(os.listdir(item_path))),
+            {},
+            {},
+        )
+
+    stack = [open_frame(current_path, patterns)]
+    names = [""]
+
+    while True:
+        item_path, frame_patterns, entries, directories, files = stack[-1]
+
+        name = next(entries, None)
+
+        if name is not None:
+            entry_path = item_path.joinpath(name)
+
+            if entry_path.is_file():
+                if not filters.ignore(name, frame_patterns):
+                    files[name] = file.store_as_blob(path, File(entry_path))
+            elif entry_path.is_dir() and name not in exclude:
+                stack.append(open_frame(entry_path, frame_patterns))
+                names.append(name)
+
+            continue
+
+        stack.pop()
+        name = names.pop()
+
+        data = {"directories": directories, "files": files}
+
+        if not stack:
+            return fs.store_dict_as_blob(path, data)
+
+        if directories or files:
+            # empty directories are left out like when loading
+            stack[-1][3][name] = fs.store_dict_as_blob(path, data)
+
+
+def get_path_parts(item_path: str) -> List[str]:
+    """
+    Return the components of a relative path below a tree
+
+    Raises ValueError for paths which could point outside of it.
+    """
+    parts = item_path.split("/")
+
+    if any(x in ["", ".", ".."] or "\\" in x for x in parts):
+        raise ValueError("Invalid relative path '{}'".format(item_path))
+
+    return parts
+
+
+def normalize_paths(paths: List[str]) -> List[str]:
+    # drop duplicates and paths which are covered by a parent path
+    result: List[str] = []
+
+    for item_path in sorted(set(paths)):
+        parts = get_path_parts(item_path)
+
+        if not any(
+            "/".join(parts[:i]) in result for i in range(1, len(parts))
+        ):
+            result.append(item_path)
+
+    return result
+
+
+def get_entry(
+    directory: Directory, parts: List[str]
+) -> Optional[Union[File, Directory]]:
+    for part in parts[:-1]:
+        if part not in directory.directories.keys():
+            return None
+
+        directory = directory.directories[part]
+
+    if parts[-1] in directory.files.keys():
+        return directory.files[parts[-1]]
+
+    return directory.directories.get(parts[-1])
+
+
+def replace_entry(
+    directory: Directory,
+    parts: List[str],
+    value: Optional[Union[File, Directory]],
+) -> Directory:
+    """
+    Return a copy of directory with the entry at parts replaced
+
+    Only the directories along parts are copied, all other
+    directories are shared with the original directory.
+    """
+    result = Directory(dict(directory.directories), dict(directory.files))
+
+    name = parts[0]
+
+    if len(parts) > 1:
+        child = replace_entry(
+            result.directories.get(name, Directory()), parts[1:], value
+        )
+
+        value = child if child.files or child.directories else None
+
+    result.directories.pop(name, None)
+    result.files.pop(name, None)
+
+    if isinstance(value, File):
+        result.files[name] = value
+    elif isinstance(value, Directory):
+        result.directories[name] = value
+
+    return result
+
+
+def filter_paths(directory: Directory, paths: List[str]) -> Directory:
+    result = Directory()
+
+    for item_path in normalize_paths(paths):
+        parts = item_path.split("/")
+
+        value = get_entry(directory, parts)
+
+        if value is not None:
+            result = replace_entry(result, parts, value)
+
+    return result
+
+
+def load_from_paths(
+    current_path: Path,
+    paths: List[str],
+    patterns: List[str] = [],
+    exclude: List[str] = [],
+) -> Directory:
+    """
+    Load only the given relative paths from the working directory
+
+    Ignore files of all parent directories still apply,
+    paths which point to directories are loaded recursively.
+    """
+    result = Directory()
+
+    for item_path in normalize_paths(paths):
+        parts = item_path.split("/")
+
+        if any(x in exclude for x in parts[:-1]):
+            continue
+
+        item_patterns = [*patterns]
+        parent_path = current_path
+
+        for part in parts[:-1]:
+            item_patterns += fs.load_ignore_file_as_patterns(parent_path)
+            parent_path = parent_path.joinpath(part)
+
+        item_instance_path = parent_path.joinpath(parts[-1])
+
+        if item_instance_path.is_file():
+            item_patterns += fs.load_ignore_file_as_patterns(parent_path)
+
+            if not filters.ignore(parts[-1], item_patterns):
+                result = replace_entry(
+                    result, parts, File(item_instance_path)
+                )
+        elif item_instance_path.is_dir() and parts[-1] not in exclude:
+            item_instance = load_from_directory_path(
+                item_instance_path,
+                [
+                    *item_patterns,
+                    *fs.load_ignore_file_as_patterns(parent_path),
+                ],
+                exclude,
+            )
+
+            if item_instance.files or item_instance.directories:
+                result = replace_entry(result, parts, item_instance)
+
+    return result
+
+
+def apply_differences(
+    path: Path, directory: Directory, differences: Differences
+) -> Directory:
+    # remove first so that swapped paths are not lost
+    for item_instance in [
+        *differences.removed_files,
+        *[x.source for x in differences.renamed_files],
+    ]:
+        directory = replace_entry(
+            directory,
+            item_instance.path.relative_to(path).as_posix().split("/"),
+            None,
+        )
+
+    for item_instance in [
+        *differences.added_files,
+        *differences.updated_files,
+        *[x.target for x in differences.renamed_files],
+        *[x.target for x in differences.copied_files],
+    ]:
+        directory = replace_entry(
+            directory,
+            item_instance.path.relative_to(path).as_posix().split("/"),
+            File(
+                item_instance.path,
+                item_instance.is_blob,
+                item_instance.blob_path,
+                item_instance.hashid,
+            ),
+        )
+
+    return directory
+
+
+def compare(
+    path: Path,
+    old: Directory,
+    new: Directory,
+    algorithm: str = transform.SHA256,
+) -> Differences:
     differences_instance = Differences()
 
     for key, value in new.directories.items():
         if key not in old.directories.keys():
             differences_instance = differences.merge_differences(
                 differences_instance,
-                compare(path.joinpath(key), Directory({}, {}), value),
+                compare(
+                    path.joinpath(key), Directory({}, {}), value, algorithm
+                ),
             )
         else:
             differences_instance = differences.merge_differences(
                 differences_instance,
-                compare(path.joinpath(key), old.directories[key], value),
+                compare(
+                    path.joinpath(key),
+                    old.directories[key],
+                    value,
+                    algorithm,
+                ),
+            )
+
+    # test for removed directories
+    for key, value in old.directories.items():
+        if key not in new.directories.keys():
+            differences_instance = differences.merge_differences(
+                differences_instance,
+                compare(
+                    path.joinpath(key), value, Directory({}, {}), algorithm
+                ),
             )
 
     # test for added or updated files
@@ -157,17 +466,224 @@ def compare(path: Path, old: Directory, new: Directory) -> Differences:
         file_path = path.joinpath(key)
 
         if key not in old.files.keys():
-            differences_instance.added_files.append(File(file_path))
-        elif file.serialize_as_hashid(value) != file.serialize_as_hashid(
-            old.files[key]
-        ):
-            differences_instance.updated_files.append(File(file_path))
+            differences_instance.added_files.append(
+                File(file_path, value.is_blob, value.blob_path, value.hashid)
+            )
+        elif file.serialize_as_hashid(
+            value, algorithm
+        ) != file.serialize_as_hashid(old.files[key], algorithm):
+            differences_instance.updated_files.append(
+                File(file_path, value.is_blob, value.blob_path, value.hashid)
+            )
 
     # test for removed files
     for key, value in old.files.items():
         file_path = path.joinpath(key)
 
         if key not in new.files.keys():
-            differences_instance.removed_files.append(File(file_path))
+            differences_instance.removed_files.append(
+                File(file_path, value.is_blob, value.blob_path, value.hashid)
+            )
+
+    return differences_instance
+
+
+def load_blob_as_dict(path: Path, hashid: str) -> Dict[str, Any]:
+    if not hashid:
+        return {"directories": {}, "files": {}}
+
+    return fs.load_blob_as_dict(path, hashid)
+
+
+def compare_blobs(
+    path: Path, old_hashid: str, new_hashid: str, current_path: Path = Path()
+) -> Differences:
+    """
+    Compare two stored trees without loading the working directory
+
+    Both trees are walked in lockstep, subtrees with equal hashids are
+    skipped and files are compared by their stored hashids only.
+    """
+    differences_instance = Differences()
+
+    if old_hashid == new_hashid:
+        return differences_instance
+
+    old = load_blob_as_dict(path, old_hashid)
+    new = load_blob_as_dict(path, new_hashid)
+
+    for key in sorted(
+        {*old["directories"].keys(), *new["directories"].keys()}
+    ):
+        differences_instance = differences.merge_differences(
+            differences_instance,
+            compare_blobs(
+                path,
+                old["directories"].get(key, ""),
+                new["directories"].get(key, ""),
+                current_path.joinpath(key),
+            ),
+        )
+
+    # test for added or updated files
+    for key, value in new["files"].items():
+        file_path = current_path.joinpath(key)
+
+        if key not in old["files"].keys():
+            differences_instance.added_files.append(
+                file.load_from_blob(path, value, file_path)
+            )
+        elif value != old["files"][key]:
+            differences_instance.updated_files.append(
+                file.load_from_blob(path, value, file_path)
+            )
+
+    # test for removed files
+    for key, value in old["files"].items():
+        if key not in new["files"].keys():
+            differences_instance.removed_files.append(
+                file.load_from_blob(path, value, current_path.joinpath(key))
+            )
 
     return differences_instance
+
+
+def get_blob_entries(
+    path: Path, hashid: str, paths: List[str]
+) -> Dict[str, Optional[Tuple[str, str]]]:
+    """
+    Return kind and hashid of the entries at many paths of a stored tree
+
+    Paths are grouped by their components, so every tree object along
+    the paths is loaded once however many paths share it. Results are
+    keyed by the given paths, empty components are ignored and an
+    empty path is the tree itself.
+    """
+    result: Dict[str, Optional[Tuple[str, str]]] = {}
+
+    pending = [(hashid, [(x, [y for y in x.split("/") if y]) for x in paths])]
+
+    while pending:
+        tree_hashid, items = pending.pop()
+
+        data = load_blob_as_dict(path, tree_hashid)
+
+        children: Dict[str, List[Tuple[str, List[str]]]] = {}
+
+        for item_path, parts in items:
+            if not parts:
+                result[item_path] = "directories", tree_hashid
+            elif len(parts) > 1:
+                children.setdefault(parts[0], []).append(
+                    (item_path, parts[1:])
+                )
+            elif parts[0] in data["files"].keys():
+                result[item_path] = "files", data["files"][parts[0]]
+            elif parts[0] in data["directories"].keys():
+                result[item_path] = (
+                    "directories",
+                    data["directories"][parts[0]],
+                )
+            else:
+                result[item_path] = None
+
+        for name, child_items in children.items():
+            if name in data["directories"].keys():
+                pending.append((data["directories"][name], child_items))
+            else:
+                result.update({x: None for x, _ in child_items})
+
+    return result
+
+
+def load_from_blob_paths(
+    path: Path, hashid: str, paths: List[str]
+) -> Directory:
+    """
+    Load only the given relative paths from a stored tree
+    """
+    result = Directory()
+
+    normalized_paths = normalize_paths(paths)
+
+    entries = get_blob_entries(path, hashid, normalized_paths)
+
+    for item_path in normalized_paths:
+        parts = item_path.split("/")
+
+        entry = entries[item_path]
+
+        if entry is None:
+            continue
+
+        kind, value = entry
+
+        result = replace_entry(
+            result,
+            parts,
+            file.load_from_blob(path, value)
+            if kind == "files"
+            else load_from_blob(path, value),
+        )
+
+    return result
+
+
+def update_blob(
+    path: Path, hashid: str, entries: Dict[str, Optional[Tuple[str, str]]]
+) -> str:
+    """
+    Store a copy of a stored tree with many entries replaced at once
+
+    Entries map relative paths to kind and hashid or None for removal.
+    Every tree object along the modified paths is loaded and written
+    exactly once, all other subtrees keep their hashids. Returns an
+    empty hashid for a tree which ended up empty.
+    """
+    data = load_blob_as_dict(path, hashid)
+
+    children: Dict[str, Dict[str, Optional[Tuple[str, str]]]] = {}
+
+    for item_path, entry in entries.items():
+        name, *rest_parts = get_path_parts(item_path)
+
+        rest = "/".join(rest_parts)
+
+        if rest:
+            children.setdefault(name, {})[rest] = entry
+
+            continue
+
+        data["directories"].pop(name, None)
+        data["files"].pop(name, None)
+
+        if entry is not None:
+            data[entry[0]][name] = entry[1]
+
+    for name, child_entries in children.items():
+        child_hashid = update_blob(
+            path, data["directories"].get(name, ""), child_entries
+        )
+
+        data["directories"].pop(name, None)
+        data["files"].pop(name, None)
+
+        if child_hashid:
+            data["directories"][name] = child_hashid
+
+    if not data["directories"] and not data["files"]:
+        return ""
+
+    return fs.store_dict_as_blob(path, data)
+
+
+def graft_blob(
+    path: Path,
+    hashid: str,
+    parts: List[str],
+    entry: Optional[Tuple[str, str]],
+) -> str:
+    """
+    Store a copy of a stored tree with the entry at parts replaced
+    """
+    return update_blob(path, hashid, {"/".join(parts): entry})
@@ -17,7 +17,11 @@ def store_as_blob(directory: Path, file: File) -> str:
 def load_from_blob(
     directory: Path, hashid: str, real_path: Optional[Path] = None
 ) -> File:
-    hashid_path = directory.joinpath(transform.hashid_as_path(hashid))
+    if fs.is_store(directory):
+        # objects of a store have no path of their own
+        return File(real_path or Path(hashid), True, None, hashid)
+
+    hashid_path = fs.get_blob_path(directory, hashid)
 
     if real_path is None:
         real_path = hashid_path
@@ -25,17 +29,17 @@ def load_from_blob(
     return File(real_path, True, hashid_path, hashid)
 
 
-def serialize_as_hashid(file: File) -> str:
-    if file.is_blob:
-        # if file has been loaded as blob simply
-        # return the associated hashid
+def serialize_as_hashid(file: File, algorithm: str = transform.SHA256) -> str:
+    if file.is_blob or file.hashid:
+        # if file has been loaded as blob or hashed before
+        # simply return the associated hashid
         return file.hashid
 
-    return transform.file_as_hashid(file.path)
+    return transform.file_as_hashid(file.path, algorithm)
 
 
 def serialize_as_dict(file: File) -> Dict[str, Any]:
-    data = transform.as_dict(file)
+    data = transform.as_dict(file, File)
 
     data = {
         **data,
@@ -47,4 +51,11 @@ def serialize_as_dict(file: File) -> Dict[str, Any]:
 
 
 def deserialize_from_dict(data: Dict[str, Any]) -> File:
-    return File(Path(data["path"]))
+    blob_path = data.get("blob_path")
+
+    return File(
+        Path(data["path"]),
+        data.get("is_blob", False),
+        Path(blob_path) if blob_path else None,
+        data.get("hashid", ""),
+    )
@@ -1,16 +1,86 @@
+import os
 import stat
 import shutil
+import threading
 
-from pathlib import Path
-from typing import Any, Dict, List
+from contextlib import contextmanager
+from pathlib import Path, PurePath
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from snapfs import transform
+from snapfs import index, transform
+from snapfs.datatypes import Format, Layout
+from snapfs.hashidset import is_hashid
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+if TYPE_CHECKING:  # pragma: no cover
+    from snapfs.store import Store
+
+
+# size of the chunks objects are streamed in
+CHUNK_SIZE = 1024 * 1024
+
+# objects stored as delta against another object carry this suffix
+DELTA_SUFFIX = ".delta"
+
+# name of the file in the blobs directory which records the layout
+LAYOUT_NAME = "layout"
+
+# name of the file in the blobs directory which records the format
+FORMAT_NAME = "format"
+
+# newest format this version can read, the first one predates the file
+FORMAT_VERSION = 2
+
+# formats per blobs directory, they never change once written
+_formats: Dict[str, Format] = {}
+
+# layouts per blobs directory with the stat signature of the layout file
+_layouts: Dict[
+    str, Tuple[Tuple[int, int, int], Layout, Optional[Layout]]
+] = {}
 
 
 def make_dirs(path: Path):
     path.mkdir(0o774, True, True)
 
 
+@contextmanager
+def locked(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on path across processes and threads
+
+    The lock is taken on a sibling file with the suffix .lock, so path
+    itself may be replaced while the lock is held.
+    """
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+
+    make_dirs(path.parent)
+
+    with open(str(path) + ".lock", "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
 def store_file(file_path: Path, content: str, override: bool = False) -> None:
     if file_path.is_file() and override:
         # make file writeable
@@ -32,14 +102,23 @@ def store_dict_as_file(
     store_file(file_path, transform.dict_as_json(data), override)
 
 
-def store_dict_as_blob(directory: Path, data: Dict[str, Any]) -> str:
-    contents = transform.dict_as_json(data)
+def is_store(directory: Any) -> bool:
+    # object stores are accepted wherever a blobs directory is expected
+    return not isinstance(directory, PurePath)
+
 
-    hashid = transform.string_as_hashid(contents)
+def store_dict_as_blob(
+    directory: Union[Path, "Store"], data: Dict[str, Any]
+) -> str:
+    if not isinstance(directory, PurePath):
+        return directory.put_dict(data)
 
-    hashid_path = directory.joinpath(transform.hashid_as_path(hashid))
+    contents = transform.dict_as_json(data)
 
-    store_file(hashid_path, contents)
+    hashid = transform.string_as_hashid(contents, get_algorithm(directory))
+
+    if not touch_blob(directory, hashid):
+        store_bytes_as_blob(directory, hashid, contents.encode("utf-8"))
 
     return hashid
 
@@ -57,8 +136,16 @@ def load_file_as_dict(file_path: Path) -> Dict[str, Any]:
     return transform.json_as_dict(load_file(file_path))
 
 
-def load_blob_as_dict(directory: Path, hashid: str) -> Dict[str, Any]:
-    hashid_path = directory.joinpath(transform.hashid_as_path(hashid))
+def load_blob_as_dict(
+    directory: Union[Path, "Store"], hashid: str
+) -> Dict[str, Any]:
+    if not isinstance(directory, PurePath):
+        return directory.get_dict(hashid)
+
+    hashid_path = find_blob(directory, hashid)
+
+    if hashid_path is None:
+        hashid_path = get_blob_path(directory, hashid)
 
     return load_file_as_dict(hashid_path)
 
@@ -69,21 +156,443 @@ def copy_file(source: Path, target: Path) -> None:
     shutil.copyfile(source, target)
 
 
-def copy_file_as_blob(directory: Path, source: Path) -> str:
-    hashid = transform.file_as_hashid(source)
+def copy_file_as_blob(directory: Union[Path, "Store"], source: Path) -> str:
+    if not isinstance(directory, PurePath):
+        return directory.put_file(source)
 
-    hashid_path = directory.joinpath(transform.hashid_as_path(hashid))
+    hashid = transform.file_as_hashid(source, get_algorithm(directory))
 
-    if not hashid_path.is_file():
-        make_dirs(hashid_path.parent)
+    if not touch_blob(directory, hashid):
+        hashid_path = get_blob_path(directory, hashid)
+        temporary_path = get_temporary_path(hashid_path)
 
-        copy_file(source, hashid_path)
+        copy_file(source, temporary_path)
 
-        hashid_path.chmod(stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+        replace_blob(directory, hashid, temporary_path)
 
     return hashid
 
 
+def get_temporary_path(file_path: Path) -> Path:
+    # unique per writer, so concurrent writers of one object never clash
+    return file_path.with_name(
+        "{}.{}.{}.tmp".format(
+            file_path.name, os.getpid(), threading.get_ident()
+        )
+    )
+
+
+def replace_blob(directory: Path, hashid: str, temporary_path: Path) -> None:
+    # make file read only
+    temporary_path.chmod(stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)
+
+    # replacing keeps writing safe when another writer stored it first
+    os.replace(temporary_path, get_blob_path(directory, hashid))
+
+    index.add(directory, hashid)
+
+
+def store_bytes_as_blob(directory: Path, hashid: str, data: bytes) -> None:
+    hashid_path = get_blob_path(directory, hashid)
+    temporary_path = get_temporary_path(hashid_path)
+
+    make_dirs(hashid_path.parent)
+
+    with open(temporary_path, "wb") as f:
+        f.write(data)
+
+    replace_blob(directory, hashid, temporary_path)
+
+
+def touch_blob(directory: Path, hashid: str) -> bool:
+    """
+    Touch a stored object and return whether it exists
+
+    Objects the index does not know are not looked up at all, objects
+    it knows are touched where the current layout puts them first.
+    """
+    known = index.contains(directory, hashid)
+
+    if known is False:
+        return False
+
+    if known:
+        try:
+            touch_file(get_blob_path(directory, hashid))
+
+            return True
+        except FileNotFoundError:
+            # stored as delta, under the previous layout or removed
+            pass
+
+    existing_path = find_blob(directory, hashid)
+
+    if existing_path is None:
+        return False
+
+    touch_file(existing_path)
+
+    return True
+
+
+def store_stream_as_blob(
+    directory: Path, hashid: str, stream: BinaryIO
+) -> None:
+    """
+    Store the contents of stream as object and verify them against hashid
+
+    Contents are hashed while they are written, the object only
+    appears under its hashid once it is complete and verified.
+    """
+    hashid_path = get_blob_path(directory, hashid)
+    temporary_path = get_temporary_path(hashid_path)
+
+    make_dirs(hashid_path.parent)
+
+    hash_instance = transform.new_hash(get_algorithm(directory))
+
+    with open(temporary_path, "wb") as f:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            hash_instance.update(chunk)
+
+            f.write(chunk)
+
+    if hash_instance.hexdigest() != hashid:
+        remove_file(temporary_path)
+
+        raise ValueError("Object '{}' is corrupt".format(hashid))
+
+    replace_blob(directory, hashid, temporary_path)
+
+
+def copy_stream_as_blob(directory: Path, stream: BinaryIO) -> str:
+    """
+    Store the contents of stream as object and return its hashid
+
+    Contents are hashed while they are written, so stream is read
+    once. They are written next to the shard directories until the
+    hashid is known.
+    """
+    make_dirs(directory)
+
+    temporary_path = get_temporary_path(directory.joinpath("stream"))
+
+    hash_instance = transform.new_hash(get_algorithm(directory))
+
+    try:
+        with open(temporary_path, "wb") as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                hash_instance.update(chunk)
+
+                f.write(chunk)
+    except BaseException:
+        remove_file(temporary_path)
+
+        raise
+
+    hashid = hash_instance.hexdigest()
+
+    if touch_blob(directory, hashid):
+        remove_file(temporary_path)
+    else:
+        make_dirs(get_blob_path(directory, hashid).parent)
+
+        replace_blob(directory, hashid, temporary_path)
+
+    return hashid
+
+
+def get_delta_path(hashid_path: Path) -> Path:
+    return hashid_path.with_name(hashid_path.name + DELTA_SUFFIX)
+
+
+def get_layout_path(directory: Path) -> Path:
+    return directory.joinpath(LAYOUT_NAME)
+
+
+def load_layouts(directory: Path) -> Tuple[Layout, Optional[Layout]]:
+    """
+    Return the layout of directory and the layout it is migrating from
+
+    The layout file is parsed once and only read again after it has
+    been replaced, which costs a single stat per lookup.
+    """
+    layout_path = get_layout_path(directory)
+
+    try:
+        stat_result = os.stat(layout_path)
+    except FileNotFoundError:
+        # repositories without layout file use the original layout
+        return Layout(), None
+
+    signature = (
+        stat_result.st_ino,
+        stat_result.st_mtime_ns,
+        stat_result.st_size,
+    )
+
+    cached = _layouts.get(str(directory))
+
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+
+    data = load_file_as_dict(layout_path)
+
+    layout = Layout(data["parts"], data["length"])
+    previous = Layout(**data["previous"]) if data.get("previous") else None
+
+    _layouts[str(directory)] = (signature, layout, previous)
+
+    return layout, previous
+
+
+def get_layout(directory: Path) -> Layout:
+    return load_layouts(directory)[0]
+
+
+def store_layouts(
+    directory: Path, layout: Layout, previous: Optional[Layout] = None
+) -> None:
+    if layout.parts < 0 or layout.length < 1:
+        raise ValueError("Invalid layout '{}'".format(layout))
+
+    layout_path = get_layout_path(directory)
+    temporary_path = layout_path.with_name(LAYOUT_NAME + ".tmp")
+
+    make_dirs(directory)
+
+    with open(temporary_path, "w") as f:
+        f.write(
+            transform.dict_as_json(
+                {
+                    **transform.as_dict(layout),
+                    "previous": transform.as_dict(previous)
+                    if previous
+                    else None,
+                }
+            )
+        )
+
+    # replace atomically so that readers never see a partial layout
+    os.replace(temporary_path, layout_path)
+
+
+def get_format_path(directory: Path) -> Path:
+    return directory.joinpath(FORMAT_NAME)
+
+
+def get_format(directory: Path) -> Format:
+    """
+    Return the format of the objects in directory
+
+    Directories without format file hold objects of the
+    first format, which are always hashed with sha256.
+    """
+    key = str(directory)
+
+    if key not in _formats:
+        try:
+            data = load_file_as_dict(get_format_path(directory))
+        except FileNotFoundError:
+            data = {}
+
+        format_instance = Format(**data)
+
+        if format_instance.version > FORMAT_VERSION:
+            raise ValueError(
+                "Unsupported format version '{}' of '{}'".format(
+                    format_instance.version, directory
+                )
+            )
+
+        _formats[key] = format_instance
+
+    return _formats[key]
+
+
+def get_algorithm(directory: Union[Path, "Store"]) -> str:
+    if not isinstance(directory, PurePath):
+        return directory.algorithm
+
+    return get_format(directory).algorithm
+
+
+def store_format(directory: Path, format_instance: Format) -> None:
+    if format_instance.algorithm not in transform.ALGORITHMS:
+        raise ValueError(
+            "algorithm must be one of {} but is '{}'".format(
+                transform.ALGORITHMS, format_instance.algorithm
+            )
+        )
+
+    make_dirs(directory)
+
+    store_dict_as_file(
+        get_format_path(directory), transform.as_dict(format_instance), True
+    )
+
+    _formats[str(directory)] = format_instance
+
+
+def get_blob_path(
+    directory: Path, hashid: str, layout: Optional[Layout] = None
+) -> Path:
+    if layout is None:
+        layout = get_layout(directory)
+
+    return directory.joinpath(
+        transform.hashid_as_path(hashid, layout.parts, layout.length)
+    )
+
+
+def find_blob(directory: Path, hashid: str) -> Optional[Path]:
+    """
+    Return the path of the loose or delta object of hashid if stored
+
+    While a migration is running objects are looked up in the new
+    layout, the previous layout and the new layout again, so an object
+    which is moved in the meantime is never missed.
+    """
+    layout, previous = load_layouts(directory)
+
+    layouts = [layout] if previous is None else [layout, previous, layout]
+
+    for item_layout in layouts:
+        hashid_path = get_blob_path(directory, hashid, item_layout)
+
+        for item_path in [hashid_path, get_delta_path(hashid_path)]:
+            if item_path.is_file():
+                return item_path
+
+    return None
+
+
+def is_blob(directory: Path, hashid: str) -> bool:
+    known = index.contains(directory, hashid)
+
+    if known is not None:
+        return known
+
+    return find_blob(directory, hashid) is not None
+
+
+def split_blob_name(name: str) -> Tuple[str, bool]:
+    """
+    Return hashid and whether the object is stored as delta
+    """
+    if name.endswith(DELTA_SUFFIX):
+        return name[: -len(DELTA_SUFFIX)], True
+
+    return name, False
+
+
+def is_layout_directory(relative_path: Path, layout: Layout) -> bool:
+    return len(relative_path.parts) <= layout.parts and all(
+        len(x) == layout.length for x in relative_path.parts
+    )
+
+
+def move_blob(source: Path, target: Path) -> None:
+    make_dirs(target.parent)
+
+    try:
+        # link first so that the object exists at all times
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        # file system without hard links
+        os.replace(source, target)
+
+        return
+
+    os.unlink(source)
+
+
+def migrate_layout(directory: Path, layout: Layout) -> int:
+    """
+    Move all objects of directory into layout and return their number
+
+    The repository stays usable during the migration, lookups fall
+    back to the previous layout until all objects have been moved.
+    An interrupted migration is completed before a new one starts.
+    """
+    current, previous = load_layouts(directory)
+
+    if previous is not None and layout != current:
+        migrate_layout(directory, current)
+
+    store_layouts(directory, layout, current)
+
+    moved = 0
+
+    for name, blob_path in list_blobs(directory):
+        hashid, delta = split_blob_name(name)
+
+        if not is_hashid(hashid):
+            continue
+
+        target_path = get_blob_path(directory, hashid, layout)
+
+        if delta:
+            target_path = get_delta_path(target_path)
+
+        if blob_path == target_path:
+            continue
+
+        move_blob(blob_path, target_path)
+
+        moved += 1
+
+    # remove emptied shard directories of the previous layout
+    for root, directories, names in os.walk(directory, topdown=False):
+        root_path = Path(root)
+
+        if root_path == directory or names or any(
+            root_path.joinpath(x).is_dir() for x in directories
+        ):
+            continue
+
+        if not is_layout_directory(root_path.relative_to(directory), layout):
+            os.rmdir(root_path)
+
+    store_layouts(directory, layout)
+
+    return moved
+
+
+def touch_file(file_path: Path) -> None:
+    # refresh modification time so that existing blobs
+    # which are referenced again survive garbage collection
+    os.utime(file_path)
+
+
+def remove_file(file_path: Path) -> None:
+    # make file writeable
+    file_path.chmod(stat.S_IWRITE | stat.S_IWGRP | stat.S_IROTH)
+
+    file_path.unlink()
+
+
+def list_blobs(directory: Path) -> Iterator[Tuple[str, Path]]:
+    for root, directories, names in os.walk(directory):
+        # walk shard directories in a stable order
+        directories.sort()
+
+        root_path = Path(root)
+
+        prefix = "".join(root_path.relative_to(directory).parts)
+
+        for name in sorted(names):
+            if root_path == directory and not is_hashid(
+                split_blob_name(name)[0]
+            ):
+                # layout, format, index and temporary files
+                continue
+
+            yield prefix + name, root_path.joinpath(name)
+
+
 def load_ignore_file_as_patterns(directory: Path) -> List[str]:
     patterns = []
 
@@ -0,0 +1,295 @@
+import time
+
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from snapfs import delta, fs, graph, garbage, hashing, transform
+from snapfs import repository
+from snapfs.datatypes import Verification
+from snapfs.hashidset import HashidSet, is_hashid
+
+
+# number of objects hashed between two progress updates
+BATCH_SIZE = 256
+
+
+# verification helpers
+def store_as_file(path: Path, verification: Verification) -> None:
+    fs.store_dict_as_file(
+        path, serialize_as_dict(verification), override=True
+    )
+
+
+def load_from_file(path: Path) -> Verification:
+    return deserialize_from_dict(fs.load_file_as_dict(path))
+
+
+def serialize_as_dict(verification: Verification) -> Dict[str, Any]:
+    return transform.as_dict(verification)
+
+
+def deserialize_from_dict(data: Dict[str, Any]) -> Verification:
+    return Verification(**data)
+
+
+def serialize_as_messages(verification: Verification) -> List[str]:
+    return [
+        *["corrupt: {}".format(x) for x in verification.corrupt_hashids],
+        *["dangling: {}".format(x) for x in verification.dangling_hashids],
+    ]
+
+
+def iterate_batches(
+    directory: Path, cursor: str = "", batch_size: int = BATCH_SIZE
+) -> Iterator[List[Tuple[str, Path]]]:
+    batch: List[Tuple[str, Path]] = []
+
+    # objects are listed in hashid order, which makes
+    # the last verified hashid a valid resume point
+    for name, blob_path in fs.list_blobs(directory):
+        hashid, _ = fs.split_blob_name(name)
+
+        if not is_hashid(hashid) or hashid <= cursor:
+            continue
+
+        batch.append((hashid, blob_path))
+
+        if len(batch) >= batch_size:
+            yield batch
+
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def throttle(started: float, size: int, rate: Optional[float]) -> None:
+    if not rate:
+        return
+
+    delay = size / rate - (time.monotonic() - started)
+
+    if delay > 0:
+        time.sleep(delay)
+
+
+def verify_delta(directory: Path, hashid: str) -> Tuple[bool, int]:
+    try:
+        data = delta.load_blob(directory, hashid, delta.Cache(0))
+    except (OSError, ValueError):
+        # missing base or broken instructions
+        return False, 0
+
+    return (
+        transform.bytes_as_hashid(data, fs.get_algorithm(directory))
+        == hashid,
+        len(data),
+    )
+
+
+def hash_loose(
+    blob_path: Path, algorithm: str
+) -> Union[hashing.HashResult, OSError]:
+    try:
+        return hashing.hash_path(blob_path, algorithm)
+    except OSError as e:
+        return e
+
+
+def verify_batch(
+    directory: Path,
+    batch: List[Tuple[str, Path]],
+    backend: str = hashing.DEFAULT_BACKEND,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> Tuple[List[str], int]:
+    """
+    Rehash a batch of objects and return corrupt hashids and read bytes
+
+    Objects which can not be read are reported as corrupt.
+    """
+    corrupt_hashids: List[str] = []
+    size = 0
+
+    algorithm = fs.get_algorithm(directory)
+
+    loose = [x for x in batch if not fs.split_blob_name(x[1].name)[1]]
+
+    results: List[Union[hashing.HashResult, OSError]]
+
+    try:
+        results = list(
+            hashing.hash_paths(
+                [x[1] for x in loose],
+                backend,
+                workers,
+                algorithm=algorithm,
+                executor=executor,
+            )
+        )
+    except OSError:
+        # rehash one at a time, so one unreadable object does not
+        # hide the results of the others
+        results = [hash_loose(x[1], algorithm) for x in loose]
+
+    for (hashid, _), result in zip(loose, results):
+        if isinstance(result, FileNotFoundError):
+            # removed or moved since it was listed, objects which are
+            # still referenced are reported as dangling
+            continue
+
+        if isinstance(result, OSError):
+            corrupt_hashids.append(hashid)
+
+            continue
+
+        _, actual_hashid, stat_result = result
+
+        size += stat_result.st_size
+
+        if actual_hashid != hashid:
+            corrupt_hashids.append(hashid)
+
+    for hashid, blob_path in batch:
+        if not fs.split_blob_name(blob_path.name)[1]:
+            continue
+
+        valid, delta_size = verify_delta(directory, hashid)
+
+        size += delta_size
+
+        if not valid:
+            corrupt_hashids.append(hashid)
+
+    return sorted(corrupt_hashids), size
+
+
+def check_references(path: Path) -> List[str]:
+    """
+    Return hashids referenced by reachable commits and trees but missing
+    """
+    blobs_path = repository.get_blobs_path(path)
+
+    dangling_hashids: List[str] = []
+
+    seen = HashidSet()
+
+    frontier = [
+        (graph.COMMIT, x)
+        for x in garbage.get_root_commit_hashids(path)
+        if seen.add(x)
+    ]
+
+    stage_instance = repository.get_stage(path)
+
+    # staged files which are not blobs yet are only stored on commit
+    frontier += [
+        (graph.FILE, x.hashid)
+        for x in [
+            *stage_instance.added_files,
+            *stage_instance.updated_files,
+            *stage_instance.removed_files,
+        ]
+        if x.is_blob and x.hashid and seen.add(x.hashid)
+    ]
+
+    while frontier:
+        kind, hashid = frontier.pop()
+
+        blob_path = fs.find_blob(blobs_path, hashid)
+
+        if blob_path is None:
+            dangling_hashids.append(hashid)
+
+            continue
+
+        if kind == graph.FILE:
+            continue
+
+        try:
+            data = fs.load_file_as_dict(blob_path)
+
+            children = graph.get_children(kind, data)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # corrupt objects are reported by rehashing
+            continue
+
+        frontier += [x for x in children if seen.add(x[1])]
+
+    return sorted(dangling_hashids)
+
+
+def fsck(
+    path: Path,
+    backend: str = hashing.DEFAULT_BACKEND,
+    workers: Optional[int] = None,
+    rate: Optional[float] = None,
+    limit: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Verification:
+    """
+    Verify stored objects and references of the repository
+
+    Every object is rehashed and compared with its name, reads are
+    throttled to rate bytes per second. Progress is stored after every
+    batch and at most limit objects are verified per call, so repeated
+    calls continue where the previous one stopped. References are
+    checked once all objects have been rehashed. Raises ValueError
+    while the layout of the blobs directory is being migrated.
+    """
+    blobs_path = repository.get_blobs_path(path)
+
+    if fs.load_layouts(blobs_path)[1] is not None:
+        # objects move and are listed out of hashid order meanwhile,
+        # so no cursor into the listing could be trusted
+        raise ValueError(
+            "Unable to verify '{}' before its layout migration "
+            "is complete".format(path)
+        )
+
+    verification_path = repository.get_verification_path(path, False)
+
+    verification = Verification()
+
+    if verification_path.is_file():
+        verification = load_from_file(verification_path)
+
+        if verification.complete:
+            # start a new pass
+            verification = Verification()
+
+    verified = 0
+
+    # workers are started once per call, not once per batch
+    with hashing.open_executor(backend, workers) as executor:
+        for batch in iterate_batches(
+            blobs_path, verification.cursor, batch_size
+        ):
+            if limit is not None and verified >= limit:
+                return verification
+
+            batch = batch[: None if limit is None else limit - verified]
+
+            started = time.monotonic()
+
+            corrupt_hashids, size = verify_batch(
+                blobs_path, batch, backend, workers, executor
+            )
+
+            verification.cursor = batch[-1][0]
+            verification.checked += len(batch)
+            verification.corrupt_hashids += corrupt_hashids
+
+            verified += len(batch)
+
+            store_as_file(verification_path, verification)
+
+            throttle(started, size, rate)
+
+    verification.dangling_hashids = check_references(path)
+    verification.complete = True
+
+    store_as_file(verification_path, verification)
+
+    return verification
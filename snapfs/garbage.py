@@ -0,0 +1,110 @@
+import time
+
+from pathlib import Path
+from typing import List, Optional
+
+from snapfs import delta, fs, graph, index, repository
+from snapfs.hashidset import HashidSet, is_hashid
+
+
+# two weeks
+GRACE_PERIOD = 14 * 24 * 60 * 60
+
+
+def get_root_commit_hashids(path: Path) -> List[str]:
+    references = [
+        *repository.get_branches(path).values(),
+        *repository.get_tags(path).values(),
+    ]
+
+    try:
+        references.append(repository.get_reference(path))
+    except (repository.NoReferenceError, FileNotFoundError):
+        # head does not point to a stored reference
+        pass
+
+    return [x.commit_hashid for x in references if x.commit_hashid]
+
+
+def get_stage_hashids(path: Path) -> List[str]:
+    stage_instance = repository.get_stage(path)
+
+    return [
+        x.hashid
+        for x in [
+            *stage_instance.added_files,
+            *stage_instance.updated_files,
+            *stage_instance.removed_files,
+        ]
+        if x.hashid
+    ]
+
+
+def mark(path: Path, workers: Optional[int] = None) -> HashidSet:
+    seen = HashidSet(get_stage_hashids(path))
+
+    blobs_path = repository.get_blobs_path(path)
+
+    marked = graph.mark(
+        blobs_path, get_root_commit_hashids(path), seen, workers
+    )
+
+    # deltas can not be read without their bases
+    return delta.mark_bases(blobs_path, marked)
+
+
+def sweep(
+    path: Path, marked: HashidSet, grace_period: float = GRACE_PERIOD
+) -> List[str]:
+    removed_hashids: List[str] = []
+    kept = HashidSet()
+
+    expiration = time.time() - grace_period
+
+    blobs_path = repository.get_blobs_path(path)
+
+    # objects stored while the blobs are listed are appended from here
+    since = index.get_log_size(blobs_path)
+
+    for name, blob_path in fs.list_blobs(blobs_path):
+        hashid, _ = fs.split_blob_name(name)
+
+        if not is_hashid(hashid):
+            continue
+
+        if hashid in marked or blob_path.stat().st_mtime >= expiration:
+            # keep recent objects which may belong to
+            # a stage or commit that is still being written
+            kept.add(hashid)
+
+            continue
+
+        fs.remove_file(blob_path)
+
+        removed_hashids.append(hashid)
+
+    # the index must never report a removed object
+    index.rebuild(blobs_path, kept, since, set(removed_hashids))
+
+    return removed_hashids
+
+
+def collect(
+    path: Path,
+    grace_period: float = GRACE_PERIOD,
+    workers: Optional[int] = None,
+) -> List[str]:
+    return sweep(path, mark(path, workers), grace_period)
+
+
+def repack(
+    path: Path,
+    max_depth: int = delta.MAX_DEPTH,
+    max_size: int = delta.MAX_SIZE,
+) -> List[str]:
+    return delta.repack(
+        repository.get_blobs_path(path),
+        get_root_commit_hashids(path),
+        max_depth,
+        max_size=max_size,
+    )
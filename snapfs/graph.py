@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from snapfs import fs
+from snapfs.hashidset import HashidSet
+
+
+COMMIT = "commit"
+TREE = "tree"
+FILE = "file"
+
+
+def get_children(kind: str, data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    children: List[Tuple[str, str]] = []
+
+    if kind == COMMIT:
+        if data["tree_hashid"]:
+            children.append((TREE, data["tree_hashid"]))
+
+        children += [(COMMIT, x) for x in data["previous_commits_hashids"]]
+    elif kind == TREE:
+        children += [(TREE, x) for x in data["directories"].values()]
+        children += [(FILE, x) for x in data["files"].values()]
+
+    return children
+
+
+def iterate(
+    directory: Path,
+    commit_hashids: Iterable[str],
+    seen: Optional[HashidSet] = None,
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yield kind and hashid of every object reachable from commits
+
+    Commits and trees are loaded level by level with a thread pool.
+    Hashids in seen are skipped along with everything below them.
+    """
+    if seen is None:
+        seen = HashidSet()
+
+    frontier = [(COMMIT, x) for x in commit_hashids if seen.add(x)]
+
+    def load(item: Tuple[str, str]) -> Dict[str, Any]:
+        return fs.load_blob_as_dict(directory, item[1])
+
+    with ThreadPoolExecutor(workers) as executor:
+        while frontier:
+            next_frontier: List[Tuple[str, str]] = []
+
+            for item, data in zip(frontier, executor.map(load, frontier)):
+                yield item
+
+                for child in get_children(item[0], data):
+                    if not seen.add(child[1]):
+                        continue
+
+                    if child[0] == FILE:
+                        # file blobs have no children and
+                        # never need to be loaded
+                        yield child
+                    else:
+                        next_frontier.append(child)
+
+            frontier = next_frontier
+
+
+def mark(
+    directory: Path,
+    commit_hashids: Iterable[str],
+    seen: Optional[HashidSet] = None,
+    workers: Optional[int] = None,
+) -> HashidSet:
+    if seen is None:
+        seen = HashidSet()
+
+    for _ in iterate(directory, commit_hashids, seen, workers):
+        pass
+
+    return seen
+
+
+def is_ancestor(directory: Path, ancestor_hashid: str, hashid: str) -> bool:
+    """
+    Return whether ancestor_hashid is hashid or one of its previous commits
+
+    Only commits are loaded, trees and files are never looked at.
+    """
+    seen = HashidSet()
+    stack = [hashid]
+
+    while stack:
+        current = stack.pop()
+
+        if current == ancestor_hashid:
+            return True
+
+        if not seen.add(current):
+            continue
+
+        data = fs.load_blob_as_dict(directory, current)
+
+        stack.extend(data["previous_commits_hashids"])
+
+    return False
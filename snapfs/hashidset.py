@@ -0,0 +1,123 @@
+from typing import Iterable, Iterator
+
+DIGEST_SIZE = 32
+
+
+def hashid_as_digest(hashid: str) -> bytes:
+    return bytes.fromhex(hashid)
+
+
+def is_hashid(string: str) -> bool:
+    try:
+        return len(hashid_as_digest(string)) == DIGEST_SIZE
+    except ValueError:
+        return False
+
+
+def digest_as_hashid(digest: bytes) -> str:
+    return digest.hex()
+
+
+class HashidSet:
+    """
+    This class represents a compact set of hashids
+
+    Hashids are stored as raw digests in a single open addressing
+    table instead of one python string object per hashid,
+    which keeps the memory per entry close to the digest size.
+    """
+
+    def __init__(self, hashids: Iterable[str] = (), capacity: int = 1024):
+        self._capacity = 1
+
+        while self._capacity < capacity:
+            self._capacity *= 2
+
+        self._length = 0
+        self._used = bytearray(self._capacity)
+        self._digests = bytearray(self._capacity * DIGEST_SIZE)
+
+        for hashid in hashids:
+            self.add(hashid)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __contains__(self, hashid: object) -> bool:
+        if not isinstance(hashid, str):
+            return False
+
+        return self._find(hashid_as_digest(hashid)) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._capacity):
+            if self._used[index]:
+                yield digest_as_hashid(self._get(index))
+
+    def add(self, hashid: str) -> bool:
+        """
+        Add hashid and return whether it was not in the set before
+        """
+        if (self._length + 1) * 10 > self._capacity * 7:
+            self._resize(self._capacity * 2)
+
+        return self._insert(hashid_as_digest(hashid))
+
+    def update(self, hashids: Iterable[str]) -> None:
+        for hashid in hashids:
+            self.add(hashid)
+
+    def _get(self, index: int) -> bytes:
+        offset = index * DIGEST_SIZE
+
+        return bytes(self._digests[offset : offset + DIGEST_SIZE])
+
+    def _probe(self, digest: bytes) -> Iterator[int]:
+        mask = self._capacity - 1
+        index = int.from_bytes(digest[:8], "little") & mask
+
+        while True:
+            yield index
+
+            index = (index + 1) & mask
+
+    def _find(self, digest: bytes) -> int:
+        for index in self._probe(digest):
+            if not self._used[index]:
+                return -1
+
+            if self._get(index) == digest:
+                return index
+
+        return -1
+
+    def _insert(self, digest: bytes) -> bool:
+        for index in self._probe(digest):
+            if not self._used[index]:
+                offset = index * DIGEST_SIZE
+
+                self._used[index] = 1
+                self._digests[offset : offset + DIGEST_SIZE] = digest
+                self._length += 1
+
+                return True
+
+            if self._get(index) == digest:
+                return False
+
+        return False
+
+    def _resize(self, capacity: int) -> None:
+        used = self._used
+        digests = self._digests
+
+        self._capacity = capacity
+        self._length = 0
+        self._used = bytearray(self._capacity)
+        self._digests = bytearray(self._capacity * DIGEST_SIZE)
+
+        for index, is_used in enumerate(used):
+            if is_used:
+                offset = index * DIGEST_SIZE
+
+                self._insert(bytes(digests[offset : offset + DIGEST_SIZE]))
@@ -0,0 +1,161 @@
+import functools
+import os
+
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from snapfs import transform
+
+
+SERIAL = "serial"
+THREAD = "thread"
+PROCESS = "process"
+
+BACKENDS = [SERIAL, THREAD, PROCESS]
+
+# threads only pay off with more than one cpu to run them on
+DEFAULT_BACKEND = THREAD if (os.cpu_count() or 1) > 1 else SERIAL
+
+MIN_BATCH_SIZE = 16
+MAX_BATCH_SIZE = 2048
+BATCHES_PER_WORKER = 4
+
+HashResult = Tuple[Path, str, os.stat_result]
+
+
+def get_workers(workers: Optional[int] = None) -> int:
+    return workers or os.cpu_count() or 1
+
+
+def get_batch_size(count: int, workers: int) -> int:
+    # a few batches per worker keeps all workers busy until the end
+    # while amortizing the cost of shipping paths between processes
+    batch_size = count // (workers * BATCHES_PER_WORKER)
+
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, batch_size))
+
+
+def hash_path(path: Path, algorithm: str = transform.SHA256) -> HashResult:
+    stat_result = os.stat(path)
+
+    return path, transform.file_as_hashid(path, algorithm), stat_result
+
+
+def hash_batch(
+    paths: List[str], algorithm: str = transform.SHA256
+) -> List[Tuple[str, str, os.stat_result]]:
+    results = []
+
+    for path in paths:
+        stat_result = os.stat(path)
+
+        hashid = transform.file_as_hashid(Path(path), algorithm)
+
+        results.append((path, hashid, stat_result))
+
+    return results
+
+
+def validate_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(
+            "backend must be one of {} but is '{}'".format(BACKENDS, backend)
+        )
+
+
+@contextmanager
+def open_executor(
+    backend: str, workers: Optional[int] = None
+) -> Iterator[Optional[Executor]]:
+    """
+    Provide an executor for backend, which can be shared by many calls
+
+    Starting worker processes is expensive, callers which hash many
+    groups of paths open one executor and pass it to every call.
+    The serial backend needs no executor and gets None.
+    """
+    validate_backend(backend)
+
+    if backend == SERIAL:
+        yield None
+
+        return
+
+    executor_class = (
+        ThreadPoolExecutor if backend == THREAD else ProcessPoolExecutor
+    )
+
+    with executor_class(get_workers(workers)) as executor:
+        yield executor
+
+
+def hash_paths(
+    paths: Iterable[Path],
+    backend: str = DEFAULT_BACKEND,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    algorithm: str = transform.SHA256,
+    executor: Optional[Executor] = None,
+) -> Iterator[HashResult]:
+    """
+    Yield path, hashid and stat result for every path in order
+
+    The process backend ships batches of paths to worker processes,
+    which avoids contention on the interpreter lock for many small files.
+    The backend is validated right away, not once iteration starts.
+    """
+    validate_backend(backend)
+
+    return iterate_hashes(
+        paths, backend, workers, batch_size, algorithm, executor
+    )
+
+
+def iterate_hashes(
+    paths: Iterable[Path],
+    backend: str,
+    workers: Optional[int],
+    batch_size: Optional[int],
+    algorithm: str,
+    executor: Optional[Executor],
+) -> Iterator[HashResult]:
+    if executor is None and backend != SERIAL:
+        with open_executor(backend, workers) as executor:
+            yield from iterate_hashes(
+                paths, backend, workers, batch_size, algorithm, executor
+            )
+
+        return
+
+    callback = functools.partial(hash_path, algorithm=algorithm)
+
+    if executor is None:
+        yield from map(callback, paths)
+    elif backend == THREAD:
+        yield from executor.map(callback, paths)
+    else:
+        path_list = list(paths)
+
+        if batch_size is None:
+            batch_size = get_batch_size(len(path_list), get_workers(workers))
+
+        batches = [
+            [str(x) for x in path_list[i : i + batch_size]]
+            for i in range(0, len(path_list), batch_size)
+        ]
+
+        offset = 0
+
+        for results in executor.map(
+            functools.partial(hash_batch, algorithm=algorithm), batches
+        ):
+            for (_, hashid, stat_result) in results:
+                yield path_list[offset], hashid, stat_result
+
+                offset += 1
@@ -0,0 +1,407 @@
+import os
+import struct
+import threading
+import time
+
+from contextlib import ExitStack
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Container,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+)
+
+from snapfs.bloom import BloomFilter
+from snapfs.hashidset import (
+    DIGEST_SIZE,
+    HashidSet,
+    digest_as_hashid,
+    hashid_as_digest,
+)
+
+
+# append only log of the digests of stored objects
+INDEX_NAME = "index"
+
+# bloom filter over the log up to the offset recorded in its header
+FILTER_NAME = "filter"
+
+# offset into the log and capacity of the stored filter
+FILTER_STRUCT = struct.Struct(">QQ")
+
+# digests appended to the log before the filter is stored again
+FLUSH_COUNT = 4096
+
+# seconds between looking for digests appended by other processes
+REFRESH_INTERVAL = 1.0
+
+# indexes per blobs directory with the time they were last refreshed
+_indexes: Dict[str, Tuple[float, Optional["Index"]]] = {}
+
+_lock = threading.Lock()
+
+
+class Index:
+    """
+    This class represents the hashids stored in a blobs directory
+
+    The bloom filter answers negative lookups on its own, positive
+    lookups are confirmed against the exact set, which is read from
+    the log the first time it is needed.
+    """
+
+    def __init__(self, directory: Path, bloom: BloomFilter, offset: int):
+        self.directory = directory
+        self.bloom = bloom
+        self.offset = offset
+        self.stored_offset = offset
+        self.exact: Optional[HashidSet] = None
+        self.inode = 0
+        self.lock = threading.Lock()
+
+    def get_exact(self) -> HashidSet:
+        if self.exact is None:
+            exact = HashidSet(capacity=self.offset // DIGEST_SIZE)
+
+            for digest in read_log(self.directory, 0, self.offset):
+                exact.add(digest_as_hashid(digest))
+
+            self.exact = exact
+
+        return self.exact
+
+    def __contains__(self, hashid: object) -> bool:
+        if not isinstance(hashid, str) or hashid not in self.bloom:
+            return False
+
+        with self.lock:
+            return hashid in self.get_exact()
+
+
+# path helpers
+def get_index_path(directory: Path) -> Path:
+    return directory.joinpath(INDEX_NAME)
+
+
+def get_filter_path(directory: Path) -> Path:
+    return directory.joinpath(FILTER_NAME)
+
+
+# log helpers
+def read_log(
+    directory: Path, start: int = 0, end: Optional[int] = None
+) -> Iterator[bytes]:
+    with open(get_index_path(directory), "rb") as f:
+        f.seek(start)
+
+        position = start
+
+        while end is None or position < end:
+            digest = f.read(DIGEST_SIZE)
+
+            if len(digest) < DIGEST_SIZE:
+                # skip a digest which is still being appended
+                break
+
+            position += DIGEST_SIZE
+
+            yield digest
+
+
+def store_filter(directory: Path, bloom: BloomFilter, offset: int) -> None:
+    filter_path = get_filter_path(directory)
+    temporary_path = filter_path.with_name(filter_path.name + ".tmp")
+
+    with open(temporary_path, "wb") as f:
+        f.write(FILTER_STRUCT.pack(offset, bloom.capacity))
+        f.write(bloom.bits)
+
+    os.replace(temporary_path, filter_path)
+
+
+def load_filter(directory: Path) -> Tuple[BloomFilter, int]:
+    with open(get_filter_path(directory), "rb") as f:
+        offset, capacity = FILTER_STRUCT.unpack(f.read(FILTER_STRUCT.size))
+
+        bloom = BloomFilter(capacity)
+
+        bits = f.read()
+
+    if len(bits) != len(bloom.bits):
+        raise ValueError("Filter of '{}' is corrupt".format(directory))
+
+    bloom.bits[:] = bits
+
+    return bloom, offset
+
+
+def build_filter(directory: Path, offset: int) -> BloomFilter:
+    # leave room to grow before the filter has to be rebuilt
+    bloom = BloomFilter(max(1024, 2 * offset // DIGEST_SIZE))
+
+    for digest in read_log(directory, 0, offset):
+        bloom.add_digest(digest)
+
+    return bloom
+
+
+# index functions
+def load_index(directory: Path) -> Optional[Index]:
+    try:
+        stat_result = os.stat(get_index_path(directory))
+    except FileNotFoundError:
+        return None
+
+    try:
+        bloom, offset = load_filter(directory)
+    except (FileNotFoundError, ValueError, struct.error):
+        bloom, offset = None, 0
+
+    if bloom is None or offset > stat_result.st_size:
+        # the filter is missing or belongs to an older log
+        offset = stat_result.st_size - stat_result.st_size % DIGEST_SIZE
+
+        bloom = build_filter(directory, offset)
+
+        store_filter(directory, bloom, offset)
+
+    index_instance = Index(directory, bloom, offset)
+    index_instance.inode = stat_result.st_ino
+
+    refresh(index_instance)
+
+    return index_instance
+
+
+def refresh(index_instance: Index) -> bool:
+    """
+    Read digests other writers appended to the log since the last call
+
+    Returns False if the log has been replaced in the meantime.
+    """
+    directory = index_instance.directory
+
+    try:
+        stat_result = os.stat(get_index_path(directory))
+    except FileNotFoundError:
+        return False
+
+    if (
+        stat_result.st_ino != index_instance.inode
+        or stat_result.st_size < index_instance.offset
+    ):
+        return False
+
+    with index_instance.lock:
+        read_tail(index_instance)
+
+    return True
+
+
+def read_tail(index_instance: Index, end: Optional[int] = None) -> None:
+    # the caller holds the lock of the index
+    directory = index_instance.directory
+
+    for digest in read_log(directory, index_instance.offset, end):
+        index_instance.bloom.add_digest(digest)
+
+        if index_instance.exact is not None:
+            index_instance.exact.add(digest_as_hashid(digest))
+
+        index_instance.offset += DIGEST_SIZE
+
+    if index_instance.offset // DIGEST_SIZE > index_instance.bloom.capacity:
+        index_instance.bloom = build_filter(directory, index_instance.offset)
+
+
+def get_index(directory: Path) -> Optional[Index]:
+    """
+    Return the index of a blobs directory or None if it has none
+
+    Indexes are kept in memory and looked at again on disk at most
+    once per refresh interval.
+    """
+    key = str(directory)
+    now = time.monotonic()
+
+    with _lock:
+        refreshed, index_instance = _indexes.get(key, (0.0, None))
+
+        if key in _indexes and now - refreshed < REFRESH_INTERVAL:
+            return index_instance
+
+        if index_instance is None or not refresh(index_instance):
+            index_instance = load_index(directory)
+
+        _indexes[key] = (now, index_instance)
+
+    return index_instance
+
+
+def contains(directory: Path, hashid: str) -> Optional[bool]:
+    """
+    Return whether an object is stored or None if there is no index
+    """
+    index_instance = get_index(directory)
+
+    if index_instance is None:
+        return None
+
+    return hashid in index_instance
+
+
+def add(directory: Path, hashid: str) -> None:
+    index_instance = get_index(directory)
+
+    if index_instance is None or hashid in index_instance:
+        return
+
+    with index_instance.lock:
+        with open(get_index_path(directory), "ab") as f:
+            f.write(hashid_as_digest(hashid))
+            f.flush()
+
+            # other writers may have appended since the last refresh,
+            # everything up to and including this digest is read back
+            end = f.tell()
+            inode = os.fstat(f.fileno()).st_ino
+
+        replaced = inode != index_instance.inode
+
+        if not replaced:
+            bloom = index_instance.bloom
+
+            read_tail(index_instance, end)
+
+            if (
+                index_instance.bloom is not bloom
+                or index_instance.offset - index_instance.stored_offset
+                >= FLUSH_COUNT * DIGEST_SIZE
+            ):
+                store_filter(
+                    directory, index_instance.bloom, index_instance.offset
+                )
+
+                index_instance.stored_offset = index_instance.offset
+
+    if replaced:
+        # the log has been rebuilt meanwhile, load it again next time
+        with _lock:
+            _indexes.pop(str(directory), None)
+
+
+def get_log_size(directory: Path) -> int:
+    """
+    Return the offset up to which the log is complete
+    """
+    try:
+        size = os.stat(get_index_path(directory)).st_size
+    except FileNotFoundError:
+        return 0
+
+    return size - size % DIGEST_SIZE
+
+
+def copy_log(
+    source: BinaryIO, target: BinaryIO, skip: Container[str]
+) -> int:
+    count = 0
+
+    while True:
+        digest = source.read(DIGEST_SIZE)
+
+        if len(digest) < DIGEST_SIZE:
+            # leave a digest which is still being appended
+            source.seek(-len(digest), os.SEEK_CUR)
+
+            return count
+
+        if digest_as_hashid(digest) not in skip:
+            target.write(digest)
+
+            count += 1
+
+
+def rebuild(
+    directory: Path,
+    hashids: Iterable[str],
+    since: Optional[int] = None,
+    skip: Container[str] = (),
+) -> int:
+    """
+    Replace the index of a blobs directory by hashids
+
+    If since is given, hashids were gathered while other writers kept
+    storing objects, so digests appended to the log after that offset
+    are kept as well, except for those in skip.
+    """
+    index_path = get_index_path(directory)
+    temporary_path = index_path.with_name(index_path.name + ".tmp")
+
+    count = 0
+
+    with ExitStack() as stack:
+        source: Optional[BinaryIO] = None
+
+        try:
+            if since is not None and since <= get_log_size(directory):
+                source = stack.enter_context(open(index_path, "rb"))
+                source.seek(since)
+        except FileNotFoundError:
+            # there is no log to keep digests from
+            pass
+
+        with open(temporary_path, "wb") as f:
+            for hashid in hashids:
+                f.write(hashid_as_digest(hashid))
+
+                count += 1
+
+            if source is not None:
+                count += copy_log(source, f, skip)
+
+        os.replace(temporary_path, index_path)
+
+        if source is not None:
+            # writers which opened the old log before it was replaced
+            with open(index_path, "ab") as f:
+                count += copy_log(source, f, skip)
+
+    offset = get_log_size(directory)
+
+    store_filter(directory, build_filter(directory, offset), offset)
+
+    with _lock:
+        _indexes.pop(str(directory), None)
+
+    return count
+
+
+def remove(directory: Path, hashids: Container[str]) -> None:
+    """
+    Remove hashids from the index of a blobs directory
+
+    The log is rewritten without them, lookups keep using the index.
+    """
+    if get_index_path(directory).is_file():
+        rebuild(directory, [], 0, hashids)
+
+
+def discard(directory: Path) -> None:
+    """
+    Remove the index of a blobs directory
+
+    Lookups fall back to the blobs directory until it is rebuilt.
+    """
+    for item_path in [get_index_path(directory), get_filter_path(directory)]:
+        try:
+            item_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    with _lock:
+        _indexes.pop(str(directory), None)
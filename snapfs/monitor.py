@@ -0,0 +1,453 @@
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from snapfs import fs, repository, stage, transform
+from snapfs.datatypes import Changes
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+
+EVENT_STRUCT = struct.Struct("iIII")
+BUFFER_SIZE = 64 * 1024
+
+EXCLUDE = [".snapfs"]
+
+# above this number of dirty paths a full scan is cheaper
+LIMIT = 100000
+
+
+def join(parent: str, name: str) -> str:
+    if not parent or parent == ".":
+        return name
+
+    return parent + "/" + name
+
+
+# changes helpers
+def store_as_file(path: Path, changes: Changes) -> None:
+    fs.store_dict_as_file(path, serialize_as_dict(changes), override=True)
+
+
+def load_from_file(path: Path) -> Changes:
+    return deserialize_from_dict(fs.load_file_as_dict(path))
+
+
+def serialize_as_dict(changes: Changes) -> Dict[str, Any]:
+    return transform.as_dict(changes)
+
+
+def deserialize_from_dict(data: Dict[str, Any]) -> Changes:
+    return Changes(**data)
+
+
+def is_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+
+    if sys.platform.startswith("win"):  # pragma: no cover
+        # os.kill would terminate the process on windows
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def get_dirty_paths(changes: Changes) -> Optional[List[str]]:
+    """
+    Return dirty paths or None if a full scan is required
+    """
+    if changes.overflow or not is_alive(changes.pid):
+        return None
+
+    return sorted(changes.paths.keys())
+
+
+# journal helpers
+def get_journal_path(path: Path) -> Path:
+    return path.with_name(path.name + ".journal")
+
+
+def apply_entry(changes: Changes, data: Dict[str, Any]) -> None:
+    changes.generation += 1
+
+    if data["pid"] is not None:
+        changes.pid = data["pid"]
+
+    changes.paths.update({x: changes.generation for x in data["paths"]})
+
+    if data["overflow"] or len(changes.paths) > data["limit"]:
+        changes.paths = {}
+        changes.overflow = True
+        changes.overflow_generation = changes.generation
+
+
+def load_entries(path: Path) -> Changes:
+    # the caller holds the lock of the changes file
+    changes = load_from_file(path) if path.is_file() else Changes()
+
+    journal_path = get_journal_path(path)
+
+    if not journal_path.is_file():
+        return changes
+
+    with open(journal_path, "r") as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                # incomplete last line of an interrupted append
+                break
+
+            apply_entry(changes, data)
+
+    return changes
+
+
+def load_from_journal(path: Path) -> Changes:
+    with fs.locked(path):
+        return load_entries(path)
+
+
+def store_changes(path: Path, changes: Changes) -> None:
+    # the caller holds the lock of the changes file
+    store_as_file(path, changes)
+
+    journal_path = get_journal_path(path)
+
+    if journal_path.is_file():
+        os.remove(journal_path)
+
+
+def record(
+    path: Path,
+    paths: Set[str],
+    overflow: bool = False,
+    pid: Optional[int] = None,
+    limit: int = LIMIT,
+) -> None:
+    """
+    Record paths which changed as the next generation
+
+    Every call appends a line to the journal next to the changes file,
+    so polling costs the number of changed paths and not the number
+    of recorded ones. The journal is folded into the changes file once
+    it has grown by a fraction of it, the same way the stage does.
+    """
+    line = json.dumps(
+        {
+            "paths": sorted(paths),
+            "overflow": overflow,
+            "pid": pid,
+            "limit": limit,
+        }
+    )
+
+    with fs.locked(path):
+        if not path.is_file():
+            # readers look for the changes file first
+            store_as_file(path, Changes())
+
+        with open(get_journal_path(path), "a") as f:
+            f.write(line + "\n")
+
+            size = f.tell()
+
+        if stage.needs_compact(path, size):
+            store_changes(path, load_entries(path))
+
+
+def reset(path: Path, paths: List[str], generation: int) -> None:
+    """
+    Replace everything recorded up to generation with paths
+
+    This is called after a scan that started at generation has
+    compared the working directory, so only paths which still differ
+    and paths which changed during the scan need to remain.
+    """
+    with fs.locked(path):
+        changes = load_entries(path)
+
+        changes.paths = {
+            **{x: generation for x in paths},
+            **{
+                key: value
+                for key, value in changes.paths.items()
+                if value > generation
+            },
+        }
+
+        if changes.overflow_generation <= generation:
+            changes.overflow = False
+
+        store_changes(path, changes)
+
+
+class InotifyWatcher:
+    """
+    This class represents a watcher based on linux inotify
+    """
+
+    def __init__(self, path: Path, exclude: List[str] = EXCLUDE):
+        self.path = path
+        self.exclude = exclude
+        self.watches: Dict[int, str] = {}
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+
+        if self.fd < 0:
+            error = ctypes.get_errno()
+
+            raise OSError(error, os.strerror(error))
+
+        try:
+            self.add_watches("")
+        except OSError:
+            self.close()
+
+            raise
+
+    def add_watch(self, relative_path: str) -> None:
+        wd = self.libc.inotify_add_watch(
+            self.fd,
+            os.fsencode(str(self.path.joinpath(relative_path))),
+            WATCH_MASK,
+        )
+
+        if wd < 0:
+            error = ctypes.get_errno()
+
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                # directory vanished in the meantime
+                return
+
+            raise OSError(error, os.strerror(error))
+
+        self.watches[wd] = relative_path
+
+    def add_watches(self, relative_path: str) -> None:
+        self.add_watch(relative_path)
+
+        for root, directories, _ in os.walk(self.path.joinpath(relative_path)):
+            directories[:] = [x for x in directories if x not in self.exclude]
+
+            relative_root = Path(root).relative_to(self.path).as_posix()
+
+            for name in directories:
+                self.add_watch(join(relative_root, name))
+
+    def poll(self, timeout: float) -> Tuple[Set[str], bool]:
+        paths: Set[str] = set()
+        overflow = False
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+
+        while ready:
+            try:
+                data = os.read(self.fd, BUFFER_SIZE)
+            except BlockingIOError:
+                break
+
+            offset = 0
+
+            while offset < len(data):
+                wd, mask, _, length = EVENT_STRUCT.unpack_from(data, offset)
+
+                offset += EVENT_STRUCT.size
+
+                name = os.fsdecode(
+                    data[offset : offset + length].rstrip(b"\0")
+                )
+
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                elif wd not in self.watches:
+                    continue
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    if not self.watches[wd]:
+                        # the working directory itself is gone
+                        overflow = True
+                elif name and name not in self.exclude:
+                    relative_path = join(self.watches[wd], name)
+
+                    paths.add(relative_path)
+
+                    if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                        try:
+                            self.add_watches(relative_path)
+                        except OSError:
+                            # out of watches, only a full scan is safe
+                            overflow = True
+
+        return paths, overflow
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+
+        self.fd = -1
+
+
+class PollingWatcher:
+    """
+    This class represents a watcher which compares periodic scans
+    """
+
+    def __init__(self, path: Path, exclude: List[str] = EXCLUDE):
+        self.path = path
+        self.exclude = exclude
+        self.entries = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[int, int, int]]:
+        entries: Dict[str, Tuple[int, int, int]] = {}
+
+        for root, directories, names in os.walk(self.path):
+            directories[:] = [x for x in directories if x not in self.exclude]
+
+            relative_root = Path(root).relative_to(self.path).as_posix()
+
+            for name in names:
+                try:
+                    stat_result = os.lstat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+
+                entries[join(relative_root, name)] = (
+                    stat_result.st_mtime_ns,
+                    stat_result.st_size,
+                    stat_result.st_ino,
+                )
+
+        return entries
+
+    def poll(self, timeout: float) -> Tuple[Set[str], bool]:
+        time.sleep(timeout)
+
+        entries = self.scan()
+
+        paths = {
+            key
+            for key in {*entries.keys(), *self.entries.keys()}
+            if entries.get(key) != self.entries.get(key)
+        }
+
+        self.entries = entries
+
+        return paths, False
+
+    def close(self) -> None:
+        self.entries = {}
+
+
+def create_watcher(path: Path, polling: bool = False) -> Any:
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError):
+            # inotify is unavailable or out of watches
+            pass
+
+    return PollingWatcher(path)
+
+
+class Monitor:
+    """
+    This class represents a long-lived monitor of the working directory
+
+    Changed paths are recorded in the changes file of the repository
+    so that status and snapshot only need to compare those paths.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        interval: float = 1.0,
+        limit: int = LIMIT,
+        polling: bool = False,
+    ):
+        self.path = path
+        self.interval = interval
+        self.limit = limit
+        self.running = False
+        self.changes_path = repository.get_changes_path(path, False)
+
+        # start watching before recording the overflow so that
+        # no change between both steps can get lost
+        self.watcher = create_watcher(path, polling)
+
+        record(self.changes_path, set(), True, os.getpid(), limit)
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        paths, overflow = self.watcher.poll(
+            self.interval if timeout is None else timeout
+        )
+
+        if paths or overflow:
+            record(self.changes_path, paths, overflow, None, self.limit)
+
+        return paths
+
+    def run(self) -> None:
+        self.running = True
+
+        try:
+            while self.running:
+                self.poll()
+        finally:
+            self.close()
+
+    def stop(self) -> None:
+        self.running = False
+
+    def close(self) -> None:
+        self.watcher.close()
+
+        record(self.changes_path, set(), True, 0, self.limit)
@@ -0,0 +1,598 @@
+import codecs
+import math
+
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Deque, Iterable, Iterator, List, Optional, Tuple
+
+from snapfs import delta
+
+
+# same heuristic as git, a nul byte in the first block marks binary data
+BINARY_CHECK_SIZE = 8000
+
+# longest piece of a line ever held in memory, longer lines are read,
+# hashed and compared in pieces of this size
+LINE_SIZE = 64 * 1024
+
+# diagonals searched for an optimal split before settling for the
+# furthest reaching one, grows with the square root of the range sizes
+MAX_COST_MIN = 256
+
+EQUAL = "equal"
+INSERT = "insert"
+DELETE = "delete"
+REPLACE = "replace"
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+class LineIndex:
+    """
+    This class represents the lines of a seekable stream
+
+    Only the offset and a hash of every line is kept in memory, so
+    memory grows with the number of lines but not with their length.
+    Line contents are read back from the stream when needed.
+    """
+
+    def __init__(self, stream: BinaryIO, offset: int = 0):
+        self.stream = stream
+        self.offsets = array("q")
+        self.hashes = array("q")
+
+        stream.seek(offset)
+
+        line_hash: Optional[int] = None
+
+        for chunk in iterate_chunks(stream):
+            if line_hash is None:
+                self.offsets.append(offset)
+
+                line_hash = hash(chunk)
+            else:
+                line_hash = hash((line_hash, chunk))
+
+            offset += len(chunk)
+
+            if chunk.endswith(b"\n"):
+                self.hashes.append(line_hash)
+
+                line_hash = None
+
+        if line_hash is not None:
+            # last line without newline
+            self.hashes.append(line_hash)
+
+        self.offsets.append(offset)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def iterate_line(self, index: int) -> Iterator[bytes]:
+        position = self.offsets[index]
+        end = self.offsets[index + 1]
+
+        while position < end:
+            # seek every time, the stream may be read elsewhere meanwhile
+            self.stream.seek(position)
+
+            chunk = self.stream.read(min(LINE_SIZE, end - position))
+
+            if not chunk:
+                break
+
+            position += len(chunk)
+
+            yield chunk
+
+    def is_equal(
+        self, index: int, other: "LineIndex", other_index: int
+    ) -> bool:
+        # equal hashes are confirmed on the contents
+        if self.hashes[index] != other.hashes[other_index]:
+            return False
+
+        length = self.offsets[index + 1] - self.offsets[index]
+
+        if length != other.offsets[other_index + 1] - other.offsets[
+            other_index
+        ]:
+            return False
+
+        return all(
+            x == y
+            for x, y in zip(
+                self.iterate_line(index), other.iterate_line(other_index)
+            )
+        )
+
+
+def iterate_chunks(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Yield the lines of stream, lines above LINE_SIZE in several chunks
+    """
+    while True:
+        chunk = stream.readline(LINE_SIZE)
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def is_binary(stream: BinaryIO) -> bool:
+    stream.seek(0)
+
+    return b"\0" in stream.read(BINARY_CHECK_SIZE)
+
+
+def find_common_prefix(
+    old: BinaryIO, new: BinaryIO, context: int
+) -> Tuple[int, int]:
+    """
+    Return offset and number of the first differing line minus context
+
+    Both streams are read line by line in lockstep, so identical
+    leading parts, like the history of an appended log, never get indexed.
+    """
+    old.seek(0)
+    new.seek(0)
+
+    offset = 0
+    lines = 0
+    offsets: Deque[Tuple[int, int]] = deque([(0, 0)], context + 1)
+
+    for old_chunk, new_chunk in zip(
+        iterate_chunks(old), iterate_chunks(new)
+    ):
+        if old_chunk != new_chunk:
+            break
+
+        offset += len(old_chunk)
+
+        if old_chunk.endswith(b"\n"):
+            lines += 1
+
+            offsets.append((offset, lines))
+
+    return offsets[0]
+
+
+def find_middle_snake(
+    a: array,
+    a_lo: int,
+    a_hi: int,
+    b: array,
+    b_lo: int,
+    b_hi: int,
+    max_cost: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Return a point on an optimal edit path through both ranges
+
+    This searches forward and backward at the same time and keeps only
+    two diagonal vectors of at most 2 * max_cost + 3 entries.
+    After max_cost diagonals the search settles for the furthest point
+    either direction has reached, like xdiff does, which bounds the
+    time per split at the cost of a possibly longer diff.
+    Returns -1, -1 when the ranges have nothing in common.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+
+    if max_cost is None:
+        max_cost = max(MAX_COST_MIN, int(math.sqrt(n + m)))
+
+    max_d = (n + m + 1) // 2
+
+    # diagonals beyond the cost limit are never reached, so the
+    # vectors do not grow with the range sizes
+    bound = min(max_d, max_cost)
+    offset = bound + 1
+    length = 2 * bound + 3
+
+    forward = [-1] * length
+    backward = [-1] * length
+
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+
+    delta = n - m
+    front = delta % 2 != 0
+
+    k1_start = k1_end = k2_start = k2_end = 0
+
+    for d in range(min(max_d, max_cost)):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = offset + k1
+
+            if k1 == -d or (
+                k1 != d and forward[k1_offset - 1] < forward[k1_offset + 1]
+            ):
+                x1 = forward[k1_offset + 1]
+            else:
+                x1 = forward[k1_offset - 1] + 1
+
+            y1 = x1 - k1
+
+            while x1 < n and y1 < m and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+
+            forward[k1_offset] = x1
+
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif front:
+                k2_offset = offset + delta - k1
+
+                if 0 <= k2_offset < length and backward[k2_offset] != -1:
+                    if x1 >= n - backward[k2_offset]:
+                        return x1, y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = offset + k2
+
+            if k2 == -d or (
+                k2 != d and backward[k2_offset - 1] < backward[k2_offset + 1]
+            ):
+                x2 = backward[k2_offset + 1]
+            else:
+                x2 = backward[k2_offset - 1] + 1
+
+            y2 = x2 - k2
+
+            while (
+                x2 < n
+                and y2 < m
+                and a[a_hi - x2 - 1] == b[b_hi - y2 - 1]
+            ):
+                x2 += 1
+                y2 += 1
+
+            backward[k2_offset] = x2
+
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not front:
+                k1_offset = offset + delta - k2
+
+                if 0 <= k1_offset < length and forward[k1_offset] != -1:
+                    x1 = forward[k1_offset]
+                    y1 = offset + x1 - k1_offset
+
+                    if x1 >= n - x2:
+                        return x1, y1
+
+    if max_d <= max_cost:
+        return -1, -1
+
+    reach, x, y = 0, -1, -1
+
+    for k in range(-max_cost, max_cost + 1):
+        x1 = forward[offset + k]
+        y1 = x1 - k
+
+        if 0 <= x1 <= n and 0 <= y1 <= m and x1 + y1 > reach:
+            reach, x, y = x1 + y1, x1, y1
+
+        x2 = backward[offset + k]
+        y2 = x2 - k
+
+        if 0 <= x2 <= n and 0 <= y2 <= m and x2 + y2 > reach:
+            reach, x, y = x2 + y2, n - x2, m - y2
+
+    return x, y
+
+
+def is_disjoint(
+    a: array, a_lo: int, a_hi: int, b: array, b_lo: int, b_hi: int
+) -> bool:
+    # only the smaller range is held as set, the larger one is streamed
+    if a_hi - a_lo > b_hi - b_lo:
+        a, a_lo, a_hi, b, b_lo, b_hi = b, b_lo, b_hi, a, a_lo, a_hi
+
+    hashes = set(a[i] for i in range(a_lo, a_hi))
+
+    return not any(b[i] in hashes for i in range(b_lo, b_hi))
+
+
+def iterate_edits(a: array, b: array) -> Iterator[Opcode]:
+    """
+    Yield equal and changed ranges of a and b in order
+
+    Ranges are split at middle snakes, Hirschberg style, with an
+    explicit stack instead of recursion.
+    """
+    stack: List[Opcode] = [("diff", 0, len(a), 0, len(b))]
+
+    while stack:
+        tag, a_lo, a_hi, b_lo, b_hi = stack.pop()
+
+        if tag != "diff":
+            yield tag, a_lo, a_hi, b_lo, b_hi
+
+            continue
+
+        prefix = 0
+
+        while (
+            a_lo + prefix < a_hi
+            and b_lo + prefix < b_hi
+            and a[a_lo + prefix] == b[b_lo + prefix]
+        ):
+            prefix += 1
+
+        suffix = 0
+
+        while (
+            a_lo + prefix < a_hi - suffix
+            and b_lo + prefix < b_hi - suffix
+            and a[a_hi - suffix - 1] == b[b_hi - suffix - 1]
+        ):
+            suffix += 1
+
+        if suffix:
+            stack.append(
+                (EQUAL, a_hi - suffix, a_hi, b_hi - suffix, b_hi)
+            )
+
+        middle = (a_lo + prefix, a_hi - suffix, b_lo + prefix, b_hi - suffix)
+
+        if middle[0] == middle[1] and middle[2] == middle[3]:
+            pass
+        elif middle[0] == middle[1]:
+            stack.append((INSERT, *middle))
+        elif middle[2] == middle[3]:
+            stack.append((DELETE, *middle))
+        elif is_disjoint(a, middle[0], middle[1], b, *middle[2:]):
+            # no line in common, searching for a snake is pointless
+            stack.append((REPLACE, *middle))
+        else:
+            x, y = find_middle_snake(a, middle[0], middle[1], b, *middle[2:])
+
+            if x <= 0 and y <= 0 or (x, y) == (
+                middle[1] - middle[0],
+                middle[3] - middle[2],
+            ):
+                # nothing in common or no split which makes progress
+                stack.append((REPLACE, *middle))
+            else:
+                x += middle[0]
+                y += middle[2]
+
+                stack.append(("diff", x, middle[1], y, middle[3]))
+                stack.append(("diff", middle[0], x, middle[2], y))
+
+        if prefix:
+            yield EQUAL, a_lo, a_lo + prefix, b_lo, b_lo + prefix
+
+
+def verify_edits(
+    edits: Iterable[Opcode], old_index: LineIndex, new_index: LineIndex
+) -> Iterator[Opcode]:
+    """
+    Split equal ranges at lines whose hashes collide but contents differ
+    """
+    for tag, a_lo, a_hi, b_lo, b_hi in edits:
+        if tag != EQUAL:
+            yield tag, a_lo, a_hi, b_lo, b_hi
+
+            continue
+
+        start = 0
+
+        for i in range(a_hi - a_lo):
+            if not old_index.is_equal(a_lo + i, new_index, b_lo + i):
+                if i > start:
+                    yield EQUAL, a_lo + start, a_lo + i, b_lo + start, b_lo + i
+
+                yield REPLACE, a_lo + i, a_lo + i + 1, b_lo + i, b_lo + i + 1
+
+                start = i + 1
+
+        if a_hi - a_lo > start:
+            yield EQUAL, a_lo + start, a_hi, b_lo + start, b_hi
+
+
+def merge_edits(edits: Iterable[Opcode]) -> Iterator[Opcode]:
+    """
+    Yield opcodes in the format of difflib with adjacent ranges merged
+    """
+    current = None
+
+    for tag, a_lo, a_hi, b_lo, b_hi in edits:
+        if current is None:
+            current = (tag, a_lo, a_hi, b_lo, b_hi)
+        elif (tag == EQUAL) == (current[0] == EQUAL):
+            current = (
+                tag if tag == current[0] else REPLACE,
+                current[1],
+                a_hi,
+                current[3],
+                b_hi,
+            )
+        else:
+            yield current
+
+            current = (tag, a_lo, a_hi, b_lo, b_hi)
+
+    if current is not None:
+        yield current
+
+
+def iterate_opcodes(a: array, b: array) -> Iterator[Opcode]:
+    return merge_edits(iterate_edits(a, b))
+
+
+def group_opcodes(
+    opcodes: Iterable[Opcode], context: int = 3
+) -> Iterator[List[Opcode]]:
+    """
+    Yield groups of changes with up to context equal lines around them
+    """
+    group: List[Opcode] = []
+
+    for tag, a_lo, a_hi, b_lo, b_hi in opcodes:
+        if tag == EQUAL:
+            if not group:
+                group.append(
+                    (
+                        tag,
+                        max(a_lo, a_hi - context),
+                        a_hi,
+                        max(b_lo, b_hi - context),
+                        b_hi,
+                    )
+                )
+
+                continue
+
+            if a_hi - a_lo > 2 * context:
+                group.append(
+                    (tag, a_lo, a_lo + context, b_lo, b_lo + context)
+                )
+
+                yield group
+
+                group = [(tag, a_hi - context, a_hi, b_hi - context, b_hi)]
+
+                continue
+
+        group.append((tag, a_lo, a_hi, b_lo, b_hi))
+
+    if any(x[0] != EQUAL for x in group):
+        tag, a_lo, a_hi, b_lo, b_hi = group[-1]
+
+        if tag == EQUAL:
+            group[-1] = (
+                tag,
+                a_lo,
+                min(a_hi, a_lo + context),
+                b_lo,
+                min(b_hi, b_lo + context),
+            )
+
+        yield group
+
+
+def format_range(start: int, stop: int) -> str:
+    # same range format as difflib.unified_diff
+    beginning = start + 1
+    length = stop - start
+
+    if length == 1:
+        return "{}".format(beginning)
+
+    if not length:
+        beginning -= 1
+
+    return "{},{}".format(beginning, length)
+
+
+def format_line(prefix: str, chunks: Iterable[bytes]) -> Iterator[str]:
+    # characters split between chunks are decoded as a whole
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    text = prefix
+
+    for index, chunk in enumerate(chunks):
+        if index:
+            # long lines are yielded in pieces
+            yield text
+
+            text = ""
+
+        text += decoder.decode(chunk)
+
+    text += decoder.decode(b"", final=True)
+
+    if text.endswith("\n"):
+        yield text
+    else:
+        yield text + "\n"
+        yield "\\ No newline at end of file\n"
+
+
+def compare_streams(
+    old: BinaryIO,
+    new: BinaryIO,
+    old_name: str = "a",
+    new_name: str = "b",
+    context: int = 3,
+) -> Iterator[str]:
+    """
+    Yield the unified diff of two seekable binary streams
+    """
+    if is_binary(old) or is_binary(new):
+        yield "Binary files {} and {} differ\n".format(old_name, new_name)
+
+        return
+
+    offset, first_line = find_common_prefix(old, new, context)
+
+    old_index = LineIndex(old, offset)
+    new_index = LineIndex(new, offset)
+
+    header = False
+
+    edits = iterate_edits(old_index.hashes, new_index.hashes)
+
+    for group in group_opcodes(
+        merge_edits(verify_edits(edits, old_index, new_index)), context
+    ):
+        if not header:
+            yield "--- {}\n".format(old_name)
+            yield "+++ {}\n".format(new_name)
+
+            header = True
+
+        yield "@@ -{} +{} @@\n".format(
+            format_range(first_line + group[0][1], first_line + group[-1][2]),
+            format_range(first_line + group[0][3], first_line + group[-1][4]),
+        )
+
+        for tag, a_lo, a_hi, b_lo, b_hi in group:
+            if tag == EQUAL:
+                for i in range(a_lo, a_hi):
+                    yield from format_line(" ", old_index.iterate_line(i))
+
+                continue
+
+            for i in range(a_lo, a_hi):
+                yield from format_line("-", old_index.iterate_line(i))
+
+            for i in range(b_lo, b_hi):
+                yield from format_line("+", new_index.iterate_line(i))
+
+
+def compare_files(
+    old_path: Path,
+    new_path: Path,
+    old_name: str = "a",
+    new_name: str = "b",
+    context: int = 3,
+) -> Iterator[str]:
+    with open(old_path, "rb") as old, open(new_path, "rb") as new:
+        yield from compare_streams(old, new, old_name, new_name, context)
+
+
+def compare_blobs(
+    directory: Path,
+    old_hashid: str,
+    new_hashid: str,
+    old_name: str = "a",
+    new_name: str = "b",
+    context: int = 3,
+) -> Iterator[str]:
+    # objects stored as delta are resolved in memory
+    with delta.open_blob(directory, old_hashid) as old, delta.open_blob(
+        directory, new_hashid
+    ) as new:
+        yield from compare_streams(old, new, old_name, new_name, context)
@@ -0,0 +1,143 @@
+import io
+import mmap
+import os
+
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from snapfs import delta, repository
+
+
+class Reader(io.RawIOBase):
+    """
+    This class represents a seekable read only view of stored contents
+
+    Loose objects are mapped into memory, so reads and range reads
+    copy only the requested bytes and never the whole object. Objects
+    stored as delta are resolved once and then served from memory.
+    """
+
+    def __init__(self, buffer: Any, close_callback: Callable[[], None]):
+        super().__init__()
+
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.position = 0
+        self.close_callback = close_callback
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b: Any) -> int:
+        data = self.pread(len(b), self.position)
+
+        b[: len(data)] = data
+
+        self.position += len(data)
+
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError("Invalid whence '{}'".format(whence))
+
+        if position < 0:
+            raise ValueError("Negative seek position '{}'".format(position))
+
+        self.position = position
+
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def pread(self, size: int, offset: int) -> bytes:
+        """
+        Return up to size bytes at offset without moving the position
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed reader")
+
+        if offset < 0:
+            raise ValueError("Negative read offset '{}'".format(offset))
+
+        if offset >= self.size or size <= 0:
+            return b""
+
+        return bytes(self.buffer[offset : min(offset + size, self.size)])
+
+    def close(self) -> None:
+        if not self.closed:
+            self.close_callback()
+
+        super().close()
+
+
+def open_path(blob_path: Path) -> Reader:
+    f = open(blob_path, "rb")
+
+    try:
+        size = os.fstat(f.fileno()).st_size
+
+        if not size:
+            # empty files can not be mapped
+            f.close()
+
+            return Reader(b"", lambda: None)
+
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except BaseException:
+        f.close()
+
+        raise
+
+    def close() -> None:
+        mapping.close()
+        f.close()
+
+    return Reader(mapping, close)
+
+
+def open_blob(
+    blobs_path: Path, hashid: str, cache: Optional[delta.Cache] = None
+) -> Reader:
+    blob_path = delta.get_blob_path(blobs_path, hashid)
+
+    if not delta.is_delta_path(blob_path):
+        return open_path(blob_path)
+
+    return Reader(delta.load_blob(blobs_path, hashid, cache), lambda: None)
+
+
+def open_file(path: Path, commit_hashid: str, file_path: str) -> Reader:
+    """
+    Open the file at a relative path of a commit for reading
+
+    Only the tree objects along file_path are loaded.
+    """
+    entry = repository.get_commit_entry(path, commit_hashid, file_path)
+
+    if entry is None or entry[0] != "files":
+        raise FileNotFoundError(
+            "Unable to find file '{}' in commit '{}'".format(
+                file_path, commit_hashid
+            )
+        )
+
+    return open_blob(repository.get_blobs_path(path), entry[1])
+
+
+def read_range(
+    blobs_path: Path, hashid: str, offset: int, size: int
+) -> bytes:
+    with open_blob(blobs_path, hashid) as reader:
+        return reader.pread(size, offset)
@@ -21,3 +21,11 @@ def serialize_as_dict(reference: Reference) -> Dict[str, Any]:
             reference.__class__.__name__
         )
     )
+
+
+def deserialize_from_dict(name: str, data: Dict[str, Any]) -> Reference:
+    # names are relative to the references directory
+    if name.startswith("tags/"):
+        return tag.deserialize_from_dict(data)
+
+    return branch.deserialize_from_dict(data)
@@ -1,10 +1,12 @@
 import os
 
 from pathlib import Path
-from typing import Callable, List, Dict, Optional, Union
+from typing import Callable, Iterable, List, Dict, Optional, Tuple, Union
 
 from snapfs import head, branch, tag, transform, commit, stage, fs
+from snapfs import differences, directory, graph, index, store
 from snapfs.datatypes import Commit, Head, Tag, Branch, Reference, Stage
+from snapfs.datatypes import Differences, File, Format, Layout
 
 
 class DirectoryNotFoundError(FileNotFoundError):
@@ -74,6 +76,35 @@ def get_stage_path(path: Path, test: bool = True) -> Path:
     return stage_path
 
 
+def get_stage_journal_path(path: Path, test: bool = True) -> Path:
+    stage_journal_path = get_repository_path(path, test).joinpath(
+        "stage.journal"
+    )
+
+    if test and not stage_journal_path.is_file():
+        raise FileNotFoundError(stage_journal_path)
+
+    return stage_journal_path
+
+
+def get_changes_path(path: Path, test: bool = True) -> Path:
+    changes_path = get_repository_path(path, test).joinpath("changes")
+
+    if test and not changes_path.is_file():
+        raise FileNotFoundError(changes_path)
+
+    return changes_path
+
+
+def get_verification_path(path: Path, test: bool = True) -> Path:
+    verification_path = get_repository_path(path, test).joinpath("fsck")
+
+    if test and not verification_path.is_file():
+        raise FileNotFoundError(verification_path)
+
+    return verification_path
+
+
 def get_head_path(path: Path, test: bool = True) -> Path:
     head_path = get_repository_path(path, test).joinpath("HEAD")
 
@@ -102,9 +133,12 @@ def get_tag_path(path: Path, name: str, test: bool = True) -> Path:
 
 
 def get_commit_path(path: Path, commit_hashid: str, test: bool = True) -> Path:
-    commit_path = get_blobs_path(path, test).joinpath(
-        transform.hashid_as_path(commit_hashid)
-    )
+    blobs_path = get_blobs_path(path, test)
+
+    commit_path = fs.find_blob(blobs_path, commit_hashid)
+
+    if commit_path is None:
+        commit_path = fs.get_blob_path(blobs_path, commit_hashid)
 
     if test and not commit_path.is_file():
         raise FileNotFoundError(commit_path)
@@ -129,6 +163,127 @@ def get_tag(path: Path, name: str) -> Tag:
     return tag.load_from_file(get_tag_path(path, name))
 
 
+def get_branches(path: Path) -> Dict[str, Branch]:
+    branches_path = get_branches_path(path)
+
+    return {
+        name: get_branch(path, name)
+        for name in sorted(os.listdir(branches_path))
+    }
+
+
+def get_tags(path: Path) -> Dict[str, Tag]:
+    tags_path = get_tags_path(path)
+
+    return {
+        name: get_tag(path, name) for name in sorted(os.listdir(tags_path))
+    }
+
+
+def get_references(
+    path: Path, names: Optional[Iterable[str]] = None
+) -> Dict[str, Reference]:
+    """
+    Return branches and tags by name relative to the references directory
+
+    All branches and tags are returned unless names are given.
+    """
+    references: Dict[str, Reference] = {
+        **{
+            "branches/{}".format(key): value
+            for key, value in get_branches(path).items()
+        },
+        **{
+            "tags/{}".format(key): value
+            for key, value in get_tags(path).items()
+        },
+    }
+
+    if names is None:
+        return references
+
+    names = list(names)
+
+    missing_names = [x for x in names if x not in references]
+
+    if missing_names:
+        raise NoReferenceError(
+            "Unable to get references '{}'".format("', '".join(missing_names))
+        )
+
+    return {x: references[x] for x in names}
+
+
+def is_reference_name(name: str) -> bool:
+    """
+    Return whether name is a valid name relative to the references directory
+
+    Branches and tags are single files, so everything after the kind
+    must be one plain path component.
+    """
+    kind, _, reference_name = name.partition("/")
+
+    return (
+        kind in ["branches", "tags"]
+        and reference_name not in ["", ".", ".."]
+        and not any(x in reference_name for x in ["/", "\\", "\0"])
+    )
+
+
+def get_diverged_names(
+    path: Path,
+    references: Dict[str, Reference],
+    blobs_path: Optional[Path] = None,
+) -> List[str]:
+    """
+    Return the names of references which would not fast forward
+
+    Storing a reference fast forwards if its stored commit is a
+    previous commit of the new one, otherwise commits are lost. The
+    new commits are looked up in blobs_path, which defaults to the
+    blobs directory of path.
+    """
+    stored = get_references(path)
+
+    if blobs_path is None:
+        blobs_path = get_blobs_path(path)
+
+    return [
+        key
+        for key, value in references.items()
+        if key in stored
+        and stored[key].commit_hashid
+        and not (
+            value.commit_hashid
+            and graph.is_ancestor(
+                blobs_path, stored[key].commit_hashid, value.commit_hashid
+            )
+        )
+    ]
+
+
+def store_reference(
+    path: Path, name: str, reference_instance: Reference
+) -> None:
+    if not is_reference_name(name):
+        raise NoReferenceError("Invalid reference name '{}'".format(name))
+
+    kind, _, reference_name = name.partition("/")
+
+    if kind == "branches" and isinstance(reference_instance, Branch):
+        branch.store_as_file(
+            get_branch_path(path, reference_name, False), reference_instance
+        )
+    elif kind == "tags" and isinstance(reference_instance, Tag):
+        tag.store_as_file(
+            get_tag_path(path, reference_name, False), reference_instance
+        )
+    else:
+        raise NoReferenceError(
+            "Unable to store reference '{}'".format(name)
+        )
+
+
 def get_reference(path: Path) -> Reference:
     head_instance = get_head(path)
 
@@ -145,18 +300,101 @@ def get_commit(path: Path, commit_hashid: str) -> Commit:
     return commit.load_from_blob(get_commit_path(path, commit_hashid))
 
 
+def get_commit_entry(
+    path: Path, commit_hashid: str, item_path: str
+) -> Optional[Tuple[str, str]]:
+    """
+    Return kind and hashid of the entry at a relative path of a commit
+
+    Only the tree objects along item_path are loaded.
+    """
+    return get_commit_entries(path, commit_hashid, [item_path])[item_path]
+
+
+def get_commit_entries(
+    path: Path, commit_hashid: str, paths: List[str]
+) -> Dict[str, Optional[Tuple[str, str]]]:
+    """
+    Return kind and hashid of the entries at many paths of a commit
+
+    Tree objects shared by several paths are loaded once.
+    """
+    tree_hashid = get_commit(path, commit_hashid).tree_hashid
+
+    return directory.get_blob_entries(get_blobs_path(path), tree_hashid, paths)
+
+
 def get_latest_commit(path: Path) -> Commit:
     reference_instance = get_reference(path)
 
     return get_commit(path, reference_instance.commit_hashid)
 
 
+def compare_commits(
+    path: Path, old_commit_hashid: str, new_commit_hashid: str
+) -> Differences:
+    return differences.detect_renames(
+        directory.compare_blobs(
+            get_blobs_path(path),
+            get_commit(path, old_commit_hashid).tree_hashid,
+            get_commit(path, new_commit_hashid).tree_hashid,
+        ),
+        get_algorithm(path),
+    )
+
+
 def get_stage(path: Path) -> Stage:
-    return stage.load_from_file(get_stage_path(path))
+    return stage.load_from_journal(
+        get_stage_path(path), get_stage_journal_path(path, False)
+    )
 
 
 def store_stage(path: Path, stage_instance: Stage) -> None:
-    stage.store_as_file(get_stage_path(path, False), stage_instance)
+    stage_journal_path = get_stage_journal_path(path, False)
+
+    with fs.locked(stage_journal_path):
+        stage.store_as_file(get_stage_path(path, False), stage_instance)
+
+        stage.clear_journal(stage_journal_path)
+
+
+def stage_file(
+    path: Path,
+    operation: str,
+    file_instance: File,
+    stat_result: Optional[os.stat_result] = None,
+) -> None:
+    stage_path = get_stage_path(path)
+    stage_journal_path = get_stage_journal_path(path, False)
+
+    size = stage.append_to_journal(
+        stage_journal_path, operation, file_instance, stat_result
+    )
+
+    if stage.needs_compact(stage_path, size):
+        stage.compact(stage_path, stage_journal_path)
+
+
+def compact_stage(path: Path) -> None:
+    stage.compact(get_stage_path(path), get_stage_journal_path(path, False))
+
+
+def migrate_layout(path: Path, parts: int, length: int) -> int:
+    return fs.migrate_layout(get_blobs_path(path), Layout(parts, length))
+
+
+def get_algorithm(path: Path) -> str:
+    return fs.get_algorithm(get_blobs_path(path))
+
+
+def rebuild_index(path: Path) -> int:
+    blobs_path = get_blobs_path(path)
+
+    return index.rebuild(blobs_path, store.LooseStore(blobs_path).iterate())
+
+
+def get_store(path: Path) -> store.LooseStore:
+    return store.LooseStore(get_blobs_path(path))
 
 
 # repository functions
@@ -189,7 +427,7 @@ def is_initialized(path: Path) -> bool:
         return False
 
 
-def initialize(path: Path) -> None:
+def initialize(path: Path, algorithm: str = transform.SHA256) -> None:
     if not is_initialized(path):
         # create necessary directories
         transform.apply(
@@ -199,6 +437,15 @@ def initialize(path: Path) -> None:
 
         # create necessary files
 
+        # record the layout and format of stored objects
+        fs.store_layouts(get_blobs_path(path), Layout())
+        fs.store_format(
+            get_blobs_path(path), Format(fs.FORMAT_VERSION, algorithm)
+        )
+
+        # start an empty index of stored objects
+        index.rebuild(get_blobs_path(path), [])
+
         # create new stage
         stage_instance = Stage()
 
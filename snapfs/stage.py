@@ -1,10 +1,30 @@
+import json
+import os
+
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from snapfs import fs, transform, file
 from snapfs.datatypes import Stage, File
 
 
+ADDED = "added"
+UPDATED = "updated"
+REMOVED = "removed"
+UNSTAGED = "unstaged"
+
+OPERATIONS = [ADDED, UPDATED, REMOVED, UNSTAGED]
+
+# journal size in bytes below which it is never folded into the stage
+COMPACT_SIZE = 256 * 1024
+
+# journal size relative to the stage file above which it is folded in,
+# so the stage is rewritten less often the larger it grows
+COMPACT_RATIO = 0.5
+
+Entry = Tuple[str, File, Optional[List[int]]]
+
+
 def store_as_file(path: Path, stage: Stage) -> None:
     fs.store_dict_as_file(path, serialize_as_dict(stage), override=True)
 
@@ -29,7 +49,8 @@ def serialize_as_dict(stage: Stage) -> Dict[str, Any]:
 def deserialize_from_dict(data: Dict[str, Any]) -> Stage:
     return Stage(
         **{
-            **data,
+            # stats are only written by compact
+            **{key: value for key, value in data.items() if key != "stats"},
             "added_files": [
                 file.deserialize_from_dict(x) for x in data["added_files"]
             ],
@@ -45,3 +66,199 @@ def deserialize_from_dict(data: Dict[str, Any]) -> Stage:
 
 def load_from_file(path: Path) -> Stage:
     return deserialize_from_dict(fs.load_file_as_dict(path))
+
+
+# journal helpers
+def get_stat(file_path: Path) -> Optional[List[int]]:
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+
+    return [stat_result.st_size, stat_result.st_mtime_ns]
+
+
+def serialize_entry_as_dict(
+    operation: str,
+    file_instance: File,
+    stat_result: Optional[os.stat_result] = None,
+) -> Dict[str, Any]:
+    stat_list = None
+
+    if file_instance.hashid and not file_instance.is_blob:
+        # remember when the hashid was computed so that it can
+        # be dropped once the file changed
+        if stat_result is None:
+            stat_list = get_stat(file_instance.path)
+        else:
+            stat_list = [stat_result.st_size, stat_result.st_mtime_ns]
+
+    return {
+        "operation": operation,
+        "file": file.serialize_as_dict(file_instance),
+        "stat": stat_list,
+    }
+
+
+def deserialize_entry_from_dict(data: Dict[str, Any]) -> Entry:
+    return (
+        data["operation"],
+        file.deserialize_from_dict(data["file"]),
+        data.get("stat"),
+    )
+
+
+def append_to_journal(
+    path: Path,
+    operation: str,
+    file_instance: File,
+    stat_result: Optional[os.stat_result] = None,
+) -> int:
+    """
+    Append a single change to the journal and return its size
+
+    Nothing which has been written before is read or rewritten,
+    so staging a file costs the same no matter the size of the stage.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(
+            "operation must be one of {} but is '{}'".format(
+                OPERATIONS, operation
+            )
+        )
+
+    line = json.dumps(
+        serialize_entry_as_dict(operation, file_instance, stat_result),
+        sort_keys=True,
+    )
+
+    with fs.locked(path):
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+            return f.tell()
+
+
+def iterate_journal(path: Path) -> Iterator[Entry]:
+    if not path.is_file():
+        return
+
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                # incomplete last line of an interrupted append
+                break
+
+            yield deserialize_entry_from_dict(data)
+
+
+def get_entries(
+    stage: Stage, stats: Dict[str, List[int]]
+) -> Dict[str, Entry]:
+    entries: Dict[str, Entry] = {}
+
+    for operation, files in [
+        (ADDED, stage.added_files),
+        (UPDATED, stage.updated_files),
+        (REMOVED, stage.removed_files),
+    ]:
+        for file_instance in files:
+            key = str(file_instance.path)
+
+            entries[key] = (operation, file_instance, stats.get(key))
+
+    return entries
+
+
+def apply_entries(entries: Dict[str, Entry]) -> Stage:
+    stage = Stage()
+
+    files = {
+        ADDED: stage.added_files,
+        UPDATED: stage.updated_files,
+        REMOVED: stage.removed_files,
+    }
+
+    for operation, file_instance, stat_list in entries.values():
+        if file_instance.hashid and not file_instance.is_blob:
+            if stat_list != get_stat(file_instance.path):
+                # file changed since it has been hashed
+                file_instance = File(file_instance.path)
+
+        files[operation].append(file_instance)
+
+    return stage
+
+
+def load_entries(stage_path: Path, journal_path: Path) -> Dict[str, Entry]:
+    data = fs.load_file_as_dict(stage_path)
+
+    entries = get_entries(deserialize_from_dict(data), data.get("stats", {}))
+
+    # later entries replace earlier entries for the same path
+    for operation, file_instance, stat_list in iterate_journal(journal_path):
+        key = str(file_instance.path)
+
+        entries.pop(key, None)
+
+        if operation != UNSTAGED:
+            entries[key] = (operation, file_instance, stat_list)
+
+    return entries
+
+
+def load_from_journal(stage_path: Path, journal_path: Path) -> Stage:
+    with fs.locked(journal_path):
+        entries = load_entries(stage_path, journal_path)
+
+    return apply_entries(entries)
+
+
+def clear_journal(path: Path) -> None:
+    if path.is_file():
+        os.remove(path)
+
+
+def needs_compact(stage_path: Path, journal_size: int) -> bool:
+    """
+    Return whether a journal of journal_size should be folded in
+
+    Rewriting the stage costs its size, waiting until the journal has
+    grown by a fraction of it keeps staging amortized constant time.
+    """
+    if journal_size <= COMPACT_SIZE:
+        return False
+
+    try:
+        stage_size = os.stat(stage_path).st_size
+    except FileNotFoundError:
+        return True
+
+    return journal_size > COMPACT_RATIO * stage_size
+
+
+def compact(stage_path: Path, journal_path: Path) -> None:
+    """
+    Fold the journal into the stage file
+
+    The journal is removed only after the stage file has been written,
+    replaying it again after an interruption yields the same stage.
+    The journal lock is held throughout, so no entry appended by
+    another process is lost between reading and removing the journal.
+    """
+    with fs.locked(journal_path):
+        entries = load_entries(stage_path, journal_path)
+
+        data = serialize_as_dict(apply_entries(entries))
+
+        data["stats"] = {
+            key: stat_list
+            for key, (_, _, stat_list) in entries.items()
+            if stat_list is not None
+        }
+
+        fs.store_dict_as_file(stage_path, data, override=True)
+
+        clear_journal(journal_path)
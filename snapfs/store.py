@@ -0,0 +1,307 @@
+import sqlite3
+import threading
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from snapfs import delta, fs, index, transform
+from snapfs.hashidset import is_hashid
+
+
+# largest number of parameters in a single sqlite statement
+SQLITE_BATCH_SIZE = 500
+
+
+class Store(ABC):
+    """
+    This class represents a store of objects addressed by their hashid
+
+    Backends implement the batch operations, single object operations
+    and helpers for dicts and files are built on top of them. A store
+    can be passed wherever the fs blob functions expect a directory.
+    """
+
+    algorithm = transform.SHA256
+
+    @abstractmethod
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        pass
+
+    @abstractmethod
+    def get_many(self, hashids: Iterable[str]) -> List[bytes]:
+        pass
+
+    @abstractmethod
+    def exists_many(self, hashids: Iterable[str]) -> List[bool]:
+        pass
+
+    @abstractmethod
+    def remove_many(self, hashids: Iterable[str]) -> None:
+        pass
+
+    @abstractmethod
+    def iterate(self) -> Iterator[str]:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def put(self, hashid: str, data: bytes) -> None:
+        self.put_many([(hashid, data)])
+
+    def get(self, hashid: str) -> bytes:
+        return self.get_many([hashid])[0]
+
+    def exists(self, hashid: str) -> bool:
+        return self.exists_many([hashid])[0]
+
+    def remove(self, hashid: str) -> None:
+        self.remove_many([hashid])
+
+    def put_bytes(self, data: bytes) -> str:
+        hashid = transform.bytes_as_hashid(data, self.algorithm)
+
+        self.put(hashid, data)
+
+        return hashid
+
+    def put_dict(self, data: Dict[str, Any]) -> str:
+        return self.put_bytes(transform.dict_as_json(data).encode("utf-8"))
+
+    def get_dict(self, hashid: str) -> Dict[str, Any]:
+        return transform.json_as_dict(self.get(hashid).decode("utf-8"))
+
+    def put_file(self, source: Path) -> str:
+        with open(source, "rb") as f:
+            return self.put_bytes(f.read())
+
+    def __enter__(self) -> "Store":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class LooseStore(Store):
+    """
+    This class represents objects stored as files in a blobs directory
+
+    The layout is the one of the fs blob functions,
+    objects stored as delta are resolved on read.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+        # the format of a blobs directory never changes once written
+        self.algorithm = fs.get_algorithm(directory)
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        for hashid, data in items:
+            if not fs.touch_blob(self.directory, hashid):
+                fs.store_bytes_as_blob(self.directory, hashid, data)
+
+    def get_many(self, hashids: Iterable[str]) -> List[bytes]:
+        return [delta.load_blob(self.directory, x) for x in hashids]
+
+    def exists_many(self, hashids: Iterable[str]) -> List[bool]:
+        return [fs.is_blob(self.directory, x) for x in hashids]
+
+    def remove_many(self, hashids: Iterable[str]) -> None:
+        removed_hashids: Set[str] = set()
+
+        for hashid in hashids:
+            existing_path = fs.find_blob(self.directory, hashid)
+
+            if existing_path is not None:
+                fs.remove_file(existing_path)
+
+                removed_hashids.add(hashid)
+
+        if removed_hashids:
+            # the index must never report a removed object
+            index.remove(self.directory, removed_hashids)
+
+    def iterate(self) -> Iterator[str]:
+        for name, _ in fs.list_blobs(self.directory):
+            hashid, _ = fs.split_blob_name(name)
+
+            if is_hashid(hashid):
+                yield hashid
+
+    def put_file(self, source: Path) -> str:
+        # copy without reading the whole file into memory
+        return fs.copy_file_as_blob(self.directory, source)
+
+
+class MemoryStore(Store):
+    """
+    This class represents objects held in memory, for tests and benchmarks
+    """
+
+    def __init__(self, algorithm: str = transform.SHA256) -> None:
+        self.algorithm = algorithm
+        self.objects: Dict[str, bytes] = {}
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        for hashid, data in items:
+            self.objects.setdefault(hashid, data)
+
+    def get_many(self, hashids: Iterable[str]) -> List[bytes]:
+        try:
+            return [self.objects[x] for x in hashids]
+        except KeyError as e:
+            raise FileNotFoundError(e.args[0]) from e
+
+    def exists_many(self, hashids: Iterable[str]) -> List[bool]:
+        return [x in self.objects for x in hashids]
+
+    def remove_many(self, hashids: Iterable[str]) -> None:
+        for hashid in hashids:
+            self.objects.pop(hashid, None)
+
+    def iterate(self) -> Iterator[str]:
+        yield from sorted(self.objects.keys())
+
+
+class SqliteStore(Store):
+    """
+    This class represents objects stored in a single sqlite database
+
+    The database runs in write ahead log mode and batches are written
+    in one transaction each, which keeps millions of small objects
+    in one file instead of one inode per object.
+    """
+
+    def __init__(self, path: Path, algorithm: Optional[str] = None):
+        self.path = path
+        self.lock = threading.Lock()
+
+        fs.make_dirs(path.parent)
+
+        self.connection = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects "
+            "(hashid TEXT PRIMARY KEY, data BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS settings "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self.connection.execute(
+            "INSERT OR IGNORE INTO settings (key, value) "
+            "VALUES ('algorithm', ?)",
+            (algorithm or transform.SHA256,),
+        )
+
+        # the algorithm is fixed once the database has been created
+        self.algorithm = self.connection.execute(
+            "SELECT value FROM settings WHERE key = 'algorithm'"
+        ).fetchone()[0]
+
+        if algorithm is not None and algorithm != self.algorithm:
+            self.connection.close()
+
+            raise ValueError(
+                "Store '{}' uses algorithm '{}' instead of '{}'".format(
+                    path, self.algorithm, algorithm
+                )
+            )
+
+    def query_many(
+        self, query: str, hashids: Iterable[str]
+    ) -> Dict[str, Any]:
+        hashid_list = list(hashids)
+        results: Dict[str, Any] = {}
+
+        with self.lock:
+            for i in range(0, len(hashid_list), SQLITE_BATCH_SIZE):
+                batch = hashid_list[i : i + SQLITE_BATCH_SIZE]
+
+                results.update(
+                    self.connection.execute(
+                        query.format(",".join("?" * len(batch))), batch
+                    ).fetchall()
+                )
+
+        return results
+
+    def execute_many(
+        self, query: str, rows: Iterable[Tuple[Any, ...]]
+    ) -> None:
+        # one transaction per batch instead of one per row
+        with self.lock:
+            self.connection.execute("BEGIN")
+
+            try:
+                self.connection.executemany(query, rows)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+
+                raise
+
+            self.connection.execute("COMMIT")
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        self.execute_many(
+            "INSERT OR IGNORE INTO objects (hashid, data) VALUES (?, ?)",
+            items,
+        )
+
+    def get_many(self, hashids: Iterable[str]) -> List[bytes]:
+        hashid_list = list(hashids)
+
+        results = self.query_many(
+            "SELECT hashid, data FROM objects WHERE hashid IN ({})",
+            hashid_list,
+        )
+
+        try:
+            return [bytes(results[x]) for x in hashid_list]
+        except KeyError as e:
+            raise FileNotFoundError(e.args[0]) from e
+
+    def exists_many(self, hashids: Iterable[str]) -> List[bool]:
+        hashid_list = list(hashids)
+
+        results = self.query_many(
+            "SELECT hashid, 1 FROM objects WHERE hashid IN ({})",
+            hashid_list,
+        )
+
+        return [x in results for x in hashid_list]
+
+    def remove_many(self, hashids: Iterable[str]) -> None:
+        self.execute_many(
+            "DELETE FROM objects WHERE hashid = ?", ((x,) for x in hashids)
+        )
+
+    def iterate(self) -> Iterator[str]:
+        with self.lock:
+            hashids = [
+                x[0]
+                for x in self.connection.execute(
+                    "SELECT hashid FROM objects ORDER BY hashid"
+                )
+            ]
+
+        yield from hashids
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
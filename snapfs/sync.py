@@ -0,0 +1,187 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from snapfs import delta, fs, graph, repository
+from snapfs.hashidset import HashidSet
+
+
+class SyncError(Exception):
+    """
+    This class represents a rejected synchronization error
+    """
+
+
+def find_missing(
+    source: Path,
+    destination: Path,
+    commit_hashids: Iterable[str],
+    workers: Optional[int] = None,
+) -> List[List[str]]:
+    """
+    Return the objects destination lacks, grouped by height
+
+    The graph is walked level by level from commit_hashids and stops
+    at every commit or tree destination already has. Files are at
+    height 0 and every other object is one above its highest missing
+    child, so copying group after group never stores an object before
+    everything below it.
+    """
+    seen = HashidSet()
+    children: Dict[str, List[str]] = {}
+    missing: List[str] = []
+
+    def load(item: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        if fs.is_blob(destination, item[1]):
+            return None
+
+        if item[0] == graph.FILE:
+            return {}
+
+        return fs.load_blob_as_dict(source, item[1])
+
+    frontier = [(graph.COMMIT, x) for x in commit_hashids if seen.add(x)]
+
+    with ThreadPoolExecutor(workers) as executor:
+        while frontier:
+            next_frontier: List[Tuple[str, str]] = []
+
+            for item, data in zip(frontier, executor.map(load, frontier)):
+                if data is None:
+                    continue
+
+                missing.append(item[1])
+
+                children[item[1]] = []
+
+                for child in graph.get_children(item[0], data):
+                    children[item[1]].append(child[1])
+
+                    if seen.add(child[1]):
+                        next_frontier.append(child)
+
+            frontier = next_frontier
+
+    heights: Dict[str, int] = {}
+
+    # children are discovered after their parents, so walking
+    # backwards visits most of them first
+    for hashid in reversed(missing):
+        stack = [hashid]
+
+        while stack:
+            current = stack[-1]
+
+            if current in heights:
+                stack.pop()
+
+                continue
+
+            pending = [
+                x
+                for x in children[current]
+                if x in children and x not in heights
+            ]
+
+            if pending:
+                stack.extend(pending)
+
+                continue
+
+            heights[current] = 1 + max(
+                [heights[x] for x in children[current] if x in heights],
+                default=-1,
+            )
+
+            stack.pop()
+
+    groups: List[List[str]] = [
+        [] for _ in range(max(heights.values(), default=-1) + 1)
+    ]
+
+    for hashid in missing:
+        groups[heights[hashid]].append(hashid)
+
+    return groups
+
+
+def copy_blob(source: Path, destination: Path, hashid: str) -> None:
+    # objects stored as delta are copied in full
+    with delta.open_blob(source, hashid) as f:
+        fs.store_stream_as_blob(destination, hashid, f)
+
+
+def push(
+    path: Path,
+    destination_path: Path,
+    names: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> List[str]:
+    """
+    Copy references and their missing objects into another repository
+
+    Names are relative to the references directory, like "branches/main",
+    all branches and tags are copied by default. Objects are copied in
+    parallel and verified, references are stored once every object
+    has arrived. References of destination are only moved forward
+    unless force is set. Returns the hashids of the copied objects.
+    """
+    references = repository.get_references(path, names)
+
+    source = repository.get_blobs_path(path)
+    destination = repository.get_blobs_path(destination_path)
+
+    if fs.get_algorithm(source) != fs.get_algorithm(destination):
+        # hashids of different algorithms must never mix
+        raise ValueError(
+            "Unable to copy objects from '{}' to '{}' "
+            "with different algorithms".format(path, destination_path)
+        )
+
+    if not force:
+        # commits destination has are looked up in source, commits
+        # source lacks can not be previous commits of its references
+        diverged_names = repository.get_diverged_names(
+            destination_path, references, source
+        )
+
+        if diverged_names:
+            raise SyncError(
+                "Unable to update references '{}' which are ahead "
+                "or diverged".format("', '".join(diverged_names))
+            )
+
+    groups = find_missing(
+        source,
+        destination,
+        [x.commit_hashid for x in references.values() if x.commit_hashid],
+        workers,
+    )
+
+    with ThreadPoolExecutor(workers) as executor:
+        for group in groups:
+            # wait for every object of a group before the next one
+            list(
+                executor.map(
+                    lambda x: copy_blob(source, destination, x), group
+                )
+            )
+
+    for key, value in references.items():
+        repository.store_reference(destination_path, key, value)
+
+    return [x for group in groups for x in group]
+
+
+def fetch(
+    path: Path,
+    source_path: Path,
+    names: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> List[str]:
+    """
+    Copy references and their missing objects from another repository
+    """
+    return push(source_path, path, names, workers, force)
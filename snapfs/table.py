@@ -0,0 +1,232 @@
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from snapfs import compact, fs, hashing, transform
+from snapfs.datatypes import Differences, File
+from snapfs.hashidset import DIGEST_SIZE
+
+
+DIRECTORY = 0
+FILE = 1
+
+EMPTY_DIGEST = bytes(DIGEST_SIZE)
+
+# path, kind, digest, size and mode of a single entry
+Entry = Tuple[str, int, bytes, int, int]
+
+
+def get_key(path: str) -> str:
+    # nul sorts before every other character, which keeps all
+    # entries below a directory right behind the directory itself
+    return path.replace("/", "\0")
+
+
+class Table:
+    """
+    This class represents a tree as flat columns sorted by path
+
+    Every entry has a parent index, a kind, a size, a mode and a digest,
+    entries below a directory end at the index in ends. Numbers are held
+    in arrays and digests in one contiguous buffer, so columns can be
+    handed to vectorized code without copying.
+    """
+
+    def __init__(
+        self,
+        entries: List[Entry],
+        path: Path = Path(),
+        blobs_path: Optional[Path] = None,
+    ):
+        entries = sorted(entries, key=lambda x: get_key(x[0]))
+
+        self.path = path
+        self.blobs_path = blobs_path
+        self.paths: List[str] = [x[0] for x in entries]
+        self.kinds = array("b", [x[1] for x in entries])
+        self.digests = bytearray(b"".join(x[2] for x in entries))
+        self.sizes = array("q", [x[3] for x in entries])
+        self.modes = array("q", [x[4] for x in entries])
+        self.parents = array("q", [-1] * len(entries))
+        self.ends = array("q", range(1, len(entries) + 1))
+
+        indices = {x: i for i, x in enumerate(self.paths)}
+
+        for i, item_path in enumerate(self.paths):
+            parent_path, _, _ = item_path.rpartition("/")
+
+            if parent_path:
+                self.parents[i] = indices[parent_path]
+
+        for i in reversed(range(len(entries))):
+            parent = self.parents[i]
+
+            if parent >= 0 and self.ends[i] > self.ends[parent]:
+                self.ends[parent] = self.ends[i]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def get_digest(self, index: int) -> bytes:
+        return bytes(
+            self.digests[index * DIGEST_SIZE : (index + 1) * DIGEST_SIZE]
+        )
+
+    def get_hashid(self, index: int) -> str:
+        digest = self.get_digest(index)
+
+        return "" if digest == EMPTY_DIGEST else digest.hex()
+
+    def get_file(self, index: int) -> File:
+        hashid = self.get_hashid(index)
+
+        file_path = self.path.joinpath(self.paths[index])
+
+        if self.blobs_path is None:
+            return File(file_path, False, None, hashid)
+
+        return File(
+            file_path,
+            True,
+            fs.get_blob_path(self.blobs_path, hashid),
+            hashid,
+        )
+
+
+def iterate_blob_entries(
+    path: Path, hashid: str, prefix: str = ""
+) -> Iterator[Entry]:
+    data = fs.load_blob_as_dict(path, hashid)
+
+    for key, value in data["directories"].items():
+        yield prefix + key, DIRECTORY, bytes.fromhex(value), -1, 0
+
+        yield from iterate_blob_entries(path, value, prefix + key + "/")
+
+    for key, value in data["files"].items():
+        yield prefix + key, FILE, bytes.fromhex(value), -1, 0
+
+
+def load_from_blob(
+    path: Path, hashid: str, current_path: Path = Path()
+) -> Table:
+    """
+    Load a stored tree as table
+
+    Sizes and modes are not stored in trees and are set to -1 and 0.
+    """
+    return Table(list(iterate_blob_entries(path, hashid)), current_path, path)
+
+
+def load_from_directory_path(
+    current_path: Path,
+    patterns: List[str] = [],
+    exclude: List[str] = [],
+    backend: str = hashing.DEFAULT_BACKEND,
+    workers: Optional[int] = None,
+    algorithm: str = transform.SHA256,
+) -> Table:
+    """
+    Scan and hash the working directory as table
+
+    Callers pass the algorithm of the repository the table is compared
+    with, see repository.get_algorithm, digests of other algorithms
+    never match the stored ones.
+    """
+    directory = compact.load_from_directory_path(
+        current_path, patterns, exclude
+    )
+
+    entries: List[Entry] = []
+
+    def add_directories(
+        directory: compact.CompactDirectory, prefix: str
+    ) -> None:
+        for key, value in directory.directories.items():
+            entries.append((prefix + key, DIRECTORY, EMPTY_DIGEST, -1, 0))
+
+            add_directories(value, prefix + key + "/")
+
+    add_directories(directory, "")
+
+    files = list(compact.iterate_files(directory))
+
+    for item_instance, result in zip(
+        files,
+        hashing.hash_paths(
+            [x.path for x in files], backend, workers, algorithm=algorithm
+        ),
+    ):
+        _, hashid, stat_result = result
+
+        entries.append(
+            (
+                item_instance.path.relative_to(current_path).as_posix(),
+                FILE,
+                bytes.fromhex(hashid),
+                stat_result.st_size,
+                stat_result.st_mode,
+            )
+        )
+
+    return Table(entries, current_path)
+
+
+def compare(old: Table, new: Table) -> Differences:
+    """
+    Compare two tables with a single merge join over their sorted paths
+
+    Directories with equal digests are skipped including everything
+    below them, which is possible whenever both tables are stored trees.
+    """
+    differences_instance = Differences()
+
+    i = 0
+    j = 0
+
+    while i < len(old) and j < len(new):
+        old_key = get_key(old.paths[i])
+        new_key = get_key(new.paths[j])
+
+        if old_key < new_key:
+            if old.kinds[i] == FILE:
+                differences_instance.removed_files.append(old.get_file(i))
+
+            i += 1
+        elif old_key > new_key:
+            if new.kinds[j] == FILE:
+                differences_instance.added_files.append(new.get_file(j))
+
+            j += 1
+        elif old.kinds[i] == DIRECTORY and new.kinds[j] == DIRECTORY:
+            digest = old.get_digest(i)
+
+            if digest != EMPTY_DIGEST and digest == new.get_digest(j):
+                i = old.ends[i]
+                j = new.ends[j]
+            else:
+                i += 1
+                j += 1
+        else:
+            if old.kinds[i] == FILE and new.kinds[j] == FILE:
+                if old.get_digest(i) != new.get_digest(j):
+                    differences_instance.updated_files.append(
+                        new.get_file(j)
+                    )
+            elif old.kinds[i] == FILE:
+                differences_instance.removed_files.append(old.get_file(i))
+            else:
+                differences_instance.added_files.append(new.get_file(j))
+
+            i += 1
+            j += 1
+
+    for k in range(i, len(old)):
+        if old.kinds[k] == FILE:
+            differences_instance.removed_files.append(old.get_file(k))
+
+    for k in range(j, len(new)):
+        if new.kinds[k] == FILE:
+            differences_instance.added_files.append(new.get_file(k))
+
+    return differences_instance
@@ -1,23 +1,60 @@
 from __future__ import annotations
 
+import dataclasses
 import json
 import re
 
-from typing import BinaryIO, Dict, Any, Callable, Sequence, TypeVar
-from hashlib import sha256
+from typing import (
+    BinaryIO,
+    Dict,
+    Any,
+    Callable,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+from hashlib import blake2b, sha256
 from pathlib import Path
 
 
 T = TypeVar("T")
 
+SHA256 = "sha256"
+BLAKE2B = "blake2b"
+
+# every algorithm yields digests of the same size,
+# so hashids of all algorithms share one format
+ALGORITHMS = [SHA256, BLAKE2B]
+
 
 def apply(callback: Callable[[T], Any], values: Sequence[T]) -> None:
     for value in values:
         callback(value)
 
 
-def as_dict(instance: object) -> Dict[str, Any]:
-    return instance.__dict__
+def as_dict(
+    instance: object, datatype: Optional[type] = None
+) -> Dict[str, Any]:
+    """
+    Return the attributes of instance by name
+
+    If datatype is given, the fields of that dataclass are read from
+    instance, so classes with __slots__ or properties which stand in
+    for a dataclass serialize the same way. Otherwise instances
+    without __dict__ are read through their __slots__.
+    """
+    if datatype is not None:
+        names = [x.name for x in dataclasses.fields(datatype)]
+    elif hasattr(instance, "__dict__"):
+        return dict(vars(instance))
+    else:
+        names = [
+            x
+            for cls in type(instance).__mro__
+            for x in getattr(cls, "__slots__", ())
+        ]
+
+    return {x: getattr(instance, x) for x in names}
 
 
 def slug(string: str) -> str:
@@ -47,31 +84,41 @@ def hashid_as_path(hashid: str, parts: int = 1, length: int = 2) -> str:
     )
 
 
-def string_as_hashid(string: str) -> str:
-    sha256_hash = sha256()
+def new_hash(algorithm: str = SHA256) -> Any:
+    if algorithm == SHA256:
+        return sha256()
+
+    if algorithm == BLAKE2B:
+        return blake2b(digest_size=32)
+
+    raise ValueError(
+        "algorithm must be one of {} but is '{}'".format(
+            ALGORITHMS, algorithm
+        )
+    )
 
-    sha256_hash.update(string.encode("utf-8"))
 
-    return sha256_hash.hexdigest()
+def string_as_hashid(string: str, algorithm: str = SHA256) -> str:
+    return bytes_as_hashid(string.encode("utf-8"), algorithm)
 
 
-def dict_as_hashid(data: Dict[str, Any]) -> str:
-    return string_as_hashid(dict_as_json(data))
+def dict_as_hashid(data: Dict[str, Any], algorithm: str = SHA256) -> str:
+    return string_as_hashid(dict_as_json(data), algorithm)
 
 
-def file_as_hashid(path: Path) -> str:
-    sha256_hash = sha256()
+def file_as_hashid(path: Path, algorithm: str = SHA256) -> str:
+    hash_instance = new_hash(algorithm)
 
     with open(str(path), "rb") as f:
         # Read and update hash string value in blocks of 4K
         for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+            hash_instance.update(byte_block)
 
-    return sha256_hash.hexdigest()
+    return hash_instance.hexdigest()
 
 
-def bytes_as_hashid(buffer: bytes) -> str:
-    sha256_hash = sha256()
-    sha256_hash.update(buffer)
+def bytes_as_hashid(buffer: bytes, algorithm: str = SHA256) -> str:
+    hash_instance = new_hash(algorithm)
+    hash_instance.update(buffer)
 
-    return sha256_hash.hexdigest()
+    return hash_instance.hexdigest()
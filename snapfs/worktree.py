@@ -0,0 +1,416 @@
+import os
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from snapfs import (
+    branch,
+    commit,
+    differences,
+    directory,
+    file,
+    monitor,
+    repository,
+)
+from snapfs.datatypes import Author, Branch, Changes, Commit, Differences
+from snapfs.datatypes import Directory, File, Head, Stage
+
+
+EXCLUDE = [".snapfs"]
+
+IGNORE_NAME = ".ignore"
+
+MAIN_BRANCH = "main"
+
+
+def get_latest_commit_hashid(path: Path) -> str:
+    try:
+        return repository.get_reference(path).commit_hashid
+    except (repository.NoReferenceError, FileNotFoundError):
+        return ""
+
+
+def get_latest_tree_hashid(path: Path) -> str:
+    commit_hashid = get_latest_commit_hashid(path)
+
+    if commit_hashid:
+        return repository.get_commit(path, commit_hashid).tree_hashid
+
+    return ""
+
+
+def get_latest_tree(path: Path) -> Directory:
+    tree_hashid = get_latest_tree_hashid(path)
+
+    if tree_hashid:
+        return directory.load_from_blob(
+            repository.get_blobs_path(path), tree_hashid
+        )
+
+    return Directory()
+
+
+def get_pathspec(
+    path: Path, paths: Optional[List[str]]
+) -> Optional[List[str]]:
+    """
+    Return normalized relative paths or None for the whole directory
+
+    Relative paths are taken relative to the working directory,
+    absolute paths have to point into it. Raises ValueError for
+    paths outside of the working directory.
+    """
+    if paths is None:
+        return None
+
+    root_path = Path(os.path.abspath(path))
+
+    pathspec: List[str] = []
+
+    for item_path in paths:
+        item_instance = Path(item_path)
+
+        if ".." in item_instance.parts:
+            raise ValueError("Invalid path '{}'".format(item_path))
+
+        if item_instance.is_absolute():
+            try:
+                item_instance = item_instance.relative_to(root_path)
+            except ValueError:
+                raise ValueError(
+                    "Path '{}' is outside of '{}'".format(item_path, path)
+                ) from None
+
+        relative_path = item_instance.as_posix()
+
+        if relative_path in ["", "."]:
+            return None
+
+        pathspec.append(relative_path)
+
+    return directory.normalize_paths(pathspec)
+
+
+def get_changes(path: Path) -> Optional[Changes]:
+    changes_path = repository.get_changes_path(path, False)
+
+    if not changes_path.is_file():
+        return None
+
+    return monitor.load_from_journal(changes_path)
+
+
+def widen_dirty_paths(dirty_paths: List[str]) -> Optional[List[str]]:
+    """
+    Replace dirty ignore files by the directories they apply to
+
+    Patterns of an ignore file decide about everything below its
+    directory, so all of it has to be compared again. Returns None
+    if the ignore file of the root changed.
+    """
+    result: List[str] = []
+
+    for item_path in dirty_paths:
+        parent, _, name = item_path.rpartition("/")
+
+        if name != IGNORE_NAME:
+            result.append(item_path)
+        elif not parent:
+            return None
+        else:
+            result.append(parent)
+
+    return directory.normalize_paths(result)
+
+
+def get_relative_paths(
+    path: Path, differences_instance: Differences
+) -> List[str]:
+    return [
+        x.path.relative_to(path).as_posix()
+        for x in [
+            *differences_instance.added_files,
+            *differences_instance.updated_files,
+            *differences_instance.removed_files,
+            *[x.source for x in differences_instance.renamed_files],
+            *[x.target for x in differences_instance.renamed_files],
+            *[x.target for x in differences_instance.copied_files],
+        ]
+    ]
+
+
+def compare(
+    path: Path, old: Directory, changes: Optional[Changes]
+) -> Tuple[Differences, bool]:
+    """
+    Compare old with the working directory
+
+    Only dirty paths are compared while a monitor is running,
+    the returned flag tells whether a full scan was necessary.
+    """
+    dirty_paths = monitor.get_dirty_paths(changes) if changes else None
+
+    if dirty_paths is not None:
+        dirty_paths = widen_dirty_paths(dirty_paths)
+
+    algorithm = repository.get_algorithm(path)
+
+    if dirty_paths is None:
+        new = directory.load_from_directory_path(path, [], EXCLUDE)
+
+        return (
+            differences.detect_renames(
+                directory.compare(path, old, new, algorithm), algorithm
+            ),
+            True,
+        )
+
+    new = directory.load_from_paths(path, dirty_paths, [], EXCLUDE)
+
+    return (
+        differences.detect_renames(
+            directory.compare(
+                path,
+                directory.filter_paths(old, dirty_paths),
+                new,
+                algorithm,
+            ),
+            algorithm,
+        ),
+        False,
+    )
+
+
+def compare_paths(
+    path: Path, tree_hashid: str, paths: List[str]
+) -> Differences:
+    """
+    Compare the given paths of a stored tree with the working directory
+
+    Neither the stored tree nor the working directory are
+    traversed outside of paths.
+    """
+    old = directory.load_from_blob_paths(
+        repository.get_blobs_path(path), tree_hashid, paths
+    )
+
+    new = directory.load_from_paths(path, paths, [], EXCLUDE)
+
+    algorithm = repository.get_algorithm(path)
+
+    return differences.detect_renames(
+        directory.compare(path, old, new, algorithm), algorithm
+    )
+
+
+def get_status(path: Path, paths: Optional[List[str]] = None) -> Differences:
+    pathspec = get_pathspec(path, paths)
+
+    if pathspec is not None:
+        return compare_paths(path, get_latest_tree_hashid(path), pathspec)
+
+    changes = get_changes(path)
+
+    differences_instance, full_scan = compare(
+        path, get_latest_tree(path), changes
+    )
+
+    if changes and full_scan and monitor.is_alive(changes.pid):
+        # remember what still differs so that following
+        # calls only need to look at these paths
+        monitor.reset(
+            repository.get_changes_path(path),
+            get_relative_paths(path, differences_instance),
+            changes.generation,
+        )
+
+    return differences_instance
+
+
+def store_commit(path: Path, commit_instance: Commit) -> str:
+    head_instance = repository.get_head(path)
+
+    if not head_instance.ref:
+        head_instance = Head("references/branches/{}".format(MAIN_BRANCH))
+
+        repository.store_head(path, head_instance)
+
+    if "branches" not in head_instance.ref:
+        raise repository.NoReferenceError(
+            "Unable to store commit on '{}'".format(head_instance.ref)
+        )
+
+    commit_hashid = commit.store_as_blob(
+        repository.get_blobs_path(path), commit_instance
+    )
+
+    branch.store_as_file(
+        repository.get_branch_path(path, Path(head_instance.ref).name, False),
+        Branch(commit_hashid),
+    )
+
+    return commit_hashid
+
+
+def store_paths_as_blob(
+    path: Path, tree_hashid: str, paths: List[str]
+) -> str:
+    """
+    Graft the given paths of the working directory onto a stored tree
+    """
+    blobs_path = repository.get_blobs_path(path)
+
+    new = directory.load_from_paths(path, paths, [], EXCLUDE)
+
+    entries: Dict[str, Optional[Tuple[str, str]]] = {}
+
+    for item_path in paths:
+        value = directory.get_entry(new, item_path.split("/"))
+
+        if isinstance(value, File):
+            entries[item_path] = (
+                "files",
+                file.store_as_blob(blobs_path, value),
+            )
+        elif isinstance(value, Directory):
+            entries[item_path] = (
+                "directories",
+                directory.store_as_blob(blobs_path, value),
+            )
+        else:
+            entries[item_path] = None
+
+    return store_tree(
+        path, directory.update_blob(blobs_path, tree_hashid, entries)
+    )
+
+
+def store_tree(path: Path, tree_hashid: str) -> str:
+    if not tree_hashid:
+        # keep storing an empty tree like a full snapshot does
+        tree_hashid = directory.store_as_blob(
+            repository.get_blobs_path(path), Directory()
+        )
+
+    return tree_hashid
+
+
+def get_relative_path(path: Path, file_instance: File) -> str:
+    if file_instance.path.is_absolute():
+        return file_instance.path.relative_to(path).as_posix()
+
+    return file_instance.path.as_posix()
+
+
+def store_stage_as_blob(
+    path: Path, tree_hashid: str, stage_instance: Stage
+) -> str:
+    """
+    Apply the stage to a stored tree
+
+    Only the tree objects along staged paths are written,
+    so committing a single file writes O(depth) objects.
+    """
+    blobs_path = repository.get_blobs_path(path)
+
+    entries: Dict[str, Optional[Tuple[str, str]]] = {
+        get_relative_path(path, x): None
+        for x in stage_instance.removed_files
+    }
+
+    for file_instance in [
+        *stage_instance.added_files,
+        *stage_instance.updated_files,
+    ]:
+        entries[get_relative_path(path, file_instance)] = (
+            "files",
+            file.store_as_blob(blobs_path, file_instance),
+        )
+
+    return store_tree(
+        path, directory.update_blob(blobs_path, tree_hashid, entries)
+    )
+
+
+def commit_stage(path: Path, author: Author, message: str) -> str:
+    """
+    Store the stage as new commit on top of the previous commit
+    """
+    previous_commit_hashid = get_latest_commit_hashid(path)
+
+    tree_hashid = store_stage_as_blob(
+        path, get_latest_tree_hashid(path), repository.get_stage(path)
+    )
+
+    commit_hashid = store_commit(
+        path,
+        Commit(
+            author,
+            message,
+            tree_hashid,
+            [previous_commit_hashid] if previous_commit_hashid else [],
+        ),
+    )
+
+    repository.store_stage(path, Stage())
+
+    return commit_hashid
+
+
+def snapshot(
+    path: Path,
+    author: Author,
+    message: str,
+    paths: Optional[List[str]] = None,
+    streaming: bool = False,
+) -> str:
+    """
+    Store the working directory as new commit
+
+    With paths only these subtrees are scanned and grafted onto the
+    tree of the previous commit, everything else is taken unchanged.
+    Streaming stores every file and tree while the working directory
+    is walked instead of comparing it with the previous commit first,
+    which keeps memory bounded by the depth instead of the size.
+    """
+    pathspec = get_pathspec(path, paths)
+
+    changes = get_changes(path)
+
+    previous_commit_hashid = get_latest_commit_hashid(path)
+
+    if pathspec is not None:
+        tree_hashid = store_paths_as_blob(
+            path, get_latest_tree_hashid(path), pathspec
+        )
+    elif streaming:
+        tree_hashid = directory.store_directory_path_as_blob(
+            repository.get_blobs_path(path), path, [], EXCLUDE
+        )
+    else:
+        old = get_latest_tree(path)
+
+        differences_instance, _ = compare(path, old, changes)
+
+        tree_hashid = directory.store_as_blob(
+            repository.get_blobs_path(path),
+            directory.apply_differences(path, old, differences_instance),
+        )
+
+    commit_hashid = store_commit(
+        path,
+        Commit(
+            author,
+            message,
+            tree_hashid,
+            [previous_commit_hashid] if previous_commit_hashid else [],
+        ),
+    )
+
+    if pathspec is None and changes and monitor.is_alive(changes.pid):
+        # everything recorded up to here is part of the new commit
+        monitor.reset(
+            repository.get_changes_path(path), [], changes.generation
+        )
+
+    return commit_hashid
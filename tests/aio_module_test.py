@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import aio, differences, directory, repository, transform, worktree
+from snapfs.datatypes import Author, Directory
+
+
+def create_files(path: Path, count: int) -> None:
+    path.joinpath("foo").mkdir(parents=True)
+
+    for i in range(count):
+        with open(path.joinpath("foo", "file_{}.txt".format(i)), "w") as f:
+            f.write("content {}".format(i))
+
+
+class TestAioModule(unittest.TestCase):
+    def test_load_from_directory_path(self):
+        result = {}
+        expected_result = {}
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            create_files(tmppath, 3)
+
+            expected_result = directory.serialize_as_dict(
+                directory.load_from_directory_path(tmppath)
+            )
+
+            result = directory.serialize_as_dict(
+                asyncio.run(aio.load_from_directory_path(tmppath))
+            )
+
+        self.assertDictEqual(result, expected_result)
+
+    def test_iterate_store_as_blob(self):
+        result = []
+        expected_result = ""
+
+        async def collect(blobs_path, directory_instance):
+            return [
+                x
+                async for x in aio.iterate_store_as_blob(
+                    blobs_path, directory_instance, aio.Runner(2)
+                )
+            ]
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = tmppath.joinpath("blobs")
+
+            create_files(tmppath.joinpath("files"), 5)
+
+            directory_instance = directory.load_from_directory_path(
+                tmppath.joinpath("files")
+            )
+
+            expected_result = directory.serialize_as_hashid(
+                directory_instance
+            )
+
+            result = asyncio.run(collect(blobs_path, directory_instance))
+
+        self.assertListEqual(
+            [x.completed for x in result], [1, 2, 3, 4, 5, 5]
+        )
+        self.assertIsNone(result[-1].path)
+        self.assertEqual(result[-1].hashid, expected_result)
+
+    def test_compare(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath, transform.BLAKE2B)
+
+            create_files(tmppath, 2)
+
+            worktree.snapshot(tmppath, Author("beesperester"), "initial")
+
+            old = directory.load_from_blob(
+                repository.get_blobs_path(tmppath),
+                repository.get_latest_commit(tmppath).tree_hashid,
+            )
+
+            new = directory.load_from_directory_path(
+                tmppath, [], worktree.EXCLUDE
+            )
+
+            result = asyncio.run(
+                aio.compare(tmppath, old, new, transform.BLAKE2B)
+            )
+
+            # files hashed with another algorithm all look updated
+            mismatch = asyncio.run(aio.compare(tmppath, old, new))
+
+        self.assertListEqual(differences.serialize_as_messages(result), [])
+        self.assertEqual(len(differences.serialize_as_messages(mismatch)), 2)
+
+    def test_store_as_blob(self):
+        directory_instance = Directory()
+
+        expected_result = transform.dict_as_hashid(
+            {"directories": {}, "files": {}}
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            result = asyncio.run(
+                aio.store_as_blob(Path(tmpdirname), directory_instance)
+            )
+
+        self.assertEqual(result, expected_result)
+
+    def test_cancel(self):
+        result = []
+
+        async def consume(blobs_path, directory_instance):
+            async for progress in aio.iterate_store_as_blob(
+                blobs_path, directory_instance, aio.Runner(1)
+            ):
+                result.append(progress)
+
+                raise asyncio.CancelledError()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            create_files(tmppath.joinpath("files"), 5)
+
+            directory_instance = directory.load_from_directory_path(
+                tmppath.joinpath("files")
+            )
+
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(
+                    consume(tmppath.joinpath("blobs"), directory_instance)
+                )
+
+        self.assertEqual(len(result), 1)
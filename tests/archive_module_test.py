@@ -0,0 +1,232 @@
+import io
+import unittest
+import tarfile
+import tempfile
+import zipfile
+
+from pathlib import Path
+
+from snapfs import archive, fs, repository, worktree
+from snapfs.datatypes import Author, Commit
+
+from helpers import write_file
+
+
+def store_snapshot(path: Path) -> str:
+    repository.initialize(path)
+
+    write_file(path.joinpath("a", "b", "c.txt"), b"foo")
+    write_file(path.joinpath("a", "d.txt"), b"bar")
+    write_file(path.joinpath("e.txt"), b"")
+
+    return worktree.snapshot(path, Author("beesperester"), "initial commit")
+
+
+class TestArchiveModule(unittest.TestCase):
+    def test_export_to_stream(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            commit_hashid = store_snapshot(tmppath)
+
+            stream = io.BytesIO()
+
+            result = archive.export_to_stream(tmppath, commit_hashid, stream)
+
+        self.assertEqual(result, 3)
+
+        stream.seek(0)
+
+        with tarfile.open(fileobj=stream, mode="r") as f:
+            self.assertListEqual(
+                f.getnames(),
+                ["a", "a/b", "a/b/c.txt", "a/d.txt", "e.txt"],
+            )
+            self.assertTrue(f.getmember("a/b").isdir())
+            self.assertEqual(f.extractfile("a/b/c.txt").read(), b"foo")
+            self.assertEqual(f.extractfile("e.txt").read(), b"")
+
+    def test_export_invalid(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            file_hashid = fs.copy_stream_as_blob(
+                blobs_path, io.BytesIO(b"foo")
+            )
+
+            for name in ["..", ".snapfs"]:
+                tree_hashid = fs.store_dict_as_blob(
+                    blobs_path,
+                    {"directories": {}, "files": {name: file_hashid}},
+                )
+
+                commit_hashid = worktree.store_commit(
+                    tmppath,
+                    Commit(Author("beesperester"), "invalid", tree_hashid),
+                )
+
+                with self.assertRaises(archive.ArchiveError):
+                    archive.export_to_stream(
+                        tmppath, commit_hashid, io.BytesIO()
+                    )
+
+    def test_export_to_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            commit_hashid = store_snapshot(tmppath)
+
+            archive_path = tmppath.joinpath("export.tar.gz")
+
+            archive.export_to_file(tmppath, commit_hashid, archive_path, "gz")
+
+            with tarfile.open(archive_path, mode="r:gz") as f:
+                content = f.extractfile("a/d.txt").read()
+
+            with self.assertRaises(archive.ArchiveError):
+                archive.export_to_file(
+                    tmppath, commit_hashid, archive_path, "xz"
+                )
+
+            # the previous export is left intact
+            with tarfile.open(archive_path, mode="r:gz") as f:
+                names = f.getnames()
+
+        self.assertEqual(content, b"bar")
+        self.assertIn("a/d.txt", names)
+
+    def test_import_from_stream(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            destination_path = Path(tmpdirname).joinpath("destination")
+
+            commit_hashid = store_snapshot(source_path)
+
+            repository.initialize(destination_path)
+
+            stream = io.BytesIO()
+
+            archive.export_to_stream(source_path, commit_hashid, stream, "gz")
+
+            stream.seek(0)
+
+            result = archive.import_from_stream(
+                destination_path, stream, Author("beesperester"), "import"
+            )
+
+            expected_tree_hashid = repository.get_commit(
+                source_path, commit_hashid
+            ).tree_hashid
+
+            commit_instance = repository.get_commit(destination_path, result)
+
+            latest_hashid = repository.get_reference(
+                destination_path
+            ).commit_hashid
+
+            working_directory = sorted(
+                x.name for x in destination_path.iterdir()
+            )
+
+        # the same files give the same tree wherever they come from
+        self.assertEqual(commit_instance.tree_hashid, expected_tree_hashid)
+        self.assertEqual(latest_hashid, result)
+        self.assertListEqual(working_directory, [".snapfs"])
+
+    def test_import_from_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            archive_path = tmppath.joinpath("vendor.zip")
+
+            with zipfile.ZipFile(archive_path, "w") as f:
+                f.writestr("./vendor/a.txt", b"foo")
+                f.writestr("vendor/b/", b"")
+                f.writestr("vendor/b/c.txt", b"bar")
+
+            first_hashid = archive.import_from_file(
+                tmppath, archive_path, Author("beesperester"), "first"
+            )
+
+            second_hashid = archive.import_from_file(
+                tmppath, archive_path, Author("beesperester"), "second"
+            )
+
+            commit_instance = repository.get_commit(tmppath, second_hashid)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            tree = fs.load_blob_as_dict(
+                blobs_path, commit_instance.tree_hashid
+            )
+
+            vendor = fs.load_blob_as_dict(
+                blobs_path, tree["directories"]["vendor"]
+            )
+
+            sub_tree = fs.load_blob_as_dict(
+                blobs_path, vendor["directories"]["b"]
+            )
+
+        self.assertListEqual(
+            commit_instance.previous_commits_hashids, [first_hashid]
+        )
+        self.assertListEqual(list(vendor["files"].keys()), ["a.txt"])
+        self.assertListEqual(list(sub_tree["files"].keys()), ["c.txt"])
+
+    def test_import_invalid(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            for names in [["../a.txt"], ["a", "a/b.txt"], [".snapfs/head"]]:
+                stream = io.BytesIO()
+
+                with zipfile.ZipFile(stream, "w") as f:
+                    for name in names:
+                        f.writestr(name, b"foo")
+
+                with self.assertRaises(archive.ArchiveError):
+                    archive.import_tree_from_stream(tmppath, stream, "zip")
+
+    def test_import_links(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            stream = io.BytesIO()
+
+            with tarfile.open(fileobj=stream, mode="w|") as f:
+                info = tarfile.TarInfo("a.txt")
+                info.size = 3
+
+                f.addfile(info, io.BytesIO(b"foo"))
+
+                for name, kind in [
+                    ("b.txt", tarfile.SYMTYPE),
+                    ("c.txt", tarfile.LNKTYPE),
+                ]:
+                    info = tarfile.TarInfo(name)
+                    info.type = kind
+                    info.linkname = "a.txt"
+
+                    f.addfile(info)
+
+            stream.seek(0)
+
+            tree_hashid = archive.import_tree_from_stream(tmppath, stream)
+
+            tree = fs.load_blob_as_dict(
+                repository.get_blobs_path(tmppath), tree_hashid
+            )
+
+        # links are skipped instead of aborting the import
+        self.assertListEqual(list(tree["files"].keys()), ["a.txt"])
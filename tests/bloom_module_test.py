@@ -0,0 +1,22 @@
+import unittest
+
+from snapfs import transform
+from snapfs.bloom import BloomFilter
+
+
+class TestBloomModule(unittest.TestCase):
+    def test_bloom_filter(self):
+        hashids = [transform.string_as_hashid(str(i)) for i in range(1000)]
+
+        bloom = BloomFilter(1000, 0.01, hashids)
+
+        for hashid in hashids:
+            self.assertIn(hashid, bloom)
+
+        false_positives = sum(
+            transform.string_as_hashid("other {}".format(i)) in bloom
+            for i in range(10000)
+        )
+
+        self.assertLess(false_positives, 300)
+        self.assertNotIn(1, bloom)
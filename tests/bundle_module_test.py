@@ -0,0 +1,231 @@
+import io
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import bundle, commit, fs, repository, transform
+from snapfs.datatypes import Author, Branch, Commit, Tag
+
+
+def store_commit(path: Path, content: str, previous: str = "") -> str:
+    blobs_path = repository.get_blobs_path(path)
+
+    file_hashid = fs.store_dict_as_blob(blobs_path, {"content": content})
+
+    tree_hashid = fs.store_dict_as_blob(
+        blobs_path, {"directories": {}, "files": {"foo.json": file_hashid}}
+    )
+
+    commit_hashid = commit.store_as_blob(
+        blobs_path,
+        Commit(
+            Author("beesperester"),
+            content,
+            tree_hashid,
+            [previous] if previous else [],
+        ),
+    )
+
+    repository.store_reference(path, "branches/main", Branch(commit_hashid))
+
+    return commit_hashid
+
+
+class TestBundleModule(unittest.TestCase):
+    def test_export_import(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            target_path = Path(tmpdirname).joinpath("target")
+            bundle_path = Path(tmpdirname).joinpath("full.bundle")
+
+            repository.initialize(source_path)
+            repository.initialize(target_path)
+
+            commit_hashid = store_commit(source_path, "foo")
+
+            repository.store_reference(
+                source_path, "tags/v1", Tag(commit_hashid, "first")
+            )
+
+            exported = bundle.export_to_file(source_path, bundle_path)
+
+            self.assertEqual(len(exported.hashids), 3)
+
+            imported = bundle.import_from_file(target_path, bundle_path)
+
+            self.assertListEqual(imported.hashids, exported.hashids)
+
+            self.assertDictEqual(
+                repository.get_references(target_path),
+                {
+                    "branches/main": Branch(commit_hashid),
+                    "tags/v1": Tag(commit_hashid, "first"),
+                },
+            )
+
+            for hashid in exported.hashids:
+                self.assertTrue(
+                    fs.is_blob(repository.get_blobs_path(target_path), hashid)
+                )
+
+    def test_export_since(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            target_path = Path(tmpdirname).joinpath("target")
+            full_path = Path(tmpdirname).joinpath("full.bundle")
+            incremental_path = Path(tmpdirname).joinpath("incremental.bundle")
+
+            repository.initialize(source_path)
+            repository.initialize(target_path)
+
+            first_hashid = store_commit(source_path, "foo")
+
+            bundle.export_to_file(source_path, full_path)
+
+            second_hashid = store_commit(source_path, "bar", first_hashid)
+
+            incremental = bundle.export_to_file(
+                source_path, incremental_path, since=full_path
+            )
+
+            # only the new commit, tree and file
+            self.assertEqual(len(incremental.hashids), 3)
+            self.assertListEqual(incremental.prerequisites, [first_hashid])
+
+            with self.assertRaises(bundle.BundleError):
+                bundle.import_from_file(target_path, incremental_path)
+
+            bundle.import_from_file(target_path, full_path)
+            bundle.import_from_file(target_path, incremental_path)
+
+            self.assertEqual(
+                repository.get_branch(target_path, "main").commit_hashid,
+                second_hashid,
+            )
+
+    def test_import_diverged(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            target_path = Path(tmpdirname).joinpath("target")
+            bundle_path = Path(tmpdirname).joinpath("full.bundle")
+
+            repository.initialize(source_path)
+            repository.initialize(target_path)
+
+            first_hashid = store_commit(source_path, "foo")
+
+            bundle.export_to_file(source_path, bundle_path)
+            bundle.import_from_file(target_path, bundle_path)
+
+            # the target moves ahead of the bundle
+            second_hashid = store_commit(target_path, "bar", first_hashid)
+
+            with self.assertRaises(bundle.BundleError):
+                bundle.import_from_file(target_path, bundle_path)
+
+            kept_hashid = repository.get_branch(
+                target_path, "main"
+            ).commit_hashid
+
+            bundle.import_from_file(target_path, bundle_path, force=True)
+
+            forced_hashid = repository.get_branch(
+                target_path, "main"
+            ).commit_hashid
+
+        self.assertEqual(kept_hashid, second_hashid)
+        self.assertEqual(forced_hashid, first_hashid)
+
+    def test_import_corrupt(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            target_path = Path(tmpdirname).joinpath("target")
+
+            repository.initialize(source_path)
+            repository.initialize(target_path)
+
+            store_commit(source_path, "foo")
+
+            stream = io.BytesIO()
+
+            exported = bundle.export_to_stream(source_path, stream)
+
+            # flip the contents of the first object
+            data = stream.getvalue().replace(b"tree_hashid", b"tree_hashiD")
+
+            with self.assertRaises(bundle.BundleError):
+                bundle.import_from_stream(target_path, io.BytesIO(data))
+
+            blobs_path = repository.get_blobs_path(target_path)
+
+            self.assertFalse(fs.is_blob(blobs_path, exported.hashids[0]))
+            self.assertDictEqual(repository.get_branches(target_path), {})
+
+    def test_import_reference_names(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            target_path = Path(tmpdirname).joinpath("target")
+
+            repository.initialize(source_path)
+            repository.initialize(target_path)
+
+            store_commit(source_path, "foo")
+
+            stream = io.BytesIO()
+
+            bundle.export_to_stream(source_path, stream)
+
+            # a name of the same length which points outside the repository
+            data = stream.getvalue().replace(
+                b"branches/main", b"branches/../a"
+            )
+
+            with self.assertRaises(bundle.BundleError):
+                bundle.import_from_stream(target_path, io.BytesIO(data))
+
+            self.assertFalse(target_path.joinpath(".snapfs", "a").exists())
+
+    def test_read_header(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname)
+
+            repository.initialize(source_path)
+
+            commit_hashid = store_commit(source_path, "foo")
+
+            stream = io.BytesIO()
+
+            bundle.export_to_stream(source_path, stream, ["branches/main"])
+
+            stream.seek(0)
+
+            result = bundle.read_header(stream)
+
+            self.assertDictEqual(
+                result.references, {"branches/main": Branch(commit_hashid)}
+            )
+
+            with self.assertRaises(repository.NoReferenceError):
+                bundle.export_to_stream(
+                    source_path, io.BytesIO(), ["branches/missing"]
+                )
+
+    def test_import_algorithm(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            target_path = Path(tmpdirname).joinpath("target")
+
+            repository.initialize(source_path)
+            repository.initialize(target_path, transform.BLAKE2B)
+
+            store_commit(source_path, "foo")
+
+            stream = io.BytesIO()
+
+            bundle.export_to_stream(source_path, stream)
+
+            stream.seek(0)
+
+            with self.assertRaises(bundle.BundleError):
+                bundle.import_from_stream(target_path, stream)
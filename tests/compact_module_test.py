@@ -0,0 +1,145 @@
+import unittest
+import tempfile
+import tracemalloc
+
+from pathlib import Path
+
+from snapfs import compact, differences, directory, transform
+from snapfs.datatypes import Directory, File
+
+from helpers import write_file
+
+
+class TestCompactModule(unittest.TestCase):
+    def test_load_from_blob(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = tmppath.joinpath("blobs")
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "foo")
+            write_file(tmppath.joinpath("bar.txt"), "bar")
+
+            hashid = directory.store_as_blob(
+                blobs_path,
+                directory.load_from_directory_path(tmppath, [], ["blobs"]),
+            )
+
+            result = compact.load_from_blob(blobs_path, hashid)
+
+            foo_instance = result.directories["a"].files["foo.txt"]
+
+            self.assertTrue(foo_instance.blob_path.is_file())
+
+            # compact directories serialize like the directories they replace
+            data = directory.serialize_as_dict(result)
+
+            expected_data = {
+                "path": str(Path("a", "foo.txt")),
+                "is_blob": True,
+                "blob_path": str(foo_instance.blob_path),
+                "hashid": transform.string_as_hashid("foo"),
+            }
+
+        self.assertDictEqual(
+            data["directories"]["a"]["files"]["foo.txt"], expected_data
+        )
+        self.assertEqual(directory.serialize_as_hashid(result), hashid)
+        self.assertEqual(foo_instance.path, Path("a", "foo.txt"))
+        self.assertEqual(
+            foo_instance.hashid, transform.string_as_hashid("foo")
+        )
+
+    def test_load_from_directory_path(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "foo")
+            write_file(tmppath.joinpath("bar.txt"), "bar")
+
+            expected_result = directory.load_from_directory_path(tmppath)
+
+            result = compact.hash_files(
+                compact.load_from_directory_path(tmppath)
+            )
+
+            self.assertEqual(
+                directory.serialize_as_hashid(result),
+                directory.serialize_as_hashid(expected_result),
+            )
+
+            self.assertListEqual(
+                differences.serialize_as_messages(
+                    directory.compare(tmppath, expected_result, result)
+                ),
+                [],
+            )
+
+        self.assertEqual(
+            result.directories["a"].files["foo.txt"].path,
+            tmppath.joinpath("a", "foo.txt"),
+        )
+
+    def test_from_directory(self):
+        hashid = transform.string_as_hashid("foo")
+
+        directory_instance = Directory(
+            {"a": Directory({}, {"foo.txt": File(Path("x"), hashid=hashid)})}
+        )
+
+        result = compact.as_directory(
+            compact.from_directory(directory_instance)
+        )
+
+        self.assertEqual(
+            result.directories["a"].files["foo.txt"],
+            File(Path("a", "foo.txt"), False, None, hashid),
+        )
+
+    def test_memory(self):
+        hashids = [transform.string_as_hashid(str(i)) for i in range(1000)]
+
+        def measure(create) -> int:
+            tracemalloc.start()
+
+            create()
+
+            # the instance is gone again, its size stays in the peak
+            _, size = tracemalloc.get_traced_memory()
+
+            tracemalloc.stop()
+
+            return size
+
+        def create_directory() -> Directory:
+            return Directory(
+                {},
+                {
+                    "file_{}".format(i): File(
+                        Path("a", "file_{}".format(i)),
+                        True,
+                        Path("blobs", hashids[i]),
+                        hashids[i],
+                    )
+                    for i in range(1000)
+                },
+            )
+
+        def create_compact_directory() -> compact.CompactDirectory:
+            root = compact.CompactDirectory("a")
+            blobs_path = Path("blobs")
+
+            for i in range(1000):
+                root.files["file_{}".format(i)] = compact.CompactFile(
+                    "file_{}".format(i),
+                    root,
+                    bytes.fromhex(hashids[i]),
+                    blobs_path,
+                )
+
+            return root
+
+        directory_size = measure(create_directory)
+        compact_size = measure(create_compact_directory)
+
+        self.assertLess(compact_size * 2, directory_size)
@@ -0,0 +1,138 @@
+import os
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import delta, fs, fsck, garbage, patch, repository, worktree
+from snapfs import transform
+from snapfs.datatypes import Author
+
+
+def get_contents(version: int) -> bytes:
+    lines = ["line {}\n".format(i) for i in range(200)]
+
+    lines[version * 10] = "changed in version {}\n".format(version)
+
+    return "".join(lines).encode("utf-8")
+
+
+def initialize_repository(path: Path, versions: int) -> list:
+    repository.initialize(path)
+
+    hashids = []
+
+    for version in range(versions):
+        with open(path.joinpath("log.txt"), "wb") as f:
+            f.write(get_contents(version))
+
+        hashids.append(transform.bytes_as_hashid(get_contents(version)))
+
+        worktree.snapshot(path, Author("beesperester"), str(version))
+
+    return hashids
+
+
+class TestDeltaModule(unittest.TestCase):
+    def test_encode(self):
+        base = get_contents(1)
+        target = get_contents(2) + b"appended"
+
+        instructions = delta.encode(base, target)
+
+        self.assertEqual(delta.decode(base, instructions), target)
+        self.assertLess(len(instructions), len(target) // 10)
+
+    def test_encode_unrelated(self):
+        base = os.urandom(1000)
+        target = os.urandom(500)
+
+        self.assertEqual(
+            delta.decode(base, delta.encode(base, target)), target
+        )
+
+    def test_encode_skip_ahead(self):
+        base = os.urandom(64 * 1024)
+
+        # the match follows a long run without any
+        target = os.urandom(64 * 1024) + base
+
+        instructions = delta.encode(base, target)
+
+        self.assertEqual(delta.decode(base, instructions), target)
+        self.assertLess(len(instructions), len(target) * 3 // 4)
+
+    def test_cache(self):
+        cache = delta.Cache(10)
+
+        cache.put(Path("blobs"), "a", b"aaaa")
+        cache.put(Path("blobs"), "b", b"bbbb")
+
+        cache.get(Path("blobs"), "a")
+
+        cache.put(Path("blobs"), "c", b"cccc")
+
+        self.assertEqual(cache.get(Path("blobs"), "a"), b"aaaa")
+        self.assertIsNone(cache.get(Path("blobs"), "b"))
+        self.assertEqual(cache.size, 8)
+
+    def test_repack(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            hashids = initialize_repository(tmppath, 3)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            result = garbage.repack(tmppath)
+
+            contents = [
+                delta.load_blob(blobs_path, x, delta.Cache()) for x in hashids
+            ]
+
+            depths = [delta.get_depth(blobs_path, x) for x in hashids]
+
+            messages = fsck.serialize_as_messages(fsck.fsck(tmppath))
+
+            removed_hashids = garbage.collect(tmppath, 0)
+
+            lines = list(patch.compare_blobs(blobs_path, *hashids[:2]))
+
+        # the newest version stays loose, older versions become deltas
+        self.assertListEqual(result, [hashids[1], hashids[0]])
+        self.assertListEqual(contents, [get_contents(x) for x in range(3)])
+        self.assertListEqual(depths, [2, 1, 0])
+        self.assertListEqual(messages, [])
+        self.assertListEqual(removed_hashids, [])
+        self.assertIn("+changed in version 1\n", lines)
+
+    def test_repack_max_depth(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            hashids = initialize_repository(tmppath, 3)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            result = garbage.repack(tmppath, 1)
+
+            # storing contents which exist as delta keeps the delta
+            with open(tmppath.joinpath("log.txt"), "wb") as f:
+                f.write(get_contents(1))
+
+            fs.copy_file_as_blob(blobs_path, tmppath.joinpath("log.txt"))
+
+            is_delta = delta.is_delta(blobs_path, hashids[1])
+
+        self.assertListEqual(result, [hashids[1]])
+        self.assertTrue(is_delta)
+
+    def test_repack_max_size(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath, 3)
+
+            result = garbage.repack(tmppath, max_size=100)
+
+        self.assertListEqual(result, [])
@@ -7,7 +7,7 @@ from typing import List
 
 
 from snapfs import fs, transform, differences
-from snapfs.datatypes import Differences, File
+from snapfs.datatypes import Differences, File, FilePair
 
 
 def get_named_tmpfile_path():
@@ -27,6 +27,8 @@ class TestDifferencesModule(unittest.TestCase):
             "added_files": [],
             "updated_files": [],
             "removed_files": [],
+            "renamed_files": [],
+            "copied_files": [],
         }
 
         differences_instance = Differences()
@@ -43,6 +45,8 @@ class TestDifferencesModule(unittest.TestCase):
             "added_files": [],
             "updated_files": [],
             "removed_files": [],
+            "renamed_files": [],
+            "copied_files": [],
         }
 
         differences_instance = Differences()
@@ -56,6 +60,8 @@ class TestDifferencesModule(unittest.TestCase):
             "added_files": [],
             "updated_files": [],
             "removed_files": [],
+            "renamed_files": [],
+            "copied_files": [],
         }
 
         result = differences.serialize_as_dict(
@@ -71,6 +77,8 @@ class TestDifferencesModule(unittest.TestCase):
             "added_files": [],
             "updated_files": [],
             "removed_files": [],
+            "renamed_files": [],
+            "copied_files": [],
         }
 
         differences_instance = Differences()
@@ -82,3 +90,79 @@ class TestDifferencesModule(unittest.TestCase):
         )
 
         self.assertDictEqual(result, expected_result)
+
+    def test_merge_differences(self):
+        pair = FilePair(File(Path("foo")), File(Path("bar")))
+
+        result = differences.merge_differences(
+            Differences([File(Path("baz"))]), Differences(renamed_files=[pair])
+        )
+
+        self.assertListEqual(
+            differences.serialize_as_messages(result),
+            ["added: baz", "renamed: foo -> bar"],
+        )
+
+    def test_detect_renames(self):
+        hashid_a = transform.string_as_hashid("a")
+        hashid_b = transform.string_as_hashid("b")
+
+        differences_instance = Differences(
+            [
+                File(Path("x/foo.txt"), True, Path("blob_a"), hashid_a),
+                File(Path("y/foo.txt"), True, Path("blob_a"), hashid_a),
+                File(Path("bar.txt"), True, Path("blob_b"), hashid_b),
+            ],
+            [],
+            [File(Path("foo.txt"), True, Path("blob_a"), hashid_a)],
+        )
+
+        expected_result = [
+            "added: bar.txt",
+            "renamed: foo.txt -> x/foo.txt",
+            "copied: foo.txt -> y/foo.txt",
+        ]
+
+        result = differences.detect_renames(differences_instance)
+
+        self.assertListEqual(
+            differences.serialize_as_messages(result), expected_result
+        )
+        self.assertEqual(result.renamed_files[0].target.hashid, hashid_a)
+
+    def test_detect_renames_by_name(self):
+        hashid = transform.string_as_hashid("a")
+
+        differences_instance = Differences(
+            [
+                File(Path(x), True, Path("blob_a"), hashid)
+                for x in ["a/two.txt", "b/one.txt", "c/four.txt", "three.txt"]
+            ],
+            [],
+            [
+                File(Path(x), True, Path("blob_a"), hashid)
+                for x in ["three.txt", "one.txt", "two.txt"]
+            ],
+        )
+
+        result = differences.detect_renames(differences_instance)
+
+        renamed = [
+            (str(x.source.path), str(x.target.path))
+            for x in result.renamed_files
+        ]
+
+        # the first source was taken before three.txt arrived
+        self.assertListEqual(
+            renamed,
+            [
+                ("two.txt", "a/two.txt"),
+                ("one.txt", "b/one.txt"),
+                ("three.txt", "c/four.txt"),
+            ],
+        )
+        self.assertListEqual(
+            [str(x.target.path) for x in result.copied_files], ["three.txt"]
+        )
+        self.assertListEqual(result.removed_files, [])
+
@@ -134,6 +134,28 @@ class TestTreeModule(unittest.TestCase):
 
         self.assertEqual(result, expected_result)
 
+    def test_hash_files(self):
+        file_a_path = get_named_tmpfile_path()
+
+        fill_tmpfile(file_a_path)
+
+        directory_instance = Directory(
+            {"a": Directory({}, {"file_a.txt": File(file_a_path)})}
+        )
+
+        expected_result = transform.file_as_hashid(file_a_path)
+
+        result = directory.hash_files(directory_instance)
+
+        self.assertEqual(
+            result.directories["a"].files["file_a.txt"].hashid,
+            expected_result,
+        )
+        self.assertEqual(
+            directory.serialize_as_hashid(result),
+            directory.serialize_as_hashid(directory_instance),
+        )
+
     def test_load_from_directory_path(self):
         directory_instance = Directory()
         fake_file_path = Path()
@@ -224,3 +246,425 @@ class TestTreeModule(unittest.TestCase):
         result = differences.serialize_as_messages(differences_instance)
 
         self.assertListEqual(result, expected_result)
+
+    def test_compare_removed_directory(self):
+        directory_old_instance = Directory(
+            {"a": Directory({}, {"file_a.txt": File(Path("a/file_a.txt"))})}
+        )
+
+        differences_instance = directory.compare(
+            Path(), directory_old_instance, Directory()
+        )
+
+        expected_result = ["removed: a/file_a.txt"]
+        result = differences.serialize_as_messages(differences_instance)
+
+        self.assertListEqual(result, expected_result)
+
+    def test_normalize_paths(self):
+        expected_result = ["a", "a.txt", "b/c"]
+        result = directory.normalize_paths(["b/c", "a/b", "a", "a.txt", "a"])
+
+        self.assertListEqual(result, expected_result)
+
+    def test_replace_entry(self):
+        file_instance = File(Path("a/b/file.txt"))
+
+        directory_instance = Directory({"c": Directory()})
+
+        result = directory.replace_entry(
+            directory_instance, ["a", "b", "file.txt"], file_instance
+        )
+
+        self.assertIs(
+            result.directories["c"], directory_instance.directories["c"]
+        )
+        self.assertIs(
+            result.directories["a"].directories["b"].files["file.txt"],
+            file_instance,
+        )
+
+        result = directory.replace_entry(result, ["a", "b", "file.txt"], None)
+
+        self.assertListEqual(list(result.directories.keys()), ["c"])
+
+    def test_filter_paths(self):
+        file_a_instance = File(Path("a/file_a.txt"))
+        file_b_instance = File(Path("b/file_b.txt"))
+
+        directory_instance = Directory(
+            {
+                "a": Directory({}, {"file_a.txt": file_a_instance}),
+                "b": Directory({}, {"file_b.txt": file_b_instance}),
+            }
+        )
+
+        expected_result = {
+            "directories": {
+                "b": {
+                    "directories": {},
+                    "files": {
+                        "file_b.txt": file.serialize_as_dict(file_b_instance)
+                    },
+                }
+            },
+            "files": {},
+        }
+        result = directory.serialize_as_dict(
+            directory.filter_paths(directory_instance, ["b", "c/file.txt"])
+        )
+
+        self.assertDictEqual(result, expected_result)
+
+    def test_load_from_paths(self):
+        result = {}
+        expected_result = {}
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            with open(tmppath.joinpath(".ignore"), "w") as f:
+                f.write("*.tmp")
+
+            for name in ["a/foo.txt", "a/foo.tmp", "b/bar.txt"]:
+                os.makedirs(tmppath.joinpath(name).parent, exist_ok=True)
+
+                with open(tmppath.joinpath(name), "w") as f:
+                    f.write(name)
+
+            expected_result = {
+                "directories": {
+                    "a": {
+                        "directories": {},
+                        "files": {
+                            "foo.txt": file.serialize_as_dict(
+                                File(tmppath.joinpath("a/foo.txt"))
+                            )
+                        },
+                    }
+                },
+                "files": {},
+            }
+
+            result = directory.serialize_as_dict(
+                directory.load_from_paths(
+                    tmppath, ["a/foo.txt", "a/foo.tmp", "c"]
+                )
+            )
+
+        self.assertDictEqual(result, expected_result)
+
+    def test_compare_blobs(self):
+        result = []
+        expected_result = [
+            "added: b/file_b.txt",
+            "updated: a/file_a.txt",
+            "removed: a/file_c.txt",
+            "removed: c/file_d.txt",
+        ]
+
+        def create_file(path: Path, content: str) -> File:
+            with open(path, "w") as f:
+                f.write(content)
+
+            return File(path)
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = tmppath.joinpath("blobs")
+
+            file_a_instance = create_file(tmppath.joinpath("a"), "a")
+            file_a_modified_instance = create_file(tmppath.joinpath("m"), "m")
+            file_b_instance = create_file(tmppath.joinpath("b"), "b")
+            file_c_instance = create_file(tmppath.joinpath("c"), "c")
+            file_d_instance = create_file(tmppath.joinpath("d"), "d")
+
+            unchanged_instance = Directory({}, {"file_e.txt": file_c_instance})
+
+            old_hashid = directory.store_as_blob(
+                blobs_path,
+                Directory(
+                    {
+                        "a": Directory(
+                            {},
+                            {
+                                "file_a.txt": file_a_instance,
+                                "file_c.txt": file_c_instance,
+                            },
+                        ),
+                        "c": Directory({}, {"file_d.txt": file_d_instance}),
+                        "e": unchanged_instance,
+                    }
+                ),
+            )
+
+            new_hashid = directory.store_as_blob(
+                blobs_path,
+                Directory(
+                    {
+                        "a": Directory(
+                            {}, {"file_a.txt": file_a_modified_instance}
+                        ),
+                        "b": Directory({}, {"file_b.txt": file_b_instance}),
+                        "e": unchanged_instance,
+                    }
+                ),
+            )
+
+            differences_instance = directory.compare_blobs(
+                blobs_path, old_hashid, new_hashid
+            )
+
+            result = differences.serialize_as_messages(differences_instance)
+
+            self.assertEqual(
+                differences_instance.updated_files[0].hashid,
+                transform.string_as_hashid("m"),
+            )
+
+        self.assertListEqual(sorted(result), sorted(expected_result))
+
+
+    def test_load_from_blob_paths(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = tmppath.joinpath("blobs")
+
+            file_path = tmppath.joinpath("a")
+
+            with open(file_path, "w") as f:
+                f.write("a")
+
+            tree_hashid = directory.store_as_blob(
+                blobs_path,
+                Directory(
+                    {
+                        "a": Directory({}, {"file_a.txt": File(file_path)}),
+                        "b": Directory({}, {"file_b.txt": File(file_path)}),
+                    },
+                    {"file_c.txt": File(file_path)},
+                ),
+            )
+
+            result = directory.load_from_blob_paths(
+                blobs_path, tree_hashid, ["a/file_a.txt", "file_c.txt", "d"]
+            )
+
+        self.assertListEqual(list(result.directories.keys()), ["a"])
+        self.assertListEqual(
+            list(result.directories["a"].files.keys()), ["file_a.txt"]
+        )
+        self.assertListEqual(list(result.files.keys()), ["file_c.txt"])
+
+    def test_get_blob_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = tmppath.joinpath("blobs")
+
+            file_path = tmppath.joinpath("a")
+
+            with open(file_path, "w") as f:
+                f.write("a")
+
+            file_hashid = transform.file_as_hashid(file_path)
+
+            tree_hashid = directory.store_as_blob(
+                blobs_path,
+                Directory(
+                    {
+                        "a": Directory(
+                            {"b": Directory({}, {"c.txt": File(file_path)})},
+                            {"d.txt": File(file_path)},
+                        ),
+                        "e": Directory({}, {"f.txt": File(file_path)}),
+                    },
+                    {},
+                ),
+            )
+
+            loaded: List[str] = []
+
+            load_blob_as_dict = directory.load_blob_as_dict
+
+            def load_counting(path, hashid):
+                loaded.append(hashid)
+
+                return load_blob_as_dict(path, hashid)
+
+            directory.load_blob_as_dict = load_counting
+
+            try:
+                result = directory.get_blob_entries(
+                    blobs_path,
+                    tree_hashid,
+                    ["a/b/c.txt", "/a/d.txt", "a/b", "a/x/y.txt", "z"],
+                )
+            finally:
+                directory.load_blob_as_dict = load_blob_as_dict
+
+        # the root, a and a/b are each loaded once, e is never loaded
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(len(set(loaded)), 3)
+
+        self.assertEqual(result["a/b/c.txt"], ("files", file_hashid))
+        self.assertEqual(result["/a/d.txt"], ("files", file_hashid))
+        self.assertEqual(result["a/b"][0], "directories")
+        self.assertIsNone(result["a/x/y.txt"])
+        self.assertIsNone(result["z"])
+
+    def test_normalize_paths(self):
+        self.assertListEqual(
+            directory.normalize_paths(["a/b", "a", "c/d"]), ["a", "c/d"]
+        )
+
+        for item_path in ["../a", "a/../b", "/a", "a//b", ""]:
+            with self.assertRaises(ValueError):
+                directory.normalize_paths([item_path])
+
+    def test_graft_blob(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = tmppath.joinpath("blobs")
+
+            file_path = tmppath.joinpath("a")
+
+            with open(file_path, "w") as f:
+                f.write("a")
+
+            file_hashid = transform.file_as_hashid(file_path)
+
+            unchanged_hashid = directory.store_as_blob(
+                blobs_path, Directory({}, {"file_b.txt": File(file_path)})
+            )
+
+            tree_hashid = directory.store_as_blob(
+                blobs_path,
+                Directory(
+                    {
+                        "a": Directory({}, {"file_a.txt": File(file_path)}),
+                        "b": Directory({}, {"file_b.txt": File(file_path)}),
+                    }
+                ),
+            )
+
+            grafted_hashid = directory.graft_blob(
+                blobs_path,
+                tree_hashid,
+                ["c", "d", "file_d.txt"],
+                ("files", file_hashid),
+            )
+
+            removed_hashid = directory.graft_blob(
+                blobs_path, grafted_hashid, ["a", "file_a.txt"], None
+            )
+
+            result = fs.load_blob_as_dict(blobs_path, removed_hashid)
+
+            result_c = directory.load_blob_as_dict(
+                blobs_path, result["directories"]["c"]
+            )
+
+        self.assertDictEqual(
+            result["directories"],
+            {"b": unchanged_hashid, "c": result["directories"]["c"]},
+        )
+        self.assertListEqual(list(result_c["directories"].keys()), ["d"])
+
+    def test_update_blob(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = tmppath.joinpath("blobs")
+
+            file_path = tmppath.joinpath("a")
+
+            with open(file_path, "w") as f:
+                f.write("a")
+
+            file_hashid = transform.file_as_hashid(file_path)
+
+            tree_hashid = directory.store_as_blob(
+                blobs_path,
+                Directory(
+                    {
+                        "a": Directory(
+                            {"b": Directory({}, {"c.txt": File(file_path)})}
+                        ),
+                        "d": Directory({}, {"e.txt": File(file_path)}),
+                    }
+                ),
+            )
+
+            before = set(fs.list_blobs(blobs_path))
+
+            updated_hashid = directory.update_blob(
+                blobs_path,
+                tree_hashid,
+                {
+                    "a/b/f.txt": ("files", file_hashid),
+                    "a/b/g.txt": ("files", file_hashid),
+                    "d/e.txt": None,
+                },
+            )
+
+            written = set(fs.list_blobs(blobs_path)) - before
+
+            result = directory.serialize_as_dict(
+                directory.load_from_blob(blobs_path, updated_hashid)
+            )
+
+        # root, a and a/b are written once, d ended up empty
+        self.assertEqual(len(written), 3)
+        self.assertListEqual(list(result["directories"].keys()), ["a"])
+        self.assertListEqual(
+            sorted(result["directories"]["a"]["directories"]["b"]["files"]),
+            ["c.txt", "f.txt", "g.txt"],
+        )
+
+    def test_store_directory_path_as_blob(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            working_path = Path(tmpdirname).joinpath("working")
+            blobs_path = Path(tmpdirname).joinpath("blobs")
+
+            for item_path, content in [
+                ("a.txt", "a"),
+                ("b/c.txt", "c"),
+                ("b/d/e.c4d", "e"),
+                ("b/d/f.txt", "f"),
+                ("g/h.txt", "h"),
+            ]:
+                file_path = working_path.joinpath(item_path)
+
+                os.makedirs(file_path.parent, exist_ok=True)
+
+                with open(file_path, "w") as f:
+                    f.write(content)
+
+            os.makedirs(working_path.joinpath("empty", "nested"))
+
+            with open(working_path.joinpath("b", ".ignore"), "w") as f:
+                f.write("\n".join(["*", "^*.c4d"]))
+
+            result = directory.store_directory_path_as_blob(
+                blobs_path, working_path, [], ["g"]
+            )
+
+            expected_result = directory.store_as_blob(
+                blobs_path,
+                directory.load_from_directory_path(working_path, [], ["g"]),
+            )
+
+            stored = directory.serialize_as_dict(
+                directory.load_from_blob(blobs_path, result)
+            )
+
+        self.assertEqual(result, expected_result)
+        self.assertListEqual(sorted(stored["directories"]), ["b"])
+        self.assertListEqual(
+            sorted(stored["directories"]["b"]["directories"]["d"]["files"]),
+            ["e.c4d"],
+        )
@@ -48,6 +48,15 @@ class TestCommitModule(unittest.TestCase):
 
         self.assertEqual(file.serialize_as_dict(result), expected_result)
 
+    def test_deserialize_from_dict_blob(self):
+        file_instance = File(Path("foo"), True, Path("bar"), "baz")
+
+        result = file.deserialize_from_dict(
+            file.serialize_as_dict(file_instance)
+        )
+
+        self.assertEqual(result, file_instance)
+
     def test_store_as_blob(self):
         file_hashid = ""
 
@@ -1,3 +1,4 @@
+import io
 import unittest
 import tempfile
 import json
@@ -7,6 +8,7 @@ from typing import List
 
 
 from snapfs import fs, transform
+from snapfs.datatypes import Layout
 
 
 def get_named_tmpfile_path():
@@ -134,6 +136,135 @@ class TestFSModule(unittest.TestCase):
 
         self.assertEqual(result, expected_result)
 
+    def test_copy_stream_as_blob(self):
+        data = b"hello world"
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            directory = Path(tmpdirname).joinpath("blobs")
+
+            result = fs.copy_stream_as_blob(directory, io.BytesIO(data))
+
+            # storing the same contents again leaves no temporary file
+            fs.copy_stream_as_blob(directory, io.BytesIO(data))
+
+            names = [x.name for x in directory.iterdir() if x.is_file()]
+
+            with open(fs.get_blob_path(directory, result), "rb") as f:
+                content = f.read()
+
+        self.assertEqual(result, transform.bytes_as_hashid(data))
+        self.assertEqual(content, data)
+        self.assertListEqual(names, [])
+
+    def test_list_blobs(self):
+        data = {"hello": "world"}
+
+        result = []
+        expected_result = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            hashid = fs.store_dict_as_blob(Path(tmpdirname), data)
+
+            expected_result = [
+                (
+                    hashid,
+                    Path(tmpdirname).joinpath(
+                        transform.hashid_as_path(hashid)
+                    ),
+                )
+            ]
+
+            result = list(fs.list_blobs(Path(tmpdirname)))
+
+        self.assertListEqual(result, expected_result)
+
+    def test_get_blob_path(self):
+        hashid = transform.string_as_hashid("foo")
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            default_result = fs.get_blob_path(tmppath, hashid)
+
+            fs.store_layouts(tmppath, Layout(2, 3))
+
+            result = fs.get_blob_path(tmppath, hashid)
+
+        self.assertEqual(
+            default_result, tmppath.joinpath(hashid[:2], hashid[2:])
+        )
+        self.assertEqual(
+            result, tmppath.joinpath(hashid[:3], hashid[3:6], hashid[6:])
+        )
+
+    def test_find_blob_during_migration(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            hashid = fs.store_dict_as_blob(tmppath, {"hello": "world"})
+
+            # objects have not been moved yet
+            fs.store_layouts(tmppath, Layout(2, 2), Layout())
+
+            result = fs.load_blob_as_dict(tmppath, hashid)
+
+        self.assertDictEqual(result, {"hello": "world"})
+
+    def test_migrate_layout(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            hashids = [
+                fs.store_dict_as_blob(tmppath, {"index": i}) for i in range(3)
+            ]
+
+            moved = fs.migrate_layout(tmppath, Layout(2, 1))
+
+            result = [fs.load_blob_as_dict(tmppath, x) for x in hashids]
+            paths = [x[1] for x in fs.list_blobs(tmppath)]
+            layouts = fs.load_layouts(tmppath)
+
+            again_moved = fs.migrate_layout(tmppath, Layout(2, 1))
+
+        self.assertEqual(moved, 3)
+        self.assertEqual(again_moved, 0)
+        self.assertListEqual(result, [{"index": i} for i in range(3)])
+        self.assertListEqual(
+            sorted(paths),
+            sorted(
+                tmppath.joinpath(x[0], x[1], x[2:])
+                for x in hashids
+            ),
+        )
+        self.assertEqual(layouts, (Layout(2, 1), None))
+
+    def test_migrate_layout_without_shards(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            first_hashid = fs.store_dict_as_blob(tmppath, {"index": 0})
+
+            first_moved = fs.migrate_layout(tmppath, Layout(0, 2))
+
+            second_hashid = fs.store_dict_as_blob(tmppath, {"index": 1})
+
+            # objects in the root are listed, the layout file is not
+            names = [x[0] for x in fs.list_blobs(tmppath)]
+
+            second_moved = fs.migrate_layout(tmppath, Layout(1, 2))
+
+            path = fs.find_blob(tmppath, second_hashid)
+
+            result = fs.load_blob_as_dict(tmppath, second_hashid)
+
+        self.assertEqual(first_moved, 1)
+        self.assertEqual(second_moved, 2)
+        self.assertListEqual(names, sorted([first_hashid, second_hashid]))
+        self.assertEqual(
+            path, tmppath.joinpath(second_hashid[:2], second_hashid[2:])
+        )
+        self.assertDictEqual(result, {"index": 1})
+
     def test_load_ignore_file_as_patterns(self):
         result = []
         expected_result = ["*", "^*.c4d"]
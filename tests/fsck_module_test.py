@@ -0,0 +1,190 @@
+import stat
+import time
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import fsck, repository, commit, branch, fs, hashing, transform
+from snapfs import stage
+from snapfs.datatypes import Author, Branch, Commit, File, Layout
+
+
+def initialize_repository(path: Path) -> str:
+    repository.initialize(path)
+
+    blobs_path = repository.get_blobs_path(path)
+
+    file_hashid = fs.store_dict_as_blob(blobs_path, {"foo": "bar"})
+
+    tree_hashid = fs.store_dict_as_blob(
+        blobs_path, {"directories": {}, "files": {"foo.json": file_hashid}}
+    )
+
+    commit_hashid = commit.store_as_blob(
+        blobs_path, Commit(Author("beesperester"), "initial", tree_hashid)
+    )
+
+    branch.store_as_file(
+        repository.get_branch_path(path, "main", False),
+        Branch(commit_hashid),
+    )
+
+    return file_hashid
+
+
+def get_blob_path(path: Path, hashid: str) -> Path:
+    return repository.get_blobs_path(path).joinpath(
+        transform.hashid_as_path(hashid)
+    )
+
+
+class TestFsckModule(unittest.TestCase):
+    def test_fsck(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            result = fsck.fsck(tmppath, hashing.SERIAL)
+
+        self.assertTrue(result.complete)
+        self.assertEqual(result.checked, 3)
+        self.assertListEqual(fsck.serialize_as_messages(result), [])
+
+    def test_fsck_corrupt(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            file_hashid = initialize_repository(tmppath)
+
+            blob_path = get_blob_path(tmppath, file_hashid)
+
+            blob_path.chmod(stat.S_IWRITE | stat.S_IREAD)
+
+            with open(blob_path, "w") as f:
+                f.write("rotten")
+
+            result = fsck.fsck(tmppath, hashing.SERIAL)
+
+        self.assertListEqual(
+            fsck.serialize_as_messages(result),
+            ["corrupt: {}".format(file_hashid)],
+        )
+
+    def test_fsck_dangling(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            file_hashid = initialize_repository(tmppath)
+
+            fs.remove_file(get_blob_path(tmppath, file_hashid))
+
+            result = fsck.fsck(tmppath, hashing.SERIAL)
+
+        self.assertListEqual(
+            fsck.serialize_as_messages(result),
+            ["dangling: {}".format(file_hashid)],
+        )
+
+    def test_verify_batch_unreadable(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            file_hashid = initialize_repository(tmppath)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            unreadable_hashid = "a" * 64
+            vanished_hashid = "b" * 64
+
+            unreadable_path = get_blob_path(tmppath, unreadable_hashid)
+            unreadable_path.mkdir(parents=True)
+
+            result = fsck.verify_batch(
+                blobs_path,
+                [
+                    (file_hashid, get_blob_path(tmppath, file_hashid)),
+                    (unreadable_hashid, unreadable_path),
+                    (vanished_hashid, get_blob_path(tmppath, vanished_hashid)),
+                ],
+                hashing.SERIAL,
+            )
+
+        # unreadable objects are corrupt, vanished ones are left
+        # to the reference check
+        self.assertListEqual(result[0], [unreadable_hashid])
+
+    def test_fsck_staged(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            file_path = tmppath.joinpath("foo.txt")
+            file_path.write_text("foo")
+
+            # hashed when staged but only stored on commit
+            repository.stage_file(
+                tmppath,
+                stage.ADDED,
+                File(file_path, hashid=transform.file_as_hashid(file_path)),
+            )
+
+            result = fsck.fsck(tmppath, hashing.SERIAL)
+
+        self.assertListEqual(fsck.serialize_as_messages(result), [])
+
+    def test_fsck_resume(self):
+        results = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            for _ in range(3):
+                verification = fsck.fsck(
+                    tmppath, hashing.SERIAL, limit=2, batch_size=1
+                )
+
+                results.append((verification.checked, verification.complete))
+
+            stored_result = fsck.load_from_file(
+                repository.get_verification_path(tmppath)
+            )
+
+        self.assertListEqual(results, [(2, False), (3, True), (2, False)])
+        self.assertEqual(stored_result.checked, 2)
+
+    def test_fsck_layout_migration(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            fsck.fsck(tmppath, hashing.SERIAL, limit=1, batch_size=1)
+
+            # an interrupted migration leaves the previous layout behind
+            fs.store_layouts(blobs_path, Layout(2, 2), Layout())
+
+            with self.assertRaises(ValueError):
+                fsck.fsck(tmppath, hashing.SERIAL)
+
+            fs.migrate_layout(blobs_path, Layout(2, 2))
+
+            result = fsck.fsck(tmppath, hashing.SERIAL)
+
+        self.assertTrue(result.complete)
+        self.assertEqual(result.checked, 3)
+        self.assertListEqual(fsck.serialize_as_messages(result), [])
+
+    def test_throttle(self):
+        started = time.monotonic()
+
+        # 100 bytes at 1000 bytes per second take a tenth of a second
+        fsck.throttle(started, 100, 1000)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import garbage, repository, commit, branch, fs
+from snapfs.datatypes import Author, Branch, Commit
+
+
+def initialize_repository(path: Path) -> str:
+    repository.initialize(path)
+
+    blobs_path = repository.get_blobs_path(path)
+
+    file_hashid = fs.store_dict_as_blob(blobs_path, {"foo": "bar"})
+
+    tree_hashid = fs.store_dict_as_blob(
+        blobs_path, {"directories": {}, "files": {"foo.json": file_hashid}}
+    )
+
+    commit_hashid = commit.store_as_blob(
+        blobs_path, Commit(Author("beesperester"), "initial", tree_hashid)
+    )
+
+    branch.store_as_file(
+        repository.get_branch_path(path, "main", False),
+        Branch(commit_hashid),
+    )
+
+    return fs.store_dict_as_blob(blobs_path, {"orphan": True})
+
+
+class TestGarbageModule(unittest.TestCase):
+    def test_mark(self):
+        result = 0
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            orphan_hashid = initialize_repository(tmppath)
+
+            marked = garbage.mark(tmppath)
+
+            result = len(marked)
+
+            self.assertNotIn(orphan_hashid, marked)
+
+        self.assertEqual(result, 3)
+
+    def test_collect(self):
+        result = []
+        expected_result = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            orphan_hashid = initialize_repository(tmppath)
+
+            expected_result = [orphan_hashid]
+
+            result = garbage.collect(tmppath, grace_period=0)
+
+            blobs = list(fs.list_blobs(repository.get_blobs_path(tmppath)))
+
+            self.assertEqual(len(blobs), 3)
+
+        self.assertListEqual(result, expected_result)
+
+    def test_collect_grace_period(self):
+        result = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            result = garbage.collect(tmppath)
+
+        self.assertListEqual(result, [])
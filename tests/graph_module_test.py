@@ -0,0 +1,65 @@
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import graph, commit, directory, fs
+from snapfs.datatypes import Author, Commit, Directory
+
+
+class TestGraphModule(unittest.TestCase):
+    def test_iterate(self):
+        result = []
+        expected_result = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            blobs_path = Path(tmpdirname)
+
+            file_hashid = fs.store_dict_as_blob(blobs_path, {"foo": "bar"})
+
+            tree_hashid = fs.store_dict_as_blob(
+                blobs_path,
+                {"directories": {}, "files": {"foo.json": file_hashid}},
+            )
+
+            first_commit_hashid = commit.store_as_blob(
+                blobs_path, Commit(Author("beesperester"), "first")
+            )
+
+            second_commit_hashid = commit.store_as_blob(
+                blobs_path,
+                Commit(
+                    Author("beesperester"),
+                    "second",
+                    tree_hashid,
+                    [first_commit_hashid],
+                ),
+            )
+
+            expected_result = [
+                (graph.COMMIT, second_commit_hashid),
+                (graph.TREE, tree_hashid),
+                (graph.COMMIT, first_commit_hashid),
+                (graph.FILE, file_hashid),
+            ]
+
+            result = list(graph.iterate(blobs_path, [second_commit_hashid]))
+
+        self.assertCountEqual(result, expected_result)
+
+    def test_mark(self):
+        result = 0
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            blobs_path = Path(tmpdirname)
+
+            tree_hashid = directory.store_as_blob(blobs_path, Directory())
+
+            commit_hashid = commit.store_as_blob(
+                blobs_path,
+                Commit(Author("beesperester"), "initial", tree_hashid),
+            )
+
+            result = len(graph.mark(blobs_path, [commit_hashid]))
+
+        self.assertEqual(result, 2)
@@ -0,0 +1,34 @@
+import unittest
+
+from snapfs import transform
+from snapfs.hashidset import HashidSet, is_hashid
+
+
+class TestHashidSetModule(unittest.TestCase):
+    def test_add(self):
+        hashid = transform.string_as_hashid("foo")
+
+        hashid_set = HashidSet()
+
+        self.assertTrue(hashid_set.add(hashid))
+        self.assertFalse(hashid_set.add(hashid))
+        self.assertEqual(len(hashid_set), 1)
+
+    def test_contains(self):
+        hashids = [transform.string_as_hashid(str(x)) for x in range(2000)]
+
+        hashid_set = HashidSet(hashids[:1000], capacity=16)
+
+        self.assertTrue(all(x in hashid_set for x in hashids[:1000]))
+        self.assertFalse(any(x in hashid_set for x in hashids[1000:]))
+
+    def test_iter(self):
+        hashids = [transform.string_as_hashid(str(x)) for x in range(100)]
+
+        result = sorted(HashidSet(hashids))
+
+        self.assertListEqual(result, sorted(hashids))
+
+    def test_is_hashid(self):
+        self.assertTrue(is_hashid(transform.string_as_hashid("foo")))
+        self.assertFalse(is_hashid("foobar"))
@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import hashing, transform
+
+
+def create_files(path: Path, count: int) -> list:
+    paths = []
+
+    for i in range(count):
+        file_path = path.joinpath("file_{}.txt".format(i))
+
+        with open(file_path, "w") as f:
+            f.write("content {}".format(i))
+
+        paths.append(file_path)
+
+    return paths
+
+
+class TestHashingModule(unittest.TestCase):
+    def test_get_batch_size(self):
+        self.assertEqual(hashing.get_batch_size(10, 4), hashing.MIN_BATCH_SIZE)
+        self.assertEqual(hashing.get_batch_size(1600, 4), 100)
+        self.assertEqual(
+            hashing.get_batch_size(10 ** 8, 4), hashing.MAX_BATCH_SIZE
+        )
+
+    def test_hash_path(self):
+        result = ()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            file_path = create_files(Path(tmpdirname), 1)[0]
+
+            result = hashing.hash_path(file_path)
+
+        self.assertEqual(result[0], file_path)
+        self.assertEqual(result[1], transform.string_as_hashid("content 0"))
+        self.assertEqual(result[2].st_size, len("content 0"))
+
+    def test_hash_paths(self):
+        expected_result = [
+            transform.string_as_hashid("content {}".format(i))
+            for i in range(40)
+        ]
+
+        for backend in hashing.BACKENDS:
+            with tempfile.TemporaryDirectory() as tmpdirname:
+                paths = create_files(Path(tmpdirname), 40)
+
+                results = list(
+                    hashing.hash_paths(paths, backend, 2, batch_size=8)
+                )
+
+            self.assertListEqual([x[0] for x in results], paths)
+            self.assertListEqual([x[1] for x in results], expected_result)
+
+    def test_hash_paths_backend(self):
+        # raised on the call, before anything is iterated
+        with self.assertRaises(ValueError):
+            hashing.hash_paths([], "foobar")
+
+        with self.assertRaises(ValueError):
+            with hashing.open_executor("foobar"):
+                pass
+
+    def test_hash_paths_executor(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            paths = create_files(Path(tmpdirname), 20)
+
+            with hashing.open_executor(hashing.PROCESS, 2) as executor:
+                results = [
+                    list(
+                        hashing.hash_paths(
+                            paths[i : i + 10],
+                            hashing.PROCESS,
+                            executor=executor,
+                        )
+                    )
+                    for i in [0, 10]
+                ]
+
+        self.assertListEqual(
+            [x[0] for x in [*results[0], *results[1]]], paths
+        )
@@ -0,0 +1,12 @@
+from pathlib import Path
+from typing import Union
+
+
+def write_file(path: Path, content: Union[str, bytes]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(content)
@@ -0,0 +1,127 @@
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import fs, index, repository, transform
+
+
+class TestIndexModule(unittest.TestCase):
+    def test_contains(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            directory = Path(tmpdirname)
+
+            self.assertIsNone(index.contains(directory, "a" * 64))
+
+            index.rebuild(directory, ["a" * 64])
+
+            self.assertTrue(index.contains(directory, "a" * 64))
+            self.assertFalse(index.contains(directory, "b" * 64))
+
+            index.add(directory, "b" * 64)
+
+            self.assertTrue(index.contains(directory, "b" * 64))
+
+            index.discard(directory)
+
+            self.assertIsNone(index.contains(directory, "a" * 64))
+
+    def test_load_index(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            directory = Path(tmpdirname)
+
+            hashids = [transform.string_as_hashid(str(i)) for i in range(10)]
+
+            index.rebuild(directory, hashids[:5])
+
+            # append like another process would
+            with open(index.get_index_path(directory), "ab") as f:
+                for hashid in hashids[5:]:
+                    f.write(bytes.fromhex(hashid))
+
+            index_instance = index.load_index(directory)
+
+            self.assertIsNotNone(index_instance)
+
+            for hashid in hashids:
+                self.assertIn(hashid, index_instance)
+
+            self.assertNotIn("a" * 64, index_instance)
+
+    def test_blobs(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            hashid = fs.store_dict_as_blob(blobs_path, {"foo": "bar"})
+
+            self.assertTrue(index.contains(blobs_path, hashid))
+            self.assertTrue(fs.is_blob(blobs_path, hashid))
+            self.assertFalse(fs.is_blob(blobs_path, "a" * 64))
+
+            # storing again finds the object through the index
+            self.assertEqual(
+                fs.store_dict_as_blob(blobs_path, {"foo": "bar"}), hashid
+            )
+
+            index.discard(blobs_path)
+
+            self.assertTrue(fs.is_blob(blobs_path, hashid))
+
+            self.assertEqual(repository.rebuild_index(tmppath), 1)
+            self.assertTrue(index.contains(blobs_path, hashid))
+
+    def test_add_after_other_writers(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            directory = Path(tmpdirname)
+
+            hashids = [transform.string_as_hashid(str(i)) for i in range(3)]
+
+            index.rebuild(directory, [])
+
+            self.assertFalse(index.contains(directory, hashids[0]))
+
+            # another process appends before the next refresh
+            with open(index.get_index_path(directory), "ab") as f:
+                f.write(bytes.fromhex(hashids[0]))
+
+            index.add(directory, hashids[1])
+
+            index_instance = index.get_index(directory)
+
+            self.assertIsNotNone(index_instance)
+            self.assertEqual(index_instance.offset, 64)
+
+            for hashid in hashids[:2]:
+                self.assertIn(hashid, index_instance)
+
+    def test_rebuild_since(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            directory = Path(tmpdirname)
+
+            hashids = [transform.string_as_hashid(str(i)) for i in range(4)]
+
+            index.rebuild(directory, hashids[:2])
+
+            since = index.get_log_size(directory)
+
+            # stored while the objects to keep are gathered
+            with open(index.get_index_path(directory), "ab") as f:
+                for hashid in hashids[2:]:
+                    f.write(bytes.fromhex(hashid))
+
+            count = index.rebuild(
+                directory, hashids[1:2], since, {hashids[3]}
+            )
+
+            index_instance = index.load_index(directory)
+
+            self.assertIsNotNone(index_instance)
+
+            contained = [x in index_instance for x in hashids]
+
+        self.assertEqual(count, 2)
+        self.assertListEqual(contained, [False, True, True, False])
@@ -0,0 +1,183 @@
+import os
+import sys
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import monitor
+from snapfs.datatypes import Changes
+
+from helpers import write_file
+
+
+class TestMonitorModule(unittest.TestCase):
+    def test_get_dirty_paths(self):
+        changes = Changes({"foo": 1}, 1, False, 0, os.getpid())
+
+        self.assertListEqual(monitor.get_dirty_paths(changes), ["foo"])
+
+        changes.overflow = True
+
+        self.assertIsNone(monitor.get_dirty_paths(changes))
+
+        changes = Changes({"foo": 1}, 1, False, 0, 0)
+
+        self.assertIsNone(monitor.get_dirty_paths(changes))
+
+    def test_record(self):
+        result = Changes()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            changes_path = Path(tmpdirname).joinpath("changes")
+
+            monitor.record(changes_path, set(), True, os.getpid())
+            monitor.record(changes_path, {"foo", "bar"})
+
+            result = monitor.load_from_journal(changes_path)
+
+        self.assertDictEqual(result.paths, {"foo": 2, "bar": 2})
+        self.assertTrue(result.overflow)
+        self.assertEqual(result.overflow_generation, 1)
+
+    def test_record_limit(self):
+        result = Changes()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            changes_path = Path(tmpdirname).joinpath("changes")
+
+            monitor.record(changes_path, {"foo", "bar"}, limit=1)
+
+            result = monitor.load_from_journal(changes_path)
+
+        self.assertDictEqual(result.paths, {})
+        self.assertTrue(result.overflow)
+
+    def test_reset(self):
+        result = Changes()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            changes_path = Path(tmpdirname).joinpath("changes")
+
+            monitor.record(changes_path, {"foo"}, True, os.getpid())
+            monitor.record(changes_path, {"bar"})
+
+            # a scan started at generation 1 and changes
+            # of generation 2 happened during the scan
+            monitor.reset(changes_path, ["baz"], 1)
+
+            result = monitor.load_from_journal(changes_path)
+
+        self.assertDictEqual(result.paths, {"bar": 2, "baz": 1})
+        self.assertFalse(result.overflow)
+
+    def test_record_journal(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            changes_path = Path(tmpdirname).joinpath("changes")
+            journal_path = monitor.get_journal_path(changes_path)
+
+            monitor.record(changes_path, {"foo"})
+            monitor.record(changes_path, {"bar"})
+
+            # polls only append to the journal
+            stored = monitor.load_from_file(changes_path)
+            journal_exists = journal_path.is_file()
+
+            with open(journal_path, "a") as f:
+                f.write('{"paths": ["baz"')
+
+            result = monitor.load_from_journal(changes_path)
+
+            monitor.reset(changes_path, ["foo"], 2)
+
+            reset_journal_exists = journal_path.is_file()
+            reset_result = monitor.load_from_file(changes_path)
+
+        self.assertEqual(stored.generation, 0)
+        self.assertTrue(journal_exists)
+        # an interrupted append is ignored
+        self.assertDictEqual(result.paths, {"foo": 1, "bar": 2})
+        self.assertEqual(result.generation, 2)
+        self.assertFalse(reset_journal_exists)
+        self.assertDictEqual(reset_result.paths, {"foo": 2})
+
+    def test_polling_watcher(self):
+        result = set()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "foo")
+            write_file(tmppath.joinpath(".snapfs", "HEAD"), "{}")
+
+            watcher = monitor.PollingWatcher(tmppath)
+
+            write_file(tmppath.joinpath("a", "bar.txt"), "bar")
+            write_file(tmppath.joinpath(".snapfs", "stage"), "{}")
+            os.remove(tmppath.joinpath("a", "foo.txt"))
+
+            result, overflow = watcher.poll(0)
+
+            watcher.close()
+
+        self.assertSetEqual(result, {"a/foo.txt", "a/bar.txt"})
+        self.assertFalse(overflow)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "requires linux")
+    def test_inotify_watcher(self):
+        result = set()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "foo")
+
+            watcher = monitor.InotifyWatcher(tmppath)
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "bar")
+            write_file(tmppath.joinpath("b", "c", "baz.txt"), "baz")
+            write_file(tmppath.joinpath(".snapfs", "stage"), "{}")
+
+            result = set()
+
+            for _ in range(3):
+                paths, overflow = watcher.poll(0.1)
+
+                result.update(paths)
+
+            # new directories are watched as well
+            write_file(tmppath.joinpath("b", "c", "baz.txt"), "qux")
+
+            paths, overflow = watcher.poll(0.1)
+
+            result.update(paths)
+
+            watcher.close()
+
+        self.assertIn("a/foo.txt", result)
+        self.assertIn("b", result)
+        self.assertIn("b/c/baz.txt", result)
+        self.assertNotIn(".snapfs", result)
+        self.assertFalse(overflow)
+
+    def test_monitor(self):
+        result = Changes()
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            monitor_instance = monitor.Monitor(tmppath, 0, polling=True)
+
+            write_file(tmppath.joinpath("foo.txt"), "foo")
+
+            monitor_instance.poll()
+
+            result = monitor.load_from_journal(monitor_instance.changes_path)
+
+            monitor_instance.close()
+
+            closed = monitor.load_from_journal(monitor_instance.changes_path)
+
+        self.assertDictEqual(result.paths, {"foo.txt": 2})
+        self.assertEqual(result.pid, os.getpid())
+        self.assertEqual(closed.pid, 0)
@@ -0,0 +1,188 @@
+import difflib
+import io
+import unittest
+import tempfile
+
+from array import array
+from pathlib import Path
+
+from snapfs import fs, patch
+
+
+def get_lines(count: int) -> list:
+    return ["line {}\n".format(i) for i in range(count)]
+
+
+class TestPatchModule(unittest.TestCase):
+    def test_iterate_opcodes(self):
+        a = array("q", [1, 2, 3, 4, 5])
+        b = array("q", [1, 3, 4, 6, 5])
+
+        expected_result = [
+            ("equal", 0, 1, 0, 1),
+            ("delete", 1, 2, 1, 1),
+            ("equal", 2, 4, 1, 3),
+            ("insert", 4, 4, 3, 4),
+            ("equal", 4, 5, 4, 5),
+        ]
+        result = list(patch.iterate_opcodes(a, b))
+
+        self.assertListEqual(result, expected_result)
+
+    def test_find_middle_snake(self):
+        a = array("q", [1, 2, 3])
+        b = array("q", [4, 2, 5])
+
+        self.assertTupleEqual(
+            patch.find_middle_snake(a, 0, 3, b, 0, 3), (2, 2)
+        )
+        self.assertTupleEqual(
+            patch.find_middle_snake(a, 0, 1, b, 0, 1), (-1, -1)
+        )
+
+    def test_find_middle_snake_max_cost(self):
+        a = array("q", [1, 2, 3, 4, 5, 6, 7, 8])
+        b = array("q", [9, 1, 2, 10, 11, 5, 12, 8])
+
+        x, y = patch.find_middle_snake(a, 0, 8, b, 0, 8, max_cost=1)
+
+        # the end of the backward snake over the common last line
+        self.assertTupleEqual((x, y), (7, 7))
+
+    def test_iterate_opcodes_bounded(self):
+        a = array("q", [i % 7 for i in range(3000)])
+        b = array("q", [i % 5 for i in range(3000)])
+
+        result = []
+
+        for tag, a_lo, a_hi, b_lo, b_hi in patch.iterate_opcodes(a, b):
+            if tag == "equal":
+                self.assertEqual(a[a_lo:a_hi], b[b_lo:b_hi])
+
+            result.extend(b[b_lo:b_hi])
+
+        self.assertEqual(array("q", result), b)
+
+    def test_verify_edits(self):
+        old_index = patch.LineIndex(io.BytesIO(b"a\nb\nc\n"))
+        new_index = patch.LineIndex(io.BytesIO(b"a\nx\nc\n"))
+
+        # force a collision of different lines
+        new_index.hashes[1] = old_index.hashes[1]
+
+        edits = patch.iterate_edits(old_index.hashes, new_index.hashes)
+
+        result = list(
+            patch.merge_edits(patch.verify_edits(edits, old_index, new_index))
+        )
+
+        self.assertListEqual(
+            result,
+            [
+                ("equal", 0, 1, 0, 1),
+                ("replace", 1, 2, 1, 2),
+                ("equal", 2, 3, 2, 3),
+            ],
+        )
+
+    def test_compare_streams(self):
+        old = get_lines(100)
+        new = [*old[:10], *old[11:50], "changed\n", *old[51:], "new\n"]
+
+        expected_result = list(
+            difflib.unified_diff(old, new, "a/foo.txt", "b/foo.txt")
+        )
+
+        result = list(
+            patch.compare_streams(
+                io.BytesIO("".join(old).encode()),
+                io.BytesIO("".join(new).encode()),
+                "a/foo.txt",
+                "b/foo.txt",
+            )
+        )
+
+        self.assertListEqual(result, expected_result)
+
+    def test_compare_streams_equal(self):
+        data = "".join(get_lines(10)).encode()
+
+        result = list(
+            patch.compare_streams(io.BytesIO(data), io.BytesIO(data))
+        )
+
+        self.assertListEqual(result, [])
+
+    def test_compare_streams_binary(self):
+        expected_result = ["Binary files a and b differ\n"]
+
+        result = list(
+            patch.compare_streams(
+                io.BytesIO(b"foo\0bar"), io.BytesIO(b"foo\nbar")
+            )
+        )
+
+        self.assertListEqual(result, expected_result)
+
+    def test_compare_streams_no_newline(self):
+        expected_result = [
+            "--- a\n",
+            "+++ b\n",
+            "@@ -1 +1 @@\n",
+            "-foo\n",
+            "\\ No newline at end of file\n",
+            "+foo\n",
+        ]
+
+        result = list(
+            patch.compare_streams(io.BytesIO(b"foo"), io.BytesIO(b"foo\n"))
+        )
+
+        self.assertListEqual(result, expected_result)
+
+    def test_compare_streams_long_lines(self):
+        long_line = "x" + "é" * patch.LINE_SIZE
+
+        old = [long_line + "1\n", "a\n", long_line + "\n", "b\n"]
+        new = [long_line + "2\n", "a\n", long_line + "\n", "c\n"]
+
+        expected_result = "".join(difflib.unified_diff(old, new, "a", "b"))
+
+        # long lines are written in pieces
+        result = "".join(
+            patch.compare_streams(
+                io.BytesIO("".join(old).encode()),
+                io.BytesIO("".join(new).encode()),
+            )
+        )
+
+        self.assertEqual(result, expected_result)
+
+    def test_compare_blobs(self):
+        old = get_lines(5)
+        new = [*old[:2], *old[3:]]
+
+        expected_result = list(difflib.unified_diff(old, new, "a", "b"))
+
+        result = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            hashids = []
+
+            for name, lines in [("old", old), ("new", new)]:
+                with open(tmppath.joinpath(name), "w") as f:
+                    f.write("".join(lines))
+
+                hashids.append(
+                    fs.copy_file_as_blob(
+                        tmppath.joinpath("blobs"), tmppath.joinpath(name)
+                    )
+                )
+
+            result = list(
+                patch.compare_blobs(tmppath.joinpath("blobs"), *hashids)
+            )
+
+        self.assertListEqual(result, expected_result)
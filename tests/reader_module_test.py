@@ -0,0 +1,100 @@
+import io
+import os
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import delta, fs, reader, repository, worktree
+from snapfs.datatypes import Author
+
+from helpers import write_file
+
+
+class TestReaderModule(unittest.TestCase):
+    def test_open_blob(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            blobs_path = Path(tmpdirname).joinpath("blobs")
+            source_path = Path(tmpdirname).joinpath("source")
+
+            content = os.urandom(100000)
+
+            write_file(source_path, content)
+
+            hashid = fs.copy_file_as_blob(blobs_path, source_path)
+
+            with reader.open_blob(blobs_path, hashid) as f:
+                self.assertTrue(f.seekable())
+                self.assertEqual(f.read(10), content[:10])
+                self.assertEqual(f.pread(5, 50000), content[50000:50005])
+
+                # range reads leave the position alone
+                self.assertEqual(f.tell(), 10)
+
+                f.seek(-10, io.SEEK_END)
+
+                self.assertEqual(f.read(), content[-10:])
+                self.assertEqual(f.read(), b"")
+                self.assertEqual(f.pread(10, len(content)), b"")
+
+                with self.assertRaises(ValueError):
+                    f.pread(200, -5)
+
+            self.assertEqual(
+                reader.read_range(blobs_path, hashid, 99990, 100),
+                content[99990:],
+            )
+
+    def test_open_blob_delta(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            blobs_path = Path(tmpdirname).joinpath("blobs")
+            source_path = Path(tmpdirname).joinpath("source")
+
+            base = os.urandom(10000)
+            content = base[:5000] + b"changed" + base[5000:]
+
+            write_file(source_path, base)
+
+            base_hashid = fs.copy_file_as_blob(blobs_path, source_path)
+
+            write_file(source_path, content)
+
+            hashid = fs.copy_file_as_blob(blobs_path, source_path)
+
+            delta.store_delta(
+                blobs_path,
+                hashid,
+                base_hashid,
+                len(content),
+                delta.encode(base, content),
+            )
+
+            with reader.open_blob(blobs_path, hashid) as f:
+                f.seek(5000)
+
+                self.assertEqual(f.read(7), b"changed")
+
+    def test_open_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            write_file(tmppath.joinpath("a", "b", "c.txt"), b"foo")
+            write_file(tmppath.joinpath("empty.txt"), b"")
+
+            commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "initial commit"
+            )
+
+            with reader.open_file(tmppath, commit_hashid, "a/b/c.txt") as f:
+                self.assertEqual(f.read(), b"foo")
+
+            with reader.open_file(tmppath, commit_hashid, "empty.txt") as f:
+                self.assertEqual(f.read(), b"")
+
+            with self.assertRaises(FileNotFoundError):
+                reader.open_file(tmppath, commit_hashid, "a/b")
+
+            with self.assertRaises(FileNotFoundError):
+                reader.open_file(tmppath, commit_hashid, "a//missing.txt")
@@ -17,8 +17,10 @@ from snapfs import (
     reference,
     commit,
     stage,
+    differences,
 )
 from snapfs.datatypes import Author, Branch, Commit, Stage, Tag, Head
+from snapfs.datatypes import File
 
 
 def get_named_tmpfile_path():
@@ -167,6 +169,28 @@ class TestRepositoryModule(unittest.TestCase):
 
         self.assertEqual(result, expected_result)
 
+    def test_get_branches(self):
+        branch_instance = Branch()
+
+        expected_result = {"main": branch.serialize_as_dict(branch_instance)}
+
+        result = {}
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            branch_path = repository.get_branch_path(tmppath, "main", False)
+
+            makedirs(branch_path.parent, exist_ok=True)
+
+            branch.store_as_file(branch_path, branch_instance)
+
+            result = {
+                key: branch.serialize_as_dict(value)
+                for key, value in repository.get_branches(tmppath).items()
+            }
+
+        self.assertDictEqual(result, expected_result)
+
     def test_get_reference(self):
         branch_instance = Branch()
         head_instance = Head("references/branches/main")
@@ -197,6 +221,31 @@ class TestRepositoryModule(unittest.TestCase):
 
         self.assertEqual(result, expected_result)
 
+    def test_store_reference(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            repository.store_reference(tmppath, "tags/v1", Tag("foo"))
+
+            for name in [
+                "branches/",
+                "branches/.",
+                "branches/../../../escaped",
+                "branches//escaped",
+                "tags/..\\escaped",
+                "heads/main",
+            ]:
+                with self.assertRaises(repository.NoReferenceError):
+                    repository.store_reference(tmppath, name, Branch("foo"))
+
+            result = repository.get_tags(tmppath)
+            escaped = tmppath.joinpath("escaped").exists()
+
+        self.assertDictEqual(result, {"v1": Tag("foo")})
+        self.assertFalse(escaped)
+
     def test_get_commit(self):
         author_instance = Author("beesperester")
 
@@ -222,6 +271,50 @@ class TestRepositoryModule(unittest.TestCase):
 
         self.assertEqual(result, expected_result)
 
+    def test_get_commit_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            file_hashid = fs.store_dict_as_blob(blobs_path, {"foo": "bar"})
+
+            sub_tree_hashid = fs.store_dict_as_blob(
+                blobs_path,
+                {"directories": {}, "files": {"foo.json": file_hashid}},
+            )
+
+            tree_hashid = fs.store_dict_as_blob(
+                blobs_path,
+                {"directories": {"sub": sub_tree_hashid}, "files": {}},
+            )
+
+            commit_hashid = commit.store_as_blob(
+                blobs_path,
+                Commit(Author("beesperester"), "initial", tree_hashid),
+            )
+
+            entry = repository.get_commit_entry(
+                tmppath, commit_hashid, "sub//foo.json"
+            )
+
+            root_entry = repository.get_commit_entry(
+                tmppath, commit_hashid, ""
+            )
+
+            entries = repository.get_commit_entries(
+                tmppath, commit_hashid, ["sub", "sub/bar.json"]
+            )
+
+        self.assertEqual(entry, ("files", file_hashid))
+        self.assertEqual(root_entry, ("directories", tree_hashid))
+        self.assertDictEqual(
+            entries,
+            {"sub": ("directories", sub_tree_hashid), "sub/bar.json": None},
+        )
+
     def test_get_latest_commit(self):
         author_instance = Author("beesperester")
 
@@ -264,6 +357,43 @@ class TestRepositoryModule(unittest.TestCase):
 
         self.assertEqual(result, expected_result)
 
+    def test_compare_commits(self):
+        author_instance = Author("beesperester")
+
+        result = []
+        expected_result = ["added: foo.json"]
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            blobs_path = repository.get_blobs_path(tmppath, False)
+
+            makedirs(blobs_path, exist_ok=True)
+
+            file_hashid = fs.store_dict_as_blob(blobs_path, {"foo": "bar"})
+
+            tree_hashid = fs.store_dict_as_blob(
+                blobs_path,
+                {"directories": {}, "files": {"foo.json": file_hashid}},
+            )
+
+            old_hashid = commit.store_as_blob(
+                blobs_path, Commit(author_instance, "initial commit")
+            )
+
+            new_hashid = commit.store_as_blob(
+                blobs_path,
+                Commit(
+                    author_instance, "second commit", tree_hashid, [old_hashid]
+                ),
+            )
+
+            result = differences.serialize_as_messages(
+                repository.compare_commits(tmppath, old_hashid, new_hashid)
+            )
+
+        self.assertListEqual(result, expected_result)
+
     def test_get_stage(self):
         stage_instance = Stage()
 
@@ -301,3 +431,79 @@ class TestRepositoryModule(unittest.TestCase):
             result = stage.serialize_as_dict(stage.load_from_file(stage_path))
 
         self.assertDictEqual(result, expected_result)
+
+    def test_stage_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            repository.stage_file(tmppath, stage.ADDED, File(Path("foo")))
+            repository.stage_file(tmppath, stage.REMOVED, File(Path("bar")))
+
+            result = repository.get_stage(tmppath)
+
+            repository.compact_stage(tmppath)
+
+            compacted_result = stage.load_from_file(
+                repository.get_stage_path(tmppath)
+            )
+
+            repository.store_stage(tmppath, Stage())
+
+            cleared_result = repository.get_stage(tmppath)
+
+        self.assertListEqual(result.added_files, [File(Path("foo"))])
+        self.assertListEqual(result.removed_files, [File(Path("bar"))])
+        self.assertEqual(compacted_result, result)
+        self.assertEqual(cleared_result, Stage())
+
+    def test_migrate_layout(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            commit_hashid = commit.store_as_blob(
+                repository.get_blobs_path(tmppath),
+                Commit(Author("beesperester"), "initial"),
+            )
+
+            repository.migrate_layout(tmppath, 3, 2)
+
+            commit_path = repository.get_commit_path(tmppath, commit_hashid)
+
+            result = repository.get_commit(tmppath, commit_hashid)
+
+        self.assertEqual(
+            commit_path.relative_to(repository.get_blobs_path(tmppath, False)),
+            Path(
+                commit_hashid[:2],
+                commit_hashid[2:4],
+                commit_hashid[4:6],
+                commit_hashid[6:],
+            ),
+        )
+        self.assertEqual(result.message, "initial")
+
+    def test_get_algorithm(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath, transform.BLAKE2B)
+
+            result = repository.get_algorithm(tmppath)
+
+            format_instance = fs.get_format(
+                repository.get_blobs_path(tmppath)
+            )
+
+            hashid = fs.store_dict_as_blob(
+                repository.get_blobs_path(tmppath), {"foo": "bar"}
+            )
+
+        self.assertEqual(result, transform.BLAKE2B)
+        self.assertEqual(format_instance.version, fs.FORMAT_VERSION)
+        self.assertEqual(
+            hashid, transform.dict_as_hashid({"foo": "bar"}, transform.BLAKE2B)
+        )
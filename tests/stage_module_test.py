@@ -1,6 +1,7 @@
 import unittest
 import tempfile
 import json
+import threading
 
 from pathlib import Path
 from typing import List
@@ -80,3 +81,175 @@ class TestStageModule(unittest.TestCase):
         result = stage.serialize_as_dict(stage.load_from_file(file_path))
 
         self.assertDictEqual(result, expected_result)
+
+    def test_load_from_journal(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            stage_path = tmppath.joinpath("stage")
+            journal_path = tmppath.joinpath("stage.journal")
+
+            file_path = tmppath.joinpath("foo")
+            file_path.write_text("foo")
+
+            hashid = transform.file_as_hashid(file_path)
+
+            stage.store_as_file(stage_path, Stage())
+
+            stage.append_to_journal(
+                journal_path, stage.ADDED, File(file_path, hashid=hashid)
+            )
+            stage.append_to_journal(
+                journal_path, stage.REMOVED, File(tmppath.joinpath("bar"))
+            )
+            stage.append_to_journal(
+                journal_path, stage.UNSTAGED, File(tmppath.joinpath("bar"))
+            )
+
+            result = stage.load_from_journal(stage_path, journal_path)
+
+        self.assertListEqual(
+            result.added_files, [File(file_path, hashid=hashid)]
+        )
+        self.assertListEqual(result.removed_files, [])
+
+    def test_load_from_journal_changed_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            stage_path = tmppath.joinpath("stage")
+            journal_path = tmppath.joinpath("stage.journal")
+
+            file_path = tmppath.joinpath("foo")
+            file_path.write_text("foo")
+
+            stage.store_as_file(stage_path, Stage())
+
+            stage.append_to_journal(
+                journal_path,
+                stage.ADDED,
+                File(file_path, hashid=transform.file_as_hashid(file_path)),
+            )
+
+            file_path.write_text("foobar")
+
+            result = stage.load_from_journal(stage_path, journal_path)
+
+        self.assertListEqual(result.added_files, [File(file_path)])
+
+    def test_load_from_journal_incomplete_line(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            stage_path = tmppath.joinpath("stage")
+            journal_path = tmppath.joinpath("stage.journal")
+
+            stage.store_as_file(stage_path, Stage())
+
+            stage.append_to_journal(
+                journal_path, stage.ADDED, File(Path("foo"))
+            )
+
+            with open(journal_path, "a") as f:
+                f.write('{"operation": "added", "fi')
+
+            result = stage.load_from_journal(stage_path, journal_path)
+
+        self.assertListEqual(result.added_files, [File(Path("foo"))])
+
+    def test_append_to_journal_unknown_operation(self):
+        with self.assertRaises(ValueError):
+            stage.append_to_journal(
+                Path("stage.journal"), "foobar", File(Path("foo"))
+            )
+
+    def test_compact(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            stage_path = tmppath.joinpath("stage")
+            journal_path = tmppath.joinpath("stage.journal")
+
+            file_path = tmppath.joinpath("foo")
+            file_path.write_text("foo")
+
+            hashid = transform.file_as_hashid(file_path)
+
+            stage.store_as_file(stage_path, Stage())
+
+            stage.append_to_journal(
+                journal_path, stage.UPDATED, File(file_path, hashid=hashid)
+            )
+
+            stage.compact(stage_path, journal_path)
+
+            journal_exists = journal_path.is_file()
+            valid_result = stage.load_from_journal(stage_path, journal_path)
+
+            file_path.write_text("foobar")
+
+            changed_result = stage.load_from_journal(
+                stage_path, journal_path
+            )
+
+        self.assertFalse(journal_exists)
+        self.assertListEqual(
+            valid_result.updated_files, [File(file_path, hashid=hashid)]
+        )
+        self.assertListEqual(changed_result.updated_files, [File(file_path)])
+
+    def test_compact_concurrent(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            stage_path = tmppath.joinpath("stage")
+            journal_path = tmppath.joinpath("stage.journal")
+
+            stage.store_as_file(stage_path, Stage())
+
+            def append(start: int) -> None:
+                for i in range(start, start + 50):
+                    file_instance = File(tmppath.joinpath(str(i)))
+
+                    stage.append_to_journal(
+                        journal_path, stage.ADDED, file_instance
+                    )
+
+            def compact() -> None:
+                for _ in range(20):
+                    stage.compact(stage_path, journal_path)
+
+            threads = [
+                threading.Thread(target=append, args=(0,)),
+                threading.Thread(target=append, args=(50,)),
+                threading.Thread(target=compact),
+            ]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+            result = stage.load_from_journal(stage_path, journal_path)
+
+        # no entry appended while compacting gets lost
+        self.assertEqual(len(result.added_files), 100)
+
+    def test_needs_compact(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            stage_path = Path(tmpdirname).joinpath("stage")
+
+            missing = stage.needs_compact(stage_path, stage.COMPACT_SIZE + 1)
+
+            with open(stage_path, "wb") as f:
+                f.write(b" " * 4 * stage.COMPACT_SIZE)
+
+            # the journal has to grow with the stage file
+            small = stage.needs_compact(stage_path, stage.COMPACT_SIZE + 1)
+            large = stage.needs_compact(stage_path, 3 * stage.COMPACT_SIZE)
+
+        self.assertTrue(missing)
+        self.assertFalse(small)
+        self.assertTrue(large)
+        self.assertFalse(stage.needs_compact(stage_path, 1))
@@ -0,0 +1,131 @@
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import directory, fs, index, repository, store, transform
+
+from helpers import write_file
+
+
+class TestStoreModule(unittest.TestCase):
+    def assert_store(self, store_instance: store.Store) -> None:
+        hashid = store_instance.put_bytes(b"hello world")
+
+        self.assertEqual(hashid, transform.bytes_as_hashid(b"hello world"))
+        self.assertEqual(store_instance.get(hashid), b"hello world")
+        self.assertTrue(store_instance.exists(hashid))
+
+        items = [
+            (transform.bytes_as_hashid(x), x)
+            for x in [str(i).encode("utf-8") for i in range(1000)]
+        ]
+
+        store_instance.put_many(items)
+
+        # storing twice keeps the existing object
+        store_instance.put_many(items[:10])
+
+        self.assertListEqual(
+            store_instance.get_many([x[0] for x in items]),
+            [x[1] for x in items],
+        )
+
+        self.assertListEqual(
+            store_instance.exists_many([items[0][0], "f" * 64]),
+            [True, False],
+        )
+
+        self.assertListEqual(
+            list(store_instance.iterate()),
+            sorted([hashid, *[x[0] for x in items]]),
+        )
+
+        data = {"foo": "bar"}
+
+        self.assertDictEqual(
+            store_instance.get_dict(store_instance.put_dict(data)), data
+        )
+
+        store_instance.remove(hashid)
+
+        self.assertFalse(store_instance.exists(hashid))
+
+        with self.assertRaises(FileNotFoundError):
+            store_instance.get(hashid)
+
+    def test_loose_store(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            blobs_path = Path(tmpdirname)
+
+            store_instance = store.LooseStore(blobs_path)
+
+            self.assert_store(store_instance)
+
+            hashid = store_instance.put_dict({"foo": "bar"})
+
+            # same layout as the fs blob functions
+            self.assertDictEqual(
+                fs.load_blob_as_dict(blobs_path, hashid), {"foo": "bar"}
+            )
+
+    def test_loose_store_remove_index(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath)
+
+            store_instance = repository.get_store(tmppath)
+
+            hashids = [store_instance.put_bytes(x) for x in [b"foo", b"bar"]]
+
+            store_instance.remove(hashids[0])
+
+            blobs_path = repository.get_blobs_path(tmppath)
+
+            # the other objects are still found through the index
+            contained = [index.contains(blobs_path, x) for x in hashids]
+
+        self.assertListEqual(contained, [False, True])
+
+    def test_memory_store(self):
+        self.assert_store(store.MemoryStore())
+
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            database_path = Path(tmpdirname).joinpath("objects.db")
+
+            with store.SqliteStore(database_path) as store_instance:
+                self.assert_store(store_instance)
+
+                hashid = store_instance.put_bytes(b"foo")
+
+            with store.SqliteStore(database_path) as store_instance:
+                self.assertEqual(store_instance.get(hashid), b"foo")
+
+    def test_directory_store_as_blob(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            working_path = Path(tmpdirname)
+
+            write_file(working_path.joinpath("a.txt"), "foo")
+            write_file(working_path.joinpath("b", "c.txt"), "bar")
+
+            store_instance = store.MemoryStore()
+
+            hashid = directory.store_as_blob(
+                store_instance,
+                directory.load_from_directory_path(working_path),
+            )
+
+            result = directory.load_from_blob(store_instance, hashid)
+
+            self.assertEqual(
+                result.files["a.txt"].hashid,
+                transform.bytes_as_hashid(b"foo"),
+            )
+            self.assertEqual(
+                store_instance.get(
+                    result.directories["b"].files["c.txt"].hashid
+                ),
+                b"bar",
+            )
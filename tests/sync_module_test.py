@@ -0,0 +1,177 @@
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import commit, fs, repository, sync
+from snapfs.datatypes import Author, Branch, Commit
+
+
+def store_commit(path: Path, content: str, previous: str = "") -> str:
+    blobs_path = repository.get_blobs_path(path)
+
+    file_hashid = fs.store_dict_as_blob(blobs_path, {"content": content})
+
+    sub_tree_hashid = fs.store_dict_as_blob(
+        blobs_path, {"directories": {}, "files": {"foo.json": file_hashid}}
+    )
+
+    tree_hashid = fs.store_dict_as_blob(
+        blobs_path,
+        {"directories": {"sub": sub_tree_hashid}, "files": {}},
+    )
+
+    commit_hashid = commit.store_as_blob(
+        blobs_path,
+        Commit(
+            Author("beesperester"),
+            content,
+            tree_hashid,
+            [previous] if previous else [],
+        ),
+    )
+
+    repository.store_reference(path, "branches/main", Branch(commit_hashid))
+
+    return commit_hashid
+
+
+class TestSyncModule(unittest.TestCase):
+    def test_find_missing(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            destination_path = Path(tmpdirname).joinpath("destination")
+
+            repository.initialize(source_path)
+            repository.initialize(destination_path)
+
+            commit_hashid = store_commit(source_path, "foo")
+
+            source = repository.get_blobs_path(source_path)
+
+            result = sync.find_missing(
+                source,
+                repository.get_blobs_path(destination_path),
+                [commit_hashid],
+            )
+
+            commit_instance = repository.get_commit(
+                source_path, commit_hashid
+            )
+
+            tree = fs.load_blob_as_dict(source, commit_instance.tree_hashid)
+
+            sub_tree = fs.load_blob_as_dict(
+                source, tree["directories"]["sub"]
+            )
+
+            # objects are grouped from the leaves up
+            self.assertListEqual(
+                result,
+                [
+                    [sub_tree["files"]["foo.json"]],
+                    [tree["directories"]["sub"]],
+                    [commit_instance.tree_hashid],
+                    [commit_hashid],
+                ],
+            )
+
+    def test_push(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            destination_path = Path(tmpdirname).joinpath("destination")
+
+            repository.initialize(source_path)
+            repository.initialize(destination_path)
+
+            first_hashid = store_commit(source_path, "foo")
+
+            result = sync.push(source_path, destination_path)
+
+            self.assertEqual(len(result), 4)
+
+            second_hashid = store_commit(source_path, "bar", first_hashid)
+
+            result = sync.push(source_path, destination_path)
+
+            # the previous commit is already there and not walked again
+            self.assertEqual(len(result), 4)
+            self.assertNotIn(first_hashid, result)
+
+            self.assertEqual(
+                repository.get_branch(destination_path, "main").commit_hashid,
+                second_hashid,
+            )
+
+            self.assertListEqual(
+                sync.push(source_path, destination_path, ["branches/main"]),
+                [],
+            )
+
+    def test_push_diverged(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            destination_path = Path(tmpdirname).joinpath("destination")
+
+            repository.initialize(source_path)
+            repository.initialize(destination_path)
+
+            first_hashid = store_commit(source_path, "foo")
+
+            sync.push(source_path, destination_path)
+
+            # destination moves ahead of source
+            second_hashid = store_commit(
+                destination_path, "bar", first_hashid
+            )
+
+            with self.assertRaises(sync.SyncError):
+                sync.push(source_path, destination_path)
+
+            self.assertEqual(
+                repository.get_branch(destination_path, "main").commit_hashid,
+                second_hashid,
+            )
+
+            # fetching the commit of destination fast forwards source
+            sync.fetch(source_path, destination_path)
+
+            self.assertEqual(
+                repository.get_branch(source_path, "main").commit_hashid,
+                second_hashid,
+            )
+
+            third_hashid = store_commit(destination_path, "baz")
+
+            sync.push(source_path, destination_path, force=True)
+
+            result = repository.get_branch(
+                destination_path, "main"
+            ).commit_hashid
+
+        self.assertNotEqual(third_hashid, second_hashid)
+        self.assertEqual(result, second_hashid)
+
+    def test_fetch(self):
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            source_path = Path(tmpdirname).joinpath("source")
+            destination_path = Path(tmpdirname).joinpath("destination")
+
+            repository.initialize(source_path)
+            repository.initialize(destination_path)
+
+            commit_hashid = store_commit(source_path, "foo")
+
+            sync.fetch(destination_path, source_path)
+
+            commit_instance = repository.get_commit(
+                destination_path, commit_hashid
+            )
+
+            self.assertEqual(commit_instance.message, "foo")
+
+            with self.assertRaises(repository.NoReferenceError):
+                sync.fetch(
+                    destination_path, source_path, ["branches/missing"]
+                )
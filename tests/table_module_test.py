@@ -0,0 +1,101 @@
+import os
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import differences, directory, table
+from snapfs.datatypes import File
+
+from helpers import write_file
+
+
+class TestTableModule(unittest.TestCase):
+    def test_table(self):
+        entries = [
+            ("a.txt", table.FILE, table.EMPTY_DIGEST, 1, 0),
+            ("a/b/c.txt", table.FILE, table.EMPTY_DIGEST, 2, 0),
+            ("a", table.DIRECTORY, table.EMPTY_DIGEST, -1, 0),
+            ("a/b", table.DIRECTORY, table.EMPTY_DIGEST, -1, 0),
+            ("a/d.txt", table.FILE, table.EMPTY_DIGEST, 3, 0),
+        ]
+
+        result = table.Table(entries)
+
+        self.assertListEqual(
+            result.paths, ["a", "a/b", "a/b/c.txt", "a/d.txt", "a.txt"]
+        )
+        self.assertListEqual(list(result.parents), [-1, 0, 1, 0, -1])
+        self.assertListEqual(list(result.ends), [4, 3, 3, 4, 5])
+        self.assertListEqual(list(result.sizes), [-1, -1, 2, 3, 1])
+
+    def test_compare(self):
+        result = []
+        expected_result = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            working_path = tmppath.joinpath("working")
+            blobs_path = tmppath.joinpath("blobs")
+
+            write_file(working_path.joinpath("a", "foo.txt"), "foo")
+            write_file(working_path.joinpath("a", "bar.txt"), "bar")
+            write_file(working_path.joinpath("b", "c", "baz.txt"), "baz")
+            write_file(working_path.joinpath("d"), "d")
+
+            old_instance = directory.load_from_directory_path(working_path)
+
+            old_hashid = directory.store_as_blob(blobs_path, old_instance)
+
+            write_file(working_path.joinpath("a", "foo.txt"), "changed")
+            os.remove(working_path.joinpath("b", "c", "baz.txt"))
+            os.remove(working_path.joinpath("d"))
+            write_file(working_path.joinpath("d", "e.txt"), "e")
+
+            new_instance = directory.load_from_directory_path(working_path)
+
+            new_hashid = directory.store_as_blob(blobs_path, new_instance)
+
+            expected_result = differences.serialize_as_messages(
+                directory.compare_blobs(blobs_path, old_hashid, new_hashid)
+            )
+
+            old_table = table.load_from_blob(blobs_path, old_hashid)
+
+            result = differences.serialize_as_messages(
+                table.compare(
+                    old_table, table.load_from_blob(blobs_path, new_hashid)
+                )
+            )
+
+            working_result = differences.serialize_as_messages(
+                table.compare(
+                    old_table, table.load_from_directory_path(working_path)
+                )
+            )
+
+        self.assertListEqual(sorted(result), sorted(expected_result))
+        self.assertListEqual(
+            sorted(
+                x.replace(str(working_path) + "/", "") for x in working_result
+            ),
+            sorted(expected_result),
+        )
+
+    def test_get_file(self):
+        result = table.Table(
+            [("a", table.FILE, bytes(range(32)), 1, 0)],
+            Path("working"),
+            Path("blobs"),
+        ).get_file(0)
+
+        self.assertEqual(
+            result,
+            File(
+                Path("working", "a"),
+                True,
+                Path("blobs", "00", bytes(range(32)).hex()[2:]),
+                bytes(range(32)).hex(),
+            ),
+        )
@@ -45,6 +45,17 @@ class TestTransformModule(unittest.TestCase):
 
         self.assertDictEqual(result, expected_result)
 
+    def test_as_dict_slots(self):
+        class Foobar:
+            __slots__ = ("name",)
+
+            def __init__(self):
+                self.name = "foo"
+
+        result = transform.as_dict(Foobar())
+
+        self.assertDictEqual(result, {"name": "foo"})
+
     def test_slug(self):
         expected_result = "fsfriendlypath"
         result = transform.slug("fs friendly-path")
@@ -112,3 +123,14 @@ class TestTransformModule(unittest.TestCase):
         result = transform.bytes_as_hashid(data)
 
         self.assertEqual(result, expected_result)
+
+    def test_bytes_as_hashid_blake2b(self):
+        data = b"this is some binary content"
+
+        result = transform.bytes_as_hashid(data, transform.BLAKE2B)
+
+        self.assertEqual(len(result), 64)
+        self.assertNotEqual(result, transform.bytes_as_hashid(data))
+
+        with self.assertRaises(ValueError):
+            transform.bytes_as_hashid(data, "md5")
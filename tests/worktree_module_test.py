@@ -0,0 +1,349 @@
+import os
+import unittest
+import tempfile
+
+from pathlib import Path
+
+from snapfs import differences, directory, monitor, repository, stage
+from snapfs import transform, worktree
+from snapfs.datatypes import Author, File, Stage
+
+from helpers import write_file
+
+
+def initialize_repository(path: Path) -> None:
+    repository.initialize(path)
+
+    write_file(path.joinpath("a", "foo.txt"), "foo")
+    write_file(path.joinpath("b", "bar.txt"), "bar")
+
+
+class TestWorktreeModule(unittest.TestCase):
+    def test_get_status(self):
+        result = []
+        expected_result = ["added: a/foo.txt", "added: b/bar.txt"]
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            result = [
+                x.replace(tmpdirname + "/", "")
+                for x in differences.serialize_as_messages(
+                    worktree.get_status(tmppath)
+                )
+            ]
+
+        self.assertListEqual(result, expected_result)
+
+    def test_snapshot(self):
+        result = []
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "initial commit"
+            )
+
+            self.assertEqual(
+                repository.get_branch(tmppath, "main").commit_hashid,
+                commit_hashid,
+            )
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "baz")
+            os.remove(tmppath.joinpath("b", "bar.txt"))
+
+            second_commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "second commit"
+            )
+
+            commit_instance = repository.get_commit(
+                tmppath, second_commit_hashid
+            )
+
+            result = directory.serialize_as_dict(
+                directory.load_from_blob(
+                    repository.get_blobs_path(tmppath),
+                    commit_instance.tree_hashid,
+                )
+            )
+
+            self.assertListEqual(
+                commit_instance.previous_commits_hashids, [commit_hashid]
+            )
+            self.assertListEqual(
+                differences.serialize_as_messages(
+                    worktree.get_status(tmppath)
+                ),
+                [],
+            )
+
+        self.assertListEqual(list(result["directories"].keys()), ["a"])
+
+    def test_get_status_changes(self):
+        result = []
+        expected_result = ["updated: a/foo.txt"]
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            worktree.snapshot(tmppath, Author("beesperester"), "initial")
+
+            changes_path = repository.get_changes_path(tmppath, False)
+
+            # pretend a monitor running in this process
+            # has seen a change of a/foo.txt only
+            monitor.record(changes_path, set(), True, os.getpid())
+            monitor.reset(changes_path, ["a/foo.txt"], 1)
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "baz")
+            write_file(tmppath.joinpath("b", "bar.txt"), "unseen")
+
+            result = [
+                x.replace(tmpdirname + "/", "")
+                for x in differences.serialize_as_messages(
+                    worktree.get_status(tmppath)
+                )
+            ]
+
+        self.assertListEqual(result, expected_result)
+
+    def test_get_status_changes_ignore_file(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            worktree.snapshot(tmppath, Author("beesperester"), "initial")
+
+            changes_path = repository.get_changes_path(tmppath, False)
+
+            # only the ignore file has been seen to change
+            monitor.record(changes_path, set(), True, os.getpid())
+            monitor.reset(changes_path, ["a/.ignore"], 1)
+
+            write_file(tmppath.joinpath("a", ".ignore"), "foo.txt")
+
+            result = [
+                x.replace(tmpdirname + "/", "")
+                for x in differences.serialize_as_messages(
+                    worktree.get_status(tmppath)
+                )
+            ]
+
+        self.assertListEqual(
+            result, ["added: a/.ignore", "removed: a/foo.txt"]
+        )
+        self.assertListEqual(
+            worktree.widen_dirty_paths(["a/.ignore", "a/b/foo.txt", "c"]),
+            ["a", "c"],
+        )
+        self.assertIsNone(worktree.widen_dirty_paths([".ignore"]))
+
+    def test_get_status_renamed(self):
+        result = []
+        expected_result = ["renamed: a/foo.txt -> c/foo.txt"]
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            worktree.snapshot(tmppath, Author("beesperester"), "initial")
+
+            os.makedirs(tmppath.joinpath("c"))
+            os.rename(
+                tmppath.joinpath("a", "foo.txt"),
+                tmppath.joinpath("c", "foo.txt"),
+            )
+
+            result = [
+                x.replace(tmpdirname + "/", "")
+                for x in differences.serialize_as_messages(
+                    worktree.get_status(tmppath)
+                )
+            ]
+
+        self.assertListEqual(result, expected_result)
+
+
+    def test_get_status_paths(self):
+        result = []
+        expected_result = ["added: a/foo.txt"]
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            result = [
+                x.replace(tmpdirname + "/", "")
+                for x in differences.serialize_as_messages(
+                    worktree.get_status(tmppath, ["a/"])
+                )
+            ]
+
+        self.assertListEqual(result, expected_result)
+
+    def test_get_pathspec(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname).joinpath("repository")
+
+            initialize_repository(tmppath)
+
+            write_file(Path(tmpdirname).joinpath("outside.txt"), "outside")
+
+            result = worktree.get_pathspec(
+                tmppath, [str(tmppath.joinpath("a")), "./b/"]
+            )
+
+            for paths in [
+                ["../outside.txt"],
+                ["a/../../outside.txt"],
+                [str(Path(tmpdirname).joinpath("outside.txt"))],
+            ]:
+                with self.assertRaises(ValueError):
+                    worktree.snapshot(
+                        tmppath, Author("beesperester"), "escape", paths
+                    )
+
+            whole = worktree.get_pathspec(tmppath, [str(tmppath)])
+
+        self.assertListEqual(result, ["a", "b"])
+        self.assertIsNone(whole)
+
+    def test_snapshot_blake2b(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            repository.initialize(tmppath, transform.BLAKE2B)
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "foo")
+
+            commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "initial commit"
+            )
+
+            tree = directory.load_from_blob(
+                repository.get_blobs_path(tmppath),
+                repository.get_commit(tmppath, commit_hashid).tree_hashid,
+            )
+
+            self.assertEqual(
+                tree.directories["a"].files["foo.txt"].hashid,
+                transform.string_as_hashid("foo", transform.BLAKE2B),
+            )
+
+            # the working directory is hashed with the same algorithm
+            self.assertListEqual(
+                differences.serialize_as_messages(
+                    worktree.get_status(tmppath)
+                ),
+                [],
+            )
+
+    def test_snapshot_streaming(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "initial commit"
+            )
+
+            streaming_commit_hashid = worktree.snapshot(
+                tmppath,
+                Author("beesperester"),
+                "streaming commit",
+                streaming=True,
+            )
+
+            self.assertEqual(
+                repository.get_commit(tmppath, commit_hashid).tree_hashid,
+                repository.get_commit(
+                    tmppath, streaming_commit_hashid
+                ).tree_hashid,
+            )
+
+    def test_snapshot_paths(self):
+        result = []
+        expected_result = ["updated: b/bar.txt"]
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "initial commit"
+            )
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "baz")
+            write_file(tmppath.joinpath("a", "new.txt"), "new")
+            write_file(tmppath.joinpath("b", "bar.txt"), "baz")
+
+            second_commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "second commit", ["a"]
+            )
+
+            self.assertListEqual(
+                differences.serialize_as_messages(
+                    repository.compare_commits(
+                        tmppath, commit_hashid, second_commit_hashid
+                    )
+                ),
+                ["added: a/new.txt", "updated: a/foo.txt"],
+            )
+
+            result = [
+                x.replace(tmpdirname + "/", "")
+                for x in differences.serialize_as_messages(
+                    worktree.get_status(tmppath)
+                )
+            ]
+
+        self.assertListEqual(result, expected_result)
+
+    def test_commit_stage(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            tmppath = Path(tmpdirname)
+
+            initialize_repository(tmppath)
+
+            commit_hashid = worktree.snapshot(
+                tmppath, Author("beesperester"), "initial commit"
+            )
+
+            write_file(tmppath.joinpath("a", "foo.txt"), "baz")
+            write_file(tmppath.joinpath("b", "bar.txt"), "unstaged")
+
+            repository.stage_file(
+                tmppath, stage.UPDATED, File(tmppath.joinpath("a", "foo.txt"))
+            )
+            repository.stage_file(
+                tmppath, stage.REMOVED, File(Path("b", "bar.txt"))
+            )
+
+            second_commit_hashid = worktree.commit_stage(
+                tmppath, Author("beesperester"), "second commit"
+            )
+
+            result = differences.serialize_as_messages(
+                repository.compare_commits(
+                    tmppath, commit_hashid, second_commit_hashid
+                )
+            )
+
+            stage_instance = repository.get_stage(tmppath)
+
+        self.assertListEqual(
+            result, ["updated: a/foo.txt", "removed: b/bar.txt"]
+        )
+        self.assertEqual(stage_instance, Stage())